@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''
+Event loop responsiveness while validating a batch of descriptors inline, and with adescriptor_validation in
+thread and process executors: wall time of the batch and worst delay of a 1 ms ticker running on the same loop.
+Usage: python3 benchmarks/bench_async_validation.py [descriptor_file] [descriptors]
+'''
+
+import asyncio
+import sys
+import time
+
+from osm_im.parallel import AsyncExecutor
+from osm_im.validation import Validation
+
+
+async def ticker(delays):
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        delays.append(time.perf_counter() - start - 0.001)
+
+
+async def measure(validate_all):
+    delays = [0]
+    ticker_task = asyncio.create_task(ticker(delays))
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    await validate_all()
+    elapsed = time.perf_counter() - start
+    # lets the ticker record the delay of the tick blocked by the batch
+    await asyncio.sleep(0.01)
+    ticker_task.cancel()
+    return elapsed * 1000, max(delays) * 1000
+
+
+def main(descriptor_file, count):
+    with open(descriptor_file) as f:
+        descriptor = f.read()
+    validation = Validation()
+    validation.descriptor_validation(descriptor)
+
+    async def inline():
+        for _ in range(count):
+            validation.descriptor_validation(descriptor)
+
+    print("inline    batch {:8.1f} ms  worst loop delay {:8.1f} ms".format(*asyncio.run(measure(inline))))
+    for kind in ("thread", "process"):
+        executor = AsyncExecutor(kind)
+
+        async def offloaded():
+            await asyncio.gather(*(validation.adescriptor_validation(descriptor, executor=executor)
+                                   for _ in range(count)))
+
+        try:
+            # first run starts the pool (and imports the models in the worker processes)
+            asyncio.run(measure(offloaded))
+            print("{:8}  batch {:8.1f} ms  worst loop delay {:8.1f} ms".format(
+                kind, *asyncio.run(measure(offloaded))))
+        finally:
+            executor.shutdown()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else "tests/examples/hackfest_charmed_vnfd_im.yaml",
+         int(sys.argv[2]) if len(sys.argv) > 2 else 20)
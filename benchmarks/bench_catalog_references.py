@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''
+Catalog reference index over synthetic SOL006 catalogs with an increasing number of VNFDs (and one NSD per
+VNFD): time to build the index, to check every reference of the catalog, and to check, add and remove a
+single NSD, that should not depend on the size of the catalog.
+Usage: python3 benchmarks/bench_catalog_references.py [vnfds ...]
+'''
+
+import sys
+import time
+import timeit
+
+from osm_im.catalog_references import CatalogIndex
+
+
+def synthetic_sol006_vnfd(index):
+    return {"vnfd": {
+        "id": "vnf-{}".format(index),
+        "vdu": [{"id": "vdu-{}".format(vdu)} for vdu in range(5)],
+        "ext-cpd": [{"id": "ext-{}".format(cpd)} for cpd in range(4)],
+        "df": [{"id": "default-df"}],
+    }}
+
+
+def synthetic_sol006_nsd(index, vnfd_count):
+    vnfd_ids = ["vnf-{}".format((index + offset) % vnfd_count) for offset in range(3)]
+    return {"nsd": {"nsd": [{
+        "id": "ns-{}".format(index),
+        "vnfd-id": vnfd_ids,
+        "df": [{"id": "default-df", "vnf-profile": [{
+            "id": str(position),
+            "vnfd-id": vnfd_id,
+            "flavour-id": "default-df",
+            "virtual-link-connectivity": [{
+                "virtual-link-profile-id": "vl-{}".format(cpd),
+                "constituent-cpd-id": [{"constituent-base-element-id": str(position),
+                                        "constituent-cpd-id": "ext-{}".format(cpd)}],
+            } for cpd in range(4)],
+        } for position, vnfd_id in enumerate(vnfd_ids)]}],
+    }]}}
+
+
+def main(vnfd_counts):
+    for vnfd_count in vnfd_counts:
+        descriptors = [synthetic_sol006_vnfd(index) for index in range(vnfd_count)]
+        descriptors += [synthetic_sol006_nsd(index, vnfd_count) for index in range(vnfd_count)]
+        start = time.perf_counter()
+        index = CatalogIndex()
+        for descriptor in descriptors:
+            index.add(descriptor)
+        build = (time.perf_counter() - start) * 1000
+        check_all = min(timeit.repeat(index.check_all, number=1, repeat=3)) * 1000
+        new_nsd = synthetic_sol006_nsd(vnfd_count, vnfd_count)
+        check = min(timeit.repeat(lambda: index.check(new_nsd), number=100, repeat=3)) * 10
+        add_remove = min(timeit.repeat(lambda: (index.add(new_nsd), index.remove("nsd", "ns-{}".format(vnfd_count))),
+                                       number=100, repeat=3)) * 10
+        print("{:7} VNFDs  build {:9.1f} ms  check all {:8.2f} ms  check NSD {:7.4f} ms  "
+              "add+remove NSD {:7.4f} ms".format(vnfd_count, build, check_all, check, add_remove))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000])
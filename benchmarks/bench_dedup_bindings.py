@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''
+Generated lines, import time and resident memory of every generated pyangbind module, as given and after
+tools/dedup_bindings.py (applied to a copy). Modules already deduplicated by 'make models' show no difference.
+Import time and memory are measured in a fresh interpreter, importing the module (with its bytecode already
+cached) and building its root object.
+Usage: python3 benchmarks/bench_dedup_bindings.py [rounds] [module_file ...]
+'''
+
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+from dedup_bindings import dedup_module  # noqa: E402
+
+DEFAULT_FILES = ["osm_im/vnfd.py", "osm_im/nsd.py", "osm_im/nst.py", "osm_im/etsi_nfv_vnfd.py",
+                 "osm_im/etsi_nfv_nsd.py"]
+
+MEASURE = '''
+import sys, time
+def rss():
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * {page_size}
+sys.path.insert(0, {directory!r})
+before = rss()
+start = time.perf_counter()
+module = __import__({module!r})
+getattr(module, {module!r})()
+print(time.perf_counter() - start, rss() - before)
+'''
+
+
+def measure(file_path, rounds):
+    '''
+    Returns (best import time in ms, resident memory of the import in KiB) of the module in file_path
+    '''
+    directory, file_name = os.path.split(os.path.abspath(file_path))
+    code = MEASURE.format(page_size=os.sysconf("SC_PAGE_SIZE"), directory=directory, module=file_name[:-3])
+    runs = []
+    # the first run compiles and caches the bytecode
+    for _ in range(rounds + 1):
+        result = subprocess.run([sys.executable, "-c", code], stdout=subprocess.PIPE,
+                                universal_newlines=True, check=True)
+        elapsed, rss = result.stdout.split()
+        runs.append((float(elapsed) * 1000, int(rss) / 1024))
+    return min(runs[1:])
+
+
+def main(rounds, files):
+    with tempfile.TemporaryDirectory() as directory:
+        for file_path in files:
+            if not os.path.exists(file_path):
+                print("{:28} not generated".format(file_path))
+                continue
+            dedup_path = os.path.join(directory, os.path.basename(file_path))
+            with open(file_path) as f:
+                code = f.read()
+            dedup_code, classes, replaced = dedup_module(code)
+            with open(dedup_path, "w") as f:
+                f.write(dedup_code)
+            for label, path, lines in (("as given", file_path, code.count("\n")),
+                                       ("deduplicated", dedup_path, dedup_code.count("\n"))):
+                elapsed, rss = measure(path, rounds)
+                print("{:28} {:12} {:7} lines  import {:7.1f} ms  RSS {:8.0f} KiB".format(
+                    file_path, label, lines, elapsed, rss))
+            print("{:28} {} of {} classes deduplicated".format(file_path, replaced, classes))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5, sys.argv[2:] or DEFAULT_FILES)
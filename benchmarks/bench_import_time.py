@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''
+Import time of the osm_im modules, as reported by python -X importtime in a fresh interpreter.
+Usage: python3 benchmarks/bench_import_time.py [rounds] [module ...]
+'''
+
+import subprocess
+import sys
+
+DEFAULT_MODULES = ["osm_im.validation", "osm_im.im_translation"]
+GENERATED_MODULES = ["osm_im.vnfd", "osm_im.nsd", "osm_im.nst", "osm_im.etsi_nfv_vnfd", "osm_im.etsi_nfv_nsd"]
+
+
+def import_times(module):
+    '''
+    Returns {imported module: cumulative import time in microseconds} for a fresh import of module
+    '''
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import {}".format(module)],
+                            stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main(rounds, modules):
+    for module in modules:
+        runs = [import_times(module) for _ in range(rounds)]
+        best = min(runs, key=lambda times: times[module])
+        generated = [name for name in GENERATED_MODULES if name in best]
+        print("{:25} {:9.1f} ms   generated models imported: {}".format(
+            module, best[module] / 1000, ", ".join(generated) or "none"))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5, sys.argv[2:] or DEFAULT_MODULES)
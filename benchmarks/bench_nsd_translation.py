@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''
+Scaling of the IM to SOL006 NSD translation with synthetic descriptors of increasing number of constituent VNFs.
+Usage: python3 benchmarks/bench_nsd_translation.py [vnfs ...]
+'''
+
+import sys
+import timeit
+
+from osm_im.im_translation import translate_im_nsd_to_sol006
+
+
+def synthetic_im_nsd(vnf_count):
+    '''
+    IM NSD with vnf_count constituent VNFs. Every VNF is connected to a management VLD shared by all of them,
+    and through two data connection points to a VLD shared with the previous and the next VNFs of a chain
+    '''
+    constituent_vnfds = []
+    mgmt_cp_refs = []
+    data_vlds = []
+    for index in range(1, vnf_count + 1):
+        vnfd_id = "vnf-{}-vnfd".format(index % 10)
+        constituent_vnfds.append({"member-vnf-index": str(index), "vnfd-id-ref": vnfd_id})
+        mgmt_cp_refs.append({"member-vnf-index-ref": str(index), "vnfd-id-ref": vnfd_id,
+                             "vnfd-connection-point-ref": "mgmt", "ip-address": "10.0.0.{}".format(index % 250)})
+        if index < vnf_count:
+            next_vnfd_id = "vnf-{}-vnfd".format((index + 1) % 10)
+            data_vlds.append({
+                "id": "data-{}".format(index),
+                "name": "data-{}".format(index),
+                "vnfd-connection-point-ref": [
+                    {"member-vnf-index-ref": str(index), "vnfd-id-ref": vnfd_id, "vnfd-connection-point-ref": "out"},
+                    {"member-vnf-index-ref": str(index + 1), "vnfd-id-ref": next_vnfd_id,
+                     "vnfd-connection-point-ref": "in"},
+                ],
+            })
+    mgmt_vld = {"id": "mgmtnet", "name": "mgmtnet", "mgmt-network": True, "vim-network-name": "mgmt",
+                "vnfd-connection-point-ref": mgmt_cp_refs}
+    return {"nsd:nsd-catalog": {"nsd": [{
+        "id": "synthetic-{}-ns".format(vnf_count),
+        "name": "synthetic-{}-ns".format(vnf_count),
+        "constituent-vnfd": constituent_vnfds,
+        "vld": [mgmt_vld] + data_vlds,
+    }]}}
+
+
+def main(vnf_counts):
+    for vnf_count in vnf_counts:
+        im_nsd = synthetic_im_nsd(vnf_count)
+        rounds = max(1, 5000 // vnf_count)
+        elapsed = min(timeit.repeat(lambda: translate_im_nsd_to_sol006(im_nsd), number=rounds, repeat=3))
+        print("{:6} VNFs {:10.2f} ms".format(vnf_count, elapsed / rounds * 1000))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10, 100, 500])
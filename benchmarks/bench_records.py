@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''
+Record bindings over a synthetic VNFR with an increasing number of VDU records: validation of the whole record
+(from_dict), serialization (to_dict), validated update of a VDU record status, and memory of the record
+compared with the plain dict it was built from.
+Usage: python3 benchmarks/bench_records.py [vdurs ...]
+'''
+
+import sys
+import timeit
+import tracemalloc
+import uuid
+
+from osm_im.records import get_record_class
+
+
+def synthetic_vnfr(vdur_count):
+    vdurs = [{
+        "id": str(uuid.UUID(int=index + 1)),
+        "name": "vdu-{}".format(index),
+        "vdu-id-ref": "vdu-{}".format(index % 5),
+        "operational-status": "running",
+        "management-ip": "10.0.{}.{}".format(index // 250, index % 250),
+        "vm-flavor": {"vcpu-count": 2, "memory-mb": 4096, "storage-gb": 10},
+        "interface": [{"name": "eth0", "type": "EXTERNAL", "external-connection-point-ref": "mgmt"}],
+    } for index in range(vdur_count)]
+    return {
+        "id": str(uuid.UUID(int=0)),
+        "name": "synthetic-vnf",
+        "operational-status": "running",
+        "create-time": 1700000000,
+        "mgmt-interface": {"ip-address": "10.0.0.1"},
+        "vdur": vdurs,
+    }
+
+
+def _traced_size(build):
+    tracemalloc.start()
+    try:
+        built = build()
+        return built, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def main(vdur_counts):
+    vnfr_class = get_record_class("vnfr")
+    for vdur_count in vdur_counts:
+        data = synthetic_vnfr(vdur_count)
+        record = vnfr_class.from_dict(data)
+        rounds = max(1, 2000 // vdur_count)
+        results = []
+        for operation in (lambda: vnfr_class.from_dict(data), record.to_dict,
+                          lambda: record.vdur[-1].update({"operational-status": "running"})):
+            results.append(min(timeit.repeat(operation, number=rounds, repeat=3)) / rounds * 1000)
+        _, record_size = _traced_size(lambda: vnfr_class.from_dict(data))
+        _, dict_size = _traced_size(lambda: synthetic_vnfr(vdur_count))
+        print("{:6} VDURs  from_dict {:9.3f} ms  to_dict {:9.3f} ms  update {:9.4f} ms  "
+              "record {:8.1f} KiB  dict {:8.1f} KiB".format(vdur_count, *results, record_size / 1024,
+                                                            dict_size / 1024))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10, 100, 1000])
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''
+Per-call cost of instantiating the root object of every generated pyangbind module, as given and after
+tools/lazy_bindings.py (applied to a copy). Modules already made lazy by 'make models' show no difference,
+run it on the plain pyangbind output to see the gain. Each module is measured in a fresh interpreter.
+Usage: python3 benchmarks/bench_root_instantiation.py [rounds] [module_file ...]
+'''
+
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+from lazy_bindings import make_module_lazy  # noqa: E402
+
+DEFAULT_FILES = ["osm_im/vnfd.py", "osm_im/nsd.py", "osm_im/nst.py", "osm_im/etsi_nfv_vnfd.py",
+                 "osm_im/etsi_nfv_nsd.py"]
+
+MEASURE = '''
+import sys, timeit
+sys.path.insert(0, {directory!r})
+root_class = getattr(__import__({module!r}), {module!r})
+print(min(timeit.repeat(root_class, number={rounds}, repeat=3)) / {rounds})
+'''
+
+
+def measure(file_path, rounds):
+    '''
+    Returns the best per-call time in us of instantiating the root object of the module in file_path
+    '''
+    directory, file_name = os.path.split(os.path.abspath(file_path))
+    code = MEASURE.format(directory=directory, module=file_name[:-3], rounds=rounds)
+    result = subprocess.run([sys.executable, "-c", code], stdout=subprocess.PIPE,
+                            universal_newlines=True, check=True)
+    return float(result.stdout) * 1e6
+
+
+def main(rounds, files):
+    with tempfile.TemporaryDirectory() as directory:
+        for file_path in files:
+            if not os.path.exists(file_path):
+                print("{:28} not generated".format(file_path))
+                continue
+            lazy_path = os.path.join(directory, os.path.basename(file_path))
+            with open(file_path) as f:
+                code = f.read()
+            with open(lazy_path, "w") as f:
+                f.write(make_module_lazy(code))
+            for label, path in (("as given", file_path), ("lazy", lazy_path)):
+                print("{:28} {:8} {:9.1f} us".format(file_path, label, measure(path, rounds)))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200, sys.argv[2:] or DEFAULT_FILES)
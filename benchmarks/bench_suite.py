@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''
+Benchmark suite with machine-readable results and regression gating. Measures, over the descriptors in
+tests/examples: parsing, type sniffing and validation of every file, IM to SOL006 translation, import time
+of every generated module, peak memory of the validation per descriptor type, and the validation and
+translation (both ways for VNFDs) of synthetic descriptors scaled to 10x and 100x.
+Results are written as JSON ({"metadata": {...}, "results": {name: {"value", "unit"}}}). When a baseline
+(a previous results file) is given, every metric is compared with it and the exit status is 1 if any of them
+is slower or bigger than the baseline by more than the threshold, or if any metric of the baseline (selected
+by the filter) was skipped or not measured.
+Usage: python3 benchmarks/bench_suite.py [--rounds N] [--output FILE] [--baseline FILE] [--threshold RATIO]
+                                        [--filter TEXT]
+'''
+
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+import tracemalloc
+
+from bench_import_time import GENERATED_MODULES, import_times
+from bench_nsd_translation import synthetic_im_nsd
+from bench_vnfd_translation import synthetic_im_vnfd
+from osm_im.im_translation import translate_im_model_to_sol006, translate_sol006_to_im_vnfd
+from osm_im.validation import Validation, ValidationException, parse_descriptor, sniff_descriptor_type
+from osm_im.validation_cache import model_version
+
+EXAMPLES_FOLDER = os.path.join(os.path.dirname(__file__), '..', 'tests', 'examples')
+# Sizes of the synthetic descriptors (VDUs or constituent VNFs), the base size scaled to 10x and 100x
+SYNTHETIC_SIZES = (5, 50, 500)
+# Changes below these absolute values are noise, whatever the threshold
+NOISE = {"ms": 0.05, "KiB": 16}
+
+
+class BenchmarkSuite:
+    '''
+    Runs the benchmarks whose name contains name_filter, collecting {name: {"value", "unit"}} in results.
+    Timings are the best of rounds runs, in milliseconds; memory is the tracemalloc peak, in KiB
+    '''
+
+    def __init__(self, rounds=5, name_filter=""):
+        self.rounds = rounds
+        self.name_filter = name_filter
+        self.results = {}
+        self.skipped = {}
+
+    def run(self):
+        descriptors = self._load_examples()
+        self._bench_examples(descriptors)
+        self._bench_translation(descriptors)
+        self._bench_import_time()
+        self._bench_peak_memory(descriptors)
+        self._bench_synthetic()
+        return self.results
+
+    def _selected(self, name):
+        return self.name_filter in name
+
+    def _time(self, name, function, number=1):
+        if not self._selected(name):
+            return
+        try:
+            function()
+        except Exception as e:
+            self.skipped[name] = str(e)
+            return
+        elapsed = min(timeit.repeat(function, number=number, repeat=self.rounds)) / number
+        self.results[name] = {"value": round(elapsed * 1000, 4), "unit": "ms"}
+
+    def _load_examples(self):
+        descriptors = []
+        for file in sorted(glob.glob(os.path.join(EXAMPLES_FOLDER, '*.yaml'))):
+            with open(file, 'r') as descriptor_file:
+                content = descriptor_file.read()
+            descriptors.append((os.path.basename(file), content, parse_descriptor(content)))
+        return descriptors
+
+    def _bench_examples(self, descriptors):
+        validation = Validation()
+        for name, content, data in descriptors:
+            self._time("parse/{}".format(name), lambda: parse_descriptor(content), number=10)
+            self._time("sniff/{}".format(name), lambda: sniff_descriptor_type(content), number=100)
+            self._time("validate/{}".format(name), lambda: validation.descriptor_validation(content))
+
+    def _bench_translation(self, descriptors):
+        for name, content, data in descriptors:
+            if sniff_descriptor_type(content) in ("vnfd", "nsd"):
+                self._time("translate/{}".format(name),
+                           lambda: translate_im_model_to_sol006(data, validate="none"), number=10)
+
+    def _bench_import_time(self):
+        for module in GENERATED_MODULES:
+            name = "import/{}".format(module)
+            if not self._selected(name):
+                continue
+            try:
+                runs = [import_times(module)[module] for _ in range(self.rounds)]
+            except Exception as e:
+                self.skipped[name] = "cannot import {}: {}".format(module, e)
+                continue
+            self.results[name] = {"value": min(runs) / 1000, "unit": "ms"}
+
+    def _bench_peak_memory(self, descriptors):
+        descriptors_by_type = {}
+        for name, content, data in descriptors:
+            descriptors_by_type.setdefault(sniff_descriptor_type(content), []).append(data)
+        validation = Validation()
+        for descriptor_type, datas in sorted(descriptors_by_type.items(), key=lambda item: str(item[0])):
+            name = "peak-memory/{}".format(descriptor_type)
+            if descriptor_type is None or not self._selected(name):
+                continue
+            peak = 0
+            try:
+                for data in datas:
+                    # Validate once before measuring, so the import of the model is not counted
+                    validation.pyangbind_validation(descriptor_type, data)
+                    tracemalloc.start()
+                    try:
+                        validation.pyangbind_validation(descriptor_type, data)
+                        peak = max(peak, tracemalloc.get_traced_memory()[1])
+                    finally:
+                        tracemalloc.stop()
+            except (ImportError, ValidationException) as e:
+                self.skipped[name] = str(e)
+                continue
+            self.results[name] = {"value": round(peak / 1024, 1), "unit": "KiB"}
+
+    def _bench_synthetic(self):
+        validation = Validation()
+        for scale, size in zip(("1x", "10x", "100x"), SYNTHETIC_SIZES):
+            for descriptor_type, im_model in (("vnfd", synthetic_im_vnfd(size)), ("nsd", synthetic_im_nsd(size))):
+                self._time("synthetic/{}-{}/validate".format(descriptor_type, scale),
+                           lambda: validation.pyangbind_validation(descriptor_type, im_model, return_normalized=False))
+                self._time("synthetic/{}-{}/translate".format(descriptor_type, scale),
+                           lambda: translate_im_model_to_sol006(im_model, validate="none"))
+            im_model = synthetic_im_vnfd(size)
+            sol006_model = translate_im_model_to_sol006(im_model, validate="none")
+            self._time("synthetic/vnfd-{}/translate-to-im".format(scale),
+                       lambda: translate_sol006_to_im_vnfd(sol006_model))
+            self._time("synthetic/vnfd-{}/constraints".format(scale),
+                       lambda: validation.constraint_validation("vnfd", im_model))
+            vdu = im_model["vnfd:vnfd-catalog"]["vnfd"][0]["vdu"][-1]
+            self._time("synthetic/vnfd-{}/validate-vdu".format(scale),
+                       lambda: validation.subtree_validation("vnfd", "/vnfd:vnfd-catalog/vnfd/0/vdu/{}".format(
+                           size - 1), vdu, im_model, vdu), number=10)
+
+
+def compare(results, baseline, threshold):
+    '''
+    Compares results with baseline results, returns the list of (name, baseline value, value, ratio) of the
+    metrics worse than the baseline by more than threshold (0.2 for 20%). Metrics missing in any of them,
+    or measured in other units, are not compared (see missing)
+    '''
+    regressions = []
+    for name, result in sorted(results.items()):
+        base = baseline.get(name)
+        if base is None or base["unit"] != result["unit"]:
+            continue
+        difference = result["value"] - base["value"]
+        if difference <= NOISE.get(result["unit"], 0):
+            continue
+        ratio = result["value"] / base["value"] if base["value"] else float("inf")
+        if ratio > 1 + threshold:
+            regressions.append((name, base["value"], result["value"], ratio))
+    return regressions
+
+
+def missing(results, baseline, skipped, name_filter=""):
+    '''
+    Returns the list of (name, reason) of the baseline metrics whose name contains name_filter that cannot
+    be compared: skipped, not measured or measured in other units
+    '''
+    missing_metrics = []
+    for name, base in sorted(baseline.items()):
+        if name_filter not in name:
+            continue
+        if name in skipped:
+            missing_metrics.append((name, "skipped: {}".format(skipped[name].splitlines()[0] if skipped[name] else "")))
+        elif name not in results:
+            missing_metrics.append((name, "not measured"))
+        elif results[name]["unit"] != base["unit"]:
+            missing_metrics.append((name, "unit changed from {} to {}".format(base["unit"], results[name]["unit"])))
+    return missing_metrics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="osm_im benchmark suite")
+    parser.add_argument("--rounds", type=int, default=5, help="runs of every benchmark, the best one is kept")
+    parser.add_argument("--output", help="file where the JSON results are written, stdout by default")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed regression over the baseline, as a ratio (default 0.2)")
+    parser.add_argument("--filter", default="", help="only run the benchmarks whose name contains this text")
+    args = parser.parse_args(argv)
+
+    suite = BenchmarkSuite(rounds=args.rounds, name_filter=args.filter)
+    start = time.time()
+    results = suite.run()
+    report = {
+        "metadata": {
+            "osm_im": model_version(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": int(start),
+            "duration": round(time.time() - start, 1),
+            "rounds": args.rounds,
+        },
+        "results": results,
+        "skipped": suite.skipped,
+    }
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2, sort_keys=True)
+    else:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        print()
+    for name, reason in sorted(suite.skipped.items()):
+        print("skipped {}: {}".format(name, reason.splitlines()[0] if reason else ""), file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, "r") as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for name, base_value, value, ratio in regressions:
+            print("REGRESSION {}: {} -> {} {} ({:+.0%})".format(name, base_value, value, results[name]["unit"],
+                                                               ratio - 1), file=sys.stderr)
+        missing_metrics = missing(results, baseline, suite.skipped, args.filter)
+        for name, reason in missing_metrics:
+            print("MISSING {}: {}".format(name, reason), file=sys.stderr)
+        print("{} metrics compared with {}, {} regressions over {:.0%}, {} missing".format(
+            len(set(results) & set(baseline)), args.baseline, len(regressions), args.threshold,
+            len(missing_metrics)), file=sys.stderr)
+        return 1 if regressions or missing_metrics else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
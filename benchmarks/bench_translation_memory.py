@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''
+Peak RSS of translating a large catalog of synthetic IM VNFDs to SOL006, keeping every translated
+descriptor, when the translation shares the input subtrees (shared), when callers copy every descriptor
+before translating it as they had to do when the translation modified its input (copy), and when the
+input is a read-only view (read-only). Every mode runs in its own process.
+Usage: python3 benchmarks/bench_translation_memory.py [descriptors] [vdus]
+'''
+
+import copy
+import os
+import resource
+import subprocess
+import sys
+
+from bench_vnfd_translation import synthetic_im_vnfd
+from osm_im.im_translation import translate_im_vnfd_to_sol006, read_only_view
+
+MODES = ("shared", "copy", "read-only")
+
+
+def _max_rss_mb():
+    # ru_maxrss is given in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def run(mode, descriptor_count, vdu_count):
+    catalog = [synthetic_im_vnfd(vdu_count) for _ in range(descriptor_count)]
+    input_rss = _max_rss_mb()
+    if mode == "copy":
+        translated = [translate_im_vnfd_to_sol006(copy.deepcopy(im_vnfd)) for im_vnfd in catalog]
+    elif mode == "read-only":
+        translated = [translate_im_vnfd_to_sol006(read_only_view(im_vnfd)) for im_vnfd in catalog]
+    else:
+        translated = [translate_im_vnfd_to_sol006(im_vnfd) for im_vnfd in catalog]
+    peak_rss = _max_rss_mb()
+    print("{:10} {:10.1f} MB input {:10.1f} MB peak {:10.1f} MB translation".format(
+        mode, input_rss, peak_rss, peak_rss - input_rss))
+    return translated
+
+
+def main(descriptor_count, vdu_count):
+    print("{} descriptors of {} VDUs".format(descriptor_count, vdu_count))
+    for mode in MODES:
+        subprocess.run([sys.executable, os.path.abspath(__file__), "--mode", mode, str(descriptor_count),
+                        str(vdu_count)], check=True)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ["--mode"]:
+        run(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+    else:
+        args = [int(arg) for arg in sys.argv[1:]]
+        main(*(args + [200, 100][len(args):]))
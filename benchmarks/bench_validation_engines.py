@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''
+Compares the pyangbind and compiled validation engines over the descriptors in tests/examples.
+Usage: python3 benchmarks/bench_validation_engines.py [rounds]
+'''
+
+import glob
+import os
+import sys
+import timeit
+
+from osm_im.validation import Validation, ValidationException
+
+EXAMPLES_FOLDER = os.path.join(os.path.dirname(__file__), '..', 'tests', 'examples')
+
+
+def load_descriptors():
+    descriptors = []
+    for file in sorted(glob.glob(os.path.join(EXAMPLES_FOLDER, '*.yaml'))):
+        with open(file, 'r') as descriptor_file:
+            item, data = Validation().yaml_validation(descriptor_file.read())
+        try:
+            Validation(engine="compiled").pyangbind_validation(item, data)
+            Validation().pyangbind_validation(item, data)
+        except (ImportError, ValidationException) as e:
+            print("Skipping {}: {}".format(os.path.basename(file), e))
+            continue
+        descriptors.append((item, data))
+    return descriptors
+
+
+def main(rounds=20):
+    descriptors = load_descriptors()
+    if not descriptors:
+        sys.exit("No descriptors could be validated. Run 'make models' first")
+    results = {}
+    for engine in ("pyangbind", "compiled"):
+        validation = Validation(engine=engine)
+        elapsed = min(timeit.repeat(
+            lambda: [validation.pyangbind_validation(item, data) for item, data in descriptors],
+            number=1, repeat=rounds))
+        results[engine] = elapsed
+        print("{:10} {:9.2f} ms per {} descriptors".format(engine, elapsed * 1000, len(descriptors)))
+    print("speedup    {:9.1f}x".format(results["pyangbind"] / results["compiled"]))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
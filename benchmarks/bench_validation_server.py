@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''
+Wall time of a short-lived process validating one descriptor in process, and through a running validation
+server; and latency and throughput of validation requests from an already running client.
+Usage: python3 benchmarks/bench_validation_server.py [descriptor_file] [workers]
+'''
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from osm_im.validation_server import ValidationServer, ValidationClient
+
+IN_PROCESS = ("from osm_im.validation import Validation; "
+              "Validation().descriptor_validation(open({file!r}).read())")
+THROUGH_SERVER = ("from osm_im.validation_server import ValidationClient; "
+                  "ValidationClient({address!r}, fallback=False).descriptor_validation(open({file!r}).read())")
+
+
+def process_time(code, rounds=5):
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, env=dict(os.environ, PYTHONPATH="."))
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main(descriptor_file, workers):
+    with open(descriptor_file) as f:
+        descriptor = f.read()
+    with tempfile.TemporaryDirectory() as directory:
+        address = os.path.join(directory, "validation.sock")
+        print("short-lived process, in process     {:8.1f} ms".format(
+            process_time(IN_PROCESS.format(file=descriptor_file))))
+        server = ValidationServer(address, workers)
+        server.start()
+        try:
+            print("short-lived process, through server {:8.1f} ms".format(
+                process_time(THROUGH_SERVER.format(address=address, file=descriptor_file))))
+            client = ValidationClient(address, fallback=False)
+            rounds = 200
+            start = time.perf_counter()
+            for _ in range(rounds):
+                client.descriptor_validation(descriptor)
+            print("request latency                     {:8.2f} ms".format(
+                (time.perf_counter() - start) / rounds * 1000))
+            start = time.perf_counter()
+            with ThreadPoolExecutor(server.workers * 2) as executor:
+                list(executor.map(client.descriptor_validation, [descriptor] * rounds * 2))
+            print("throughput, {:2} workers             {:8.0f} descriptors/s".format(
+                server.workers, rounds * 2 / (time.perf_counter() - start)))
+        finally:
+            server.stop()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else "tests/examples/hackfest_charmed_vnfd_im.yaml",
+         int(sys.argv[2]) if len(sys.argv) > 2 else None)
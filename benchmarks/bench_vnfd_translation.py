@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''
+Scaling of the IM to SOL006 VNFD translation, and of the SOL006 to IM translation of its output, with
+synthetic descriptors of increasing number of VDUs.
+Usage: python3 benchmarks/bench_vnfd_translation.py [vdus ...]
+'''
+
+import sys
+import timeit
+
+from osm_im.im_translation import translate_im_vnfd_to_sol006, translate_sol006_to_im_vnfd
+
+
+def synthetic_im_vnfd(vdu_count):
+    '''
+    IM VNFD with vdu_count VDUs. Every VDU has a management interface connected to an external
+    connection point, a data interface connected to an internal VLD, a monitoring param and a scaling group
+    '''
+    vdus = []
+    connection_points = []
+    internal_vlds = []
+    monitoring_params = []
+    scaling_groups = []
+    for index in range(vdu_count):
+        vdu_id = "vdu-{}".format(index)
+        connection_points.append({"name": "{}-mgmt".format(vdu_id), "port-security-enabled": True})
+        internal_vlds.append({
+            "id": "{}-ivld".format(vdu_id),
+            "internal-connection-point": [{"id-ref": "{}-data".format(vdu_id)}],
+        })
+        vdus.append({
+            "id": vdu_id,
+            "name": vdu_id,
+            "image": "ubuntu20.04",
+            "count": 1,
+            "vm-flavor": {"vcpu-count": 2, "memory-mb": 4096, "storage-gb": 10},
+            "guest-epa": {"cpu-pinning-policy": "DEDICATED", "disk-io-quota": {"limit": 100}},
+            "interface": [
+                {"name": "{}-eth0".format(vdu_id), "type": "EXTERNAL", "position": 0,
+                 "virtual-interface": {"type": "PARAVIRT"},
+                 "external-connection-point-ref": "{}-mgmt".format(vdu_id)},
+                {"name": "{}-eth1".format(vdu_id), "type": "INTERNAL", "position": 1,
+                 "virtual-interface": {"type": "PARAVIRT"},
+                 "internal-connection-point-ref": "{}-data".format(vdu_id)},
+            ],
+            "internal-connection-point": [{"id": "{}-data".format(vdu_id), "type": "VPORT"}],
+            "monitoring-param": [{"id": "{}-cpu".format(vdu_id), "nfvi-metric": "cpu_utilization"}],
+        })
+        monitoring_params.append({
+            "id": "{}-cpu".format(vdu_id),
+            "name": "{}-cpu".format(vdu_id),
+            "vdu-monitoring-param": {"vdu-ref": vdu_id, "vdu-monitoring-param-ref": "{}-cpu".format(vdu_id)},
+        })
+        scaling_groups.append({
+            "name": "{}-autoscale".format(vdu_id),
+            "max-instance-count": 5,
+            "vdu": [{"vdu-id-ref": vdu_id, "count": 1}],
+        })
+    return {"vnfd:vnfd-catalog": {"vnfd": [{
+        "id": "synthetic-{}-vnf".format(vdu_count),
+        "name": "synthetic-{}-vnf".format(vdu_count),
+        "mgmt-interface": {"cp": "vdu-0-mgmt"},
+        "connection-point": connection_points,
+        "vdu": vdus,
+        "internal-vld": internal_vlds,
+        "monitoring-param": monitoring_params,
+        "scaling-group-descriptor": scaling_groups,
+    }]}}
+
+
+def main(vdu_counts):
+    for vdu_count in vdu_counts:
+        im_vnfd = synthetic_im_vnfd(vdu_count)
+        rounds = max(1, 1000 // vdu_count)
+        elapsed = min(timeit.repeat(lambda: translate_im_vnfd_to_sol006(im_vnfd), number=rounds, repeat=3))
+        sol006_vnfd = translate_im_vnfd_to_sol006(im_vnfd)
+        reverse_elapsed = min(timeit.repeat(lambda: translate_sol006_to_im_vnfd(sol006_vnfd), number=rounds,
+                                            repeat=3))
+        print("{:6} VDUs {:10.2f} ms IM to SOL006 {:10.2f} ms SOL006 to IM".format(
+            vdu_count, elapsed / rounds * 1000, reverse_elapsed / rounds * 1000))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10, 100, 1000])
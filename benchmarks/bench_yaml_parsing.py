@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''
+Descriptor parsing speed over the descriptors in tests/examples: pure python YAML parser,
+LibYAML parser and the JSON fast path of osm_im.validation.parse_descriptor.
+Usage: python3 benchmarks/bench_yaml_parsing.py [rounds]
+'''
+
+import glob
+import json
+import os
+import sys
+import timeit
+
+import yaml
+
+from osm_im.validation import parse_descriptor, YamlSafeLoader
+
+EXAMPLES_FOLDER = os.path.join(os.path.dirname(__file__), '..', 'tests', 'examples')
+
+
+def main(rounds=10):
+    yaml_descriptors = []
+    for file in sorted(glob.glob(os.path.join(EXAMPLES_FOLDER, '*.yaml'))):
+        with open(file, 'r') as descriptor_file:
+            yaml_descriptors.append(descriptor_file.read())
+    json_descriptors = [json.dumps(yaml.safe_load(descriptor), default=str) for descriptor in yaml_descriptors]
+    size = sum(len(descriptor) for descriptor in yaml_descriptors)
+    print("{} descriptors, {:.1f} KiB of YAML, loader: {}".format(
+        len(yaml_descriptors), size / 1024, YamlSafeLoader.__name__))
+
+    cases = [
+        ("yaml.safe_load", lambda: [yaml.safe_load(d) for d in yaml_descriptors]),
+        ("parse_descriptor YAML", lambda: [parse_descriptor(d) for d in yaml_descriptors]),
+        ("parse_descriptor JSON", lambda: [parse_descriptor(d) for d in json_descriptors]),
+    ]
+    for name, case in cases:
+        elapsed = min(timeit.repeat(case, number=1, repeat=rounds))
+        print("{:25} {:9.2f} ms".format(name, elapsed * 1000))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
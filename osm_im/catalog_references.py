@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from osm_im.catalog_translation import iter_catalog_sources
+from osm_im.validation import parse_descriptor, get_descriptor_type
+
+
+class Reference:
+    '''
+    Reference from a descriptor to another descriptor of the catalog, or to a member of it.
+    source: (kind, id) of the referencing descriptor; path: JSON pointer of the reference in its document
+    target: (kind, id) of the referenced descriptor
+    member: referenced member of the target (ext-cpd, vdu, kdu, df or sapd) and value: its id; both None when
+    the reference is to the descriptor itself. Members of OSM-IM descriptors are indexed, and referenced, with the
+    ids of their SOL006 translation (connection point "mgmt" is ext-cpd "mgmt-ext")
+    '''
+    __slots__ = ("source", "path", "target", "member", "value")
+
+    def __init__(self, source, path, target, member=None, value=None):
+        self.source = source
+        self.path = path
+        self.target = target
+        self.member = member
+        self.value = value
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, key) == getattr(other, key) for key in self.__slots__)
+
+    def __hash__(self):
+        return hash((self.source, self.path))
+
+    def __str__(self):
+        if self.member is None:
+            missing = "{} '{}'".format(*self.target)
+        else:
+            missing = "{} '{}' of {} '{}'".format(self.member, self.value, *self.target)
+        return "{} '{}' {}: {} not found".format(self.source[0], self.source[1], self.path, missing)
+
+    def __repr__(self):
+        return "Reference({})".format(", ".join("{}={!r}".format(key, getattr(self, key)) for key in self.__slots__))
+
+
+class CatalogIndex:
+    '''
+    In-memory index of the VNFDs, NSDs and NSTs of a catalog, resolving the references between them
+    (NSD to VNFD, its external connection points and deployment flavours, NST to NSD...) that the validation
+    of each descriptor on its own cannot check. OSM-IM and SOL006 descriptors can be mixed.
+    Descriptors are added and removed one package at a time; every operation only resolves the references
+    of the descriptors it touches, so its cost does not depend on the size of the catalog:
+        index = CatalogIndex.from_sources("packages/")
+        unresolved = index.check(new_nsd)   # before onboarding it
+        index.add(new_nsd)
+    '''
+
+    def __init__(self):
+        # (kind, id) -> {member: set of member ids}
+        self.descriptors = {}
+        # (kind, id) -> [Reference] of the descriptor
+        self.references = {}
+        # (kind, id) -> set of the (kind, id) of the descriptors referencing it
+        self.dependents = {}
+
+    @classmethod
+    def from_sources(cls, sources):
+        '''
+        Returns the index of every descriptor of the catalog files in sources: a directory (walked
+        recursively), a file path, or an iterable of file paths and file objects
+        '''
+        index = cls()
+        for name, file_path, content in iter_catalog_sources(sources):
+            if content is None:
+                with open(file_path, "r") as descriptor_file:
+                    content = descriptor_file.read()
+            index.add(content)
+        return index
+
+    def __len__(self):
+        return len(self.descriptors)
+
+    def __contains__(self, key):
+        return key in self.descriptors
+
+    def add(self, descriptor):
+        '''
+        descriptor: descriptor file content (YAML or JSON) or parsed dict, with one or more descriptors
+        Adds the descriptors, replacing the ones with the same kind and id.
+        Returns the unresolved references of the added descriptors, and those of the descriptors that
+        referenced a replaced one and do not resolve any more
+        '''
+        unresolved = []
+        replaced = []
+        for key, members, references in _extract(descriptor):
+            if key in self.descriptors:
+                replaced.append(key)
+            self._remove_references(key)
+            self.descriptors[key] = members
+            self.references[key] = references
+            for reference in references:
+                self.dependents.setdefault(reference.target, set()).add(key)
+            unresolved.extend(self.unresolved(references))
+        for key in replaced:
+            unresolved.extend(self._unresolved_dependents(key))
+        return unresolved
+
+    def remove(self, kind, descriptor_id):
+        '''
+        Removes a descriptor from the index. Returns the references of other descriptors that pointed at it
+        '''
+        key = (kind, descriptor_id)
+        if key not in self.descriptors:
+            raise KeyError(key)
+        self._remove_references(key)
+        del self.descriptors[key]
+        del self.references[key]
+        return self._unresolved_dependents(key)
+
+    def check(self, descriptor):
+        '''
+        descriptor: descriptor file content (YAML or JSON) or parsed dict
+        Returns the unresolved references of its descriptors against the index, without adding them
+        '''
+        return [reference for _, _, references in _extract(descriptor) for reference in self.unresolved(references)]
+
+    def check_all(self):
+        '''
+        Returns every unresolved reference of the catalog
+        '''
+        return [reference for key in sorted(self.references) for reference in self.unresolved(self.references[key])]
+
+    def unresolved(self, references):
+        '''
+        Returns the references that do not resolve in the index
+        '''
+        unresolved = []
+        for reference in references:
+            members = self.descriptors.get(reference.target)
+            if members is None or (reference.member is not None
+                                   and reference.value not in members.get(reference.member, ())):
+                unresolved.append(reference)
+        return unresolved
+
+    def _unresolved_dependents(self, key):
+        # Unresolved references of other descriptors to the descriptor key
+        unresolved = []
+        for dependent in sorted(self.dependents.get(key, ())):
+            if dependent != key:
+                unresolved.extend(self.unresolved(
+                    reference for reference in self.references[dependent] if reference.target == key))
+        return unresolved
+
+    def _remove_references(self, key):
+        for reference in self.references.get(key, ()):
+            dependents = self.dependents.get(reference.target)
+            if dependents is not None:
+                dependents.discard(key)
+                if not dependents:
+                    del self.dependents[reference.target]
+
+
+def _extract(descriptor):
+    # Yields ((kind, id), members, references) of every descriptor of a descriptor file, which may have several
+    # catalogs (vnfd-catalog and nsd-catalog...)
+    data = parse_descriptor(descriptor) if isinstance(descriptor, (str, bytes)) else descriptor
+    if get_descriptor_type(data) is None:
+        raise ValueError("Not possible to determine the type of descriptor")
+    for root, catalog in data.items():
+        descriptor_type = get_descriptor_type({root: None})
+        if descriptor_type is not None:
+            yield from _EXTRACTORS[descriptor_type](root, catalog)
+
+
+def _entries(value):
+    # Entries of a list, that may be given as a single value
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _ids(entries, name="id"):
+    return set(str(entry[name]) for entry in _entries(entries) if isinstance(entry, dict) and name in entry)
+
+
+def _extract_sol006_vnfd(root, vnfd):
+    yield ("vnfd", str(vnfd.get("id"))), {
+        "ext-cpd": _ids(vnfd.get("ext-cpd")),
+        "vdu": _ids(vnfd.get("vdu")),
+        "kdu": _ids(vnfd.get("kdu"), "name"),
+        "df": _ids(vnfd.get("df")),
+    }, []
+
+
+def _extract_im_vnfd(root, catalog):
+    # Members as the IM to SOL006 translation produces them: an ext-cpd for every connection point referenced
+    # by a VDU interface or a k8s-cluster net, and the default-df when there are VDUs or KDUs
+    for vnfd in _entries((catalog or {}).get("vnfd")):
+        cp_refs = [interface.get("external-connection-point-ref") for vdu in _entries(vnfd.get("vdu"))
+                   if isinstance(vdu, dict) for interface in _entries(vdu.get("interface"))
+                   if isinstance(interface, dict)]
+        k8s_cluster = vnfd.get("k8s-cluster")
+        if isinstance(k8s_cluster, dict):
+            cp_refs.extend(net.get("external-connection-point-ref") for net in _entries(k8s_cluster.get("nets"))
+                           if isinstance(net, dict))
+        vdus = _ids(vnfd.get("vdu"))
+        kdus = _ids(vnfd.get("kdu"), "name")
+        yield ("vnfd", str(vnfd.get("id"))), {
+            "ext-cpd": set(_im_ext_cpd_id(cp_ref) for cp_ref in cp_refs if cp_ref),
+            "vdu": vdus,
+            "kdu": kdus,
+            "df": {"default-df"} if vdus or kdus else set(),
+        }, []
+
+
+def _im_ext_cpd_id(connection_point):
+    # Id of the SOL006 ext-cpd translated from an OSM-IM connection point
+    return "{}-ext".format(connection_point)
+
+
+def _extract_sol006_nsd(root, catalog):
+    for position, nsd in enumerate(_entries((catalog or {}).get("nsd"))):
+        key = ("nsd", str(nsd.get("id")))
+        path = "/{}/nsd/{}".format(root, position)
+        references = []
+        for vnfd_position, vnfd_id in enumerate(_entries(nsd.get("vnfd-id"))):
+            references.append(Reference(key, "{}/vnfd-id/{}".format(path, vnfd_position), ("vnfd", str(vnfd_id))))
+        for df_position, df in enumerate(_entries(nsd.get("df"))):
+            df_path = "{}/df/{}".format(path, df_position)
+            for profile_position, profile in enumerate(_entries(df.get("vnf-profile"))):
+                profile_path = "{}/vnf-profile/{}".format(df_path, profile_position)
+                if "vnfd-id" not in profile:
+                    continue
+                target = ("vnfd", str(profile["vnfd-id"]))
+                references.append(Reference(key, profile_path + "/vnfd-id", target))
+                if "flavour-id" in profile:
+                    references.append(Reference(key, profile_path + "/flavour-id", target, "df",
+                                                str(profile["flavour-id"])))
+                for link_position, link in enumerate(_entries(profile.get("virtual-link-connectivity"))):
+                    for cpd_position, cpd in enumerate(_entries(link.get("constituent-cpd-id"))):
+                        if "constituent-cpd-id" in cpd:
+                            references.append(Reference(
+                                key, "{}/virtual-link-connectivity/{}/constituent-cpd-id/{}/constituent-cpd-id"
+                                .format(profile_path, link_position, cpd_position),
+                                target, "ext-cpd", str(cpd["constituent-cpd-id"])))
+            for profile_position, profile in enumerate(_entries(df.get("ns-profile"))):
+                if "nsd-id" in profile:
+                    references.append(Reference(key, "{}/ns-profile/{}/nsd-id".format(df_path, profile_position),
+                                                ("nsd", str(profile["nsd-id"]))))
+        yield key, {"sapd": _ids(nsd.get("sapd")), "df": _ids(nsd.get("df"))}, references
+
+
+def _extract_im_nsd(root, catalog):
+    for position, nsd in enumerate(_entries((catalog or {}).get("nsd"))):
+        key = ("nsd", str(nsd.get("id")))
+        path = "/{}/nsd/{}".format(root, position)
+        references = []
+        for vnfd_position, constituent in enumerate(_entries(nsd.get("constituent-vnfd"))):
+            if "vnfd-id-ref" in constituent:
+                references.append(Reference(key, "{}/constituent-vnfd/{}/vnfd-id-ref".format(path, vnfd_position),
+                                            ("vnfd", str(constituent["vnfd-id-ref"]))))
+        for vld_position, vld in enumerate(_entries(nsd.get("vld"))):
+            for cp_position, cp in enumerate(_entries(vld.get("vnfd-connection-point-ref"))):
+                if "vnfd-id-ref" in cp and "vnfd-connection-point-ref" in cp:
+                    references.append(Reference(
+                        key, "{}/vld/{}/vnfd-connection-point-ref/{}/vnfd-connection-point-ref".format(
+                            path, vld_position, cp_position),
+                        ("vnfd", str(cp["vnfd-id-ref"])), "ext-cpd", _im_ext_cpd_id(cp["vnfd-connection-point-ref"])))
+        yield key, {"sapd": _ids(nsd.get("connection-point"), "name")}, references
+
+
+def _extract_nst(root, nsts):
+    for position, nst in enumerate(_entries(nsts)):
+        key = ("nst", str(nst.get("id")))
+        path = "/{}/{}".format(root, position)
+        references = []
+        for subnet_position, subnet in enumerate(_entries(nst.get("netslice-subnet"))):
+            if "nsd-ref" in subnet:
+                references.append(Reference(key, "{}/netslice-subnet/{}/nsd-ref".format(path, subnet_position),
+                                            ("nsd", str(subnet["nsd-ref"]))))
+        for cp_position, cp in enumerate(_entries(nst.get("netslice-connection-point"))):
+            if "nsd-id-ref" not in cp:
+                continue
+            cp_path = "{}/netslice-connection-point/{}".format(path, cp_position)
+            target = ("nsd", str(cp["nsd-id-ref"]))
+            if "nsd-connection-point-ref" in cp:
+                references.append(Reference(key, cp_path + "/nsd-connection-point-ref", target, "sapd",
+                                            str(cp["nsd-connection-point-ref"])))
+            else:
+                references.append(Reference(key, cp_path + "/nsd-id-ref", target))
+        yield key, {}, references
+
+
+_EXTRACTORS = {
+    "vnfd": _extract_im_vnfd,
+    "etsi_nfv_vnfd": _extract_sol006_vnfd,
+    "nsd": _extract_im_nsd,
+    "etsi_nfv_nsd": _extract_sol006_nsd,
+    "nst": _extract_nst,
+}
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import glob
+import json
+import os
+import tempfile
+import uuid
+from collections import Counter
+
+import yaml
+
+from osm_im.im_translation import translate_im_model_to_sol006
+from osm_im.parallel import process_pool_imap
+from osm_im.validation import parse_descriptor, get_descriptor_type
+
+try:
+    from yaml import CSafeDumper as YamlSafeDumper
+except ImportError:
+    # PyYAML built without LibYAML
+    from yaml import SafeDumper as YamlSafeDumper
+
+CATALOG_FILE_EXTENSIONS = (".yaml", ".yml", ".json")
+
+
+def iter_catalog_sources(sources):
+    '''
+    sources: a directory (walked recursively), a file path, or an iterable of file paths and file objects
+    Yields (source name, file path, content) for every catalog file, in a deterministic order. The source
+    name is the path of the file relative to the walked directory, or to the current directory for file
+    paths. File objects are read here, so content is only set for them; files are read by the translation workers
+    '''
+    if isinstance(sources, (str, bytes, os.PathLike)):
+        sources = [sources]
+    for source in sources:
+        if hasattr(source, "read"):
+            yield os.path.basename(str(getattr(source, "name", "stream"))), None, source.read()
+        elif os.path.isdir(source):
+            for dir_path, dir_names, file_names in os.walk(source):
+                dir_names.sort()
+                for file_name in sorted(file_names):
+                    if file_name.endswith(CATALOG_FILE_EXTENSIONS):
+                        file_path = os.path.join(dir_path, file_name)
+                        yield os.path.relpath(file_path, source), file_path, None
+        else:
+            yield _relative_source_name(source), source, None
+
+
+def _relative_source_name(path):
+    # Name of a file path that stays under the output directory: relative to the current directory when
+    # it is inside it, the absolute path without its root otherwise
+    path = os.path.relpath(path)
+    if path.split(os.sep)[0] == os.pardir:
+        path = os.path.splitdrive(os.path.abspath(path))[1].lstrip(os.sep)
+    return path
+
+
+def iter_im_catalog_descriptors(im_catalog_data):
+    '''
+    Yields every descriptor of an OSM-IM catalog ({vnfd-catalog: {vnfd: [...]}}, {nsd-catalog: {nsd: [...]}}
+    or both) wrapped in its own single descriptor catalog, as expected by translate_im_model_to_sol006
+    '''
+    if not isinstance(im_catalog_data, dict):
+        return
+    for root, catalog in im_catalog_data.items():
+        descriptor_type = get_descriptor_type({root: None})
+        if descriptor_type not in ("vnfd", "nsd") or not isinstance(catalog, dict):
+            continue
+        for descriptor in catalog.get(descriptor_type) or ():
+            yield {root: {descriptor_type: [descriptor]}}
+
+
+def translate_catalog_stream(sources, output_dir, workers=None, validate="full", validate_output=False,
+                             report_file=None, ordered=False):
+    '''
+    Translates every OSM-IM descriptor of every catalog file in sources to SOL006, writing one YAML file per
+    descriptor in output_dir, at the path of its source (see iter_catalog_sources). A descriptor whose output
+    file was already written by another descriptor of the same run is reported as an error instead of
+    overwriting it.
+    sources: a directory (walked recursively), a file path, or an iterable of file paths and file objects
+    workers: number of worker processes, None for one per CPU, 0 to translate in this process
+    validate, validate_output: same as in translate_im_model_to_sol006
+    report_file: optional path where every report entry is appended as a JSON line
+    ordered: True to yield the report entries in input order, False in completion order
+    Files are read, translated and written by the workers as they are consumed from sources, so memory
+    does not depend on the size of the catalog. Yields a report entry per descriptor:
+    {"source", "index", "type", "id", "status" (ok, error or skipped), "output", "error"}
+    When the generator is closed before the end, the descriptors translated and not yielded are not written
+    '''
+    os.makedirs(output_dir, exist_ok=True)
+    run_id = uuid.uuid4().hex
+    # source names of the tasks submitted whose report entries were not yielded yet
+    unreported = Counter()
+
+    def iter_tasks():
+        for source_name, path, content in iter_catalog_sources(sources):
+            unreported[source_name] += 1
+            yield source_name, path, content, output_dir, validate, validate_output, run_id
+
+    tasks = iter_tasks()
+    if workers == 0:
+        results = (_translate_catalog_source(*task) for task in tasks)
+    else:
+        results = process_pool_imap(_translate_catalog_source, tasks, workers, ordered)
+
+    report = open(report_file, "a") if report_file else None
+    outputs = set()
+    try:
+        for entries in results:
+            for entry in entries:
+                _claim_output(entry, outputs)
+                if report:
+                    report.write(json.dumps(entry) + "\n")
+                yield entry
+            unreported[entries[0]["source"]] -= 1
+            if report:
+                report.flush()
+    finally:
+        # waits for the translations running in the workers, then removes the files they wrote
+        results.close()
+        for source_name in +unreported:
+            _remove_partial_files(output_dir, source_name, run_id)
+        if report:
+            report.close()
+
+
+def _translate_catalog_source(source_name, path, content, output_dir, validate, validate_output, run_id):
+    entries = []
+    try:
+        if content is None:
+            with open(path, "rb") as source_file:
+                content = source_file.read()
+        im_catalog_data = parse_descriptor(content)
+    except Exception as e:
+        return [_report_entry(source_name, None, None, None, "error", error="Not a proper YAML file: {}".format(e))]
+
+    descriptor_type = get_descriptor_type(im_catalog_data)
+    if not isinstance(im_catalog_data, dict) or not any(
+            get_descriptor_type({root: None}) in ("vnfd", "nsd") for root in im_catalog_data):
+        return [_report_entry(source_name, None, descriptor_type, None, "skipped",
+                              error="Not an OSM-IM vnfd or nsd catalog")]
+
+    output_base = os.path.join(output_dir, os.path.splitext(source_name)[0])
+    descriptors = list(iter_im_catalog_descriptors(im_catalog_data))
+    for index, im_model_data in enumerate(descriptors):
+        descriptor_type = get_descriptor_type(im_model_data)
+        descriptor = next(iter(im_model_data.values()))[descriptor_type][0]
+        descriptor_id = descriptor.get("id") if isinstance(descriptor, dict) else None
+        partial = None
+        try:
+            sol006_model_data = translate_im_model_to_sol006(im_model_data, validate=validate,
+                                                             validate_output=validate_output)
+            output = "{}_sol006.yaml".format(output_base if len(descriptors) == 1 else
+                                             "{}_{}".format(output_base, index))
+            output_dir_path = os.path.dirname(output) or "."
+            os.makedirs(output_dir_path, exist_ok=True)
+            # written to a temporary file, moved to output by _claim_output unless another descriptor took it
+            partial_fd, partial = tempfile.mkstemp(suffix=_partial_suffix(run_id),
+                                                   prefix=os.path.basename(output) + ".", dir=output_dir_path)
+            with os.fdopen(partial_fd, "w") as output_file:
+                yaml.dump(sol006_model_data, output_file, Dumper=YamlSafeDumper, default_flow_style=False,
+                          sort_keys=False)
+            entry = _report_entry(source_name, index, descriptor_type, descriptor_id, "ok", output=output)
+            entry["partial"] = partial
+            entries.append(entry)
+        except Exception as e:
+            if partial is not None and os.path.exists(partial):
+                os.unlink(partial)
+            entries.append(_report_entry(source_name, index, descriptor_type, descriptor_id, "error", error=str(e)))
+    if not descriptors:
+        entries.append(_report_entry(source_name, None, descriptor_type, None, "skipped",
+                                     error="Catalog without descriptors"))
+    return entries
+
+
+def _partial_suffix(run_id):
+    # Suffix of the temporary files written by the translations of a run
+    return ".{}.partial".format(run_id)
+
+
+def _remove_partial_files(output_dir, source_name, run_id):
+    # Removes the temporary files of the descriptors of a source that were translated but not moved to their output
+    output_base = os.path.join(output_dir, os.path.splitext(source_name)[0])
+    for partial in glob.glob("{}_*{}".format(glob.escape(output_base), _partial_suffix(run_id))):
+        os.unlink(partial)
+
+
+def _claim_output(entry, outputs):
+    # Moves the translated file of a report entry to its output, or turns the entry into an error when another
+    # entry of the run already has that output
+    partial = entry.pop("partial", None)
+    if partial is None:
+        return
+    output = os.path.normpath(entry["output"])
+    if output in outputs:
+        os.unlink(partial)
+        entry.update(status="error", output=None, error="Output file {} already written by another descriptor"
+                     .format(entry["output"]))
+        return
+    outputs.add(output)
+    os.replace(partial, entry["output"])
+
+
+def _report_entry(source, index, descriptor_type, descriptor_id, status, output=None, error=None):
+    return {"source": source, "index": index, "type": descriptor_type, "id": descriptor_id, "status": status,
+            "output": output, "error": error}
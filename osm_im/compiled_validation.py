@@ -0,0 +1,808 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import importlib
+from decimal import Decimal
+
+import regex
+
+# Generated validator tables for each descriptor type, see plugins/osm_validator.py
+TABLES_MODULES = {
+    "vnfd": "osm_im.vnfd_tables",
+    "nsd": "osm_im.nsd_tables",
+    "nst": "osm_im.nst_tables",
+    "etsi_nfv_vnfd": "osm_im.etsi_nfv_vnfd_tables",
+    "etsi_nfv_nsd": "osm_im.etsi_nfv_nsd_tables",
+}
+
+_compiled_models = {}
+
+# Returned by loaders when the element must not appear in the normalized output
+_SKIP = object()
+SKIPPED = _SKIP
+
+_BOOL_VALUES = {"false": False, "False": False, False: False, 0: False, "0": False,
+                "true": True, "True": True, True: True, 1: True, "1": True}
+
+
+class CompiledValidationError(ValueError):
+    def __init__(self, message, path=None):
+        super().__init__(message)
+        self.message = message
+        self.path = path or []
+
+    def __str__(self):
+        if not self.path:
+            return self.message
+        return "/{}: {}".format("/".join(self.path), self.message)
+
+
+def get_compiled_model(item, strict=False):
+    '''
+    Returns the CompiledModel for a descriptor type (vnfd, nsd, nst, etsi_nfv_vnfd, etsi_nfv_nsd),
+    importing its generated tables the first time it is needed. strict: see CompiledModel
+    '''
+    model = _compiled_models.get((item, strict))
+    if model is None:
+        if item not in TABLES_MODULES:
+            raise KeyError(item)
+        model = CompiledModel(importlib.import_module(TABLES_MODULES[item]), strict)
+        _compiled_models[(item, strict)] = model
+    return model
+
+
+class CompiledModel:
+    '''
+    Turns the flat tables generated by the osm-validator pyang plugin into a tree of
+    loader closures that validate and normalize plain dicts.
+
+    Acceptance follows what pybindJSONDecoder.load_ietf_json does with the pyangbind
+    bindings: values are coerced through the same python types, module prefixes on keys
+    and identityref values are ignored, null values and empty lists are skipped, scalars
+    given for a list are ignored, list entries with the same keys are merged and lists
+    given for a scalar leaf are stored as their str() (0 for integers).
+    strict: True to reject, where pyangbind silently stores inconsistent data, duplicated
+    list keys, lists given for a scalar leaf and identityref values with a prefix other
+    than the name or a prefix of the module of the identity.
+    The output follows the IETF JSON encoding.
+    '''
+
+    def __init__(self, tables, strict=False):
+        self.types = tables.TYPES
+        self.nodes = tables.NODES
+        self.root = tables.ROOT
+        self.strict = strict
+        # (module, identity name) -> (module, name) of its bases, missing in tables generated before they were
+        # added
+        self.identities = getattr(tables, "IDENTITIES", {})
+        self._converters = {}
+        self._item_converters = {}
+        self._loaders = [None] * len(self.nodes)
+        for index in range(len(self.nodes) - 1, -1, -1):
+            self._loaders[index] = self._build_loader(index)
+        self._root_children = self._children_table(self.root, None)
+        self._references = None
+
+    def validate(self, data, force=False):
+        '''
+        data: dict object loaded from the descriptor file
+        force: True to skip unknown fields in the descriptor
+        Returns the normalized descriptor. Raises CompiledValidationError
+        '''
+        if not isinstance(data, dict):
+            raise CompiledValidationError("Expected a mapping at the top level, got {}".format(type(data).__name__))
+        try:
+            return self._load_children(self._root_children, data, force)
+        except (ValueError, TypeError, ArithmeticError) as e:
+            # raised by the top level keys themselves, the errors of their values are already mapped
+            raise CompiledValidationError(str(e) or type(e).__name__)
+
+    def node_loader(self, index):
+        '''
+        Loader of the node at index in the tables, called as loader(value, force). It returns the normalized
+        value, or SKIPPED when the value must not appear in the normalized output
+        '''
+        return self._loaders[index]
+
+    def validate_subtree(self, path, subtree, document=None, previous=None, force=False):
+        '''
+        Validates a single subtree of a descriptor, for descriptor patches.
+        path: JSON pointer of the subtree in the descriptor (/vnfd:vnfd-catalog/vnfd/0/vdu/1), or its schema
+        path without list positions (/vnfd-catalog/vnfd/vdu). Module prefixes are optional. Paths ending
+        with a list position validate a single entry of the list
+        subtree: value of the subtree, a mapping for a list entry
+        document: optional descriptor with the subtree already at path, for a JSON pointer. When given, the
+        leafrefs in the subtree, the leafrefs that reference the subtree and the keys of the list entry at
+        path are checked against the rest of the document
+        previous: optional value of the subtree before the change. Leafrefs referencing the subtree are only
+        checked when the change removes some of the values they can reference
+        force: True to skip unknown fields in the subtree
+        Returns the normalized subtree, None when it has no normalized output. Raises CompiledValidationError
+        '''
+        tokens = _parse_path(path)
+        steps = self._resolve_path(tokens, document is not None)
+        index, position = steps[-1]
+        # a mapping given for a list is an entry of the list
+        entry = position is not None or (self.nodes[index][0] == "list" and isinstance(subtree, dict))
+        try:
+            if entry:
+                out = self._loaders[index]([subtree], force)
+                out = out if out is _SKIP else out[0]
+            else:
+                out = self._loaders[index](subtree, force)
+        except CompiledValidationError as e:
+            if entry and e.path:
+                e.path.pop(0)
+            e.path[0:0] = tokens
+            raise
+        except (ValueError, TypeError, ArithmeticError) as e:
+            raise CompiledValidationError(str(e) or type(e).__name__, list(tokens))
+        if document is not None:
+            references = self._get_references()
+            checker = _ReferenceChecker(self, references, document)
+            checker.check_keys(steps, tokens)
+            checker.check_leafrefs(steps, tokens, subtree)
+            checker.check_referencing(steps, subtree, previous)
+        return None if out is _SKIP else out
+
+    def _resolve_path(self, tokens, positions_required):
+        # [(node index, list position or None)] from the root element to the node at the path
+        steps = []
+        children = self.root
+        for token in tokens:
+            if steps and self.nodes[steps[-1][0]][0] == "list" and steps[-1][1] is None and token.isdigit():
+                steps[-1] = (steps[-1][0], int(token))
+                continue
+            if steps and positions_required and self.nodes[steps[-1][0]][0] == "list" and steps[-1][1] is None:
+                raise CompiledValidationError("Missing list position", list(tokens))
+            index = children.get(token.rpartition(":")[2])
+            if index is None:
+                raise CompiledValidationError("Unknown element '{}'".format(token), list(tokens))
+            steps.append((index, None))
+            children = self.nodes[index][4].get("children", {})
+        if not steps:
+            raise CompiledValidationError("Expected the path of a subtree")
+        return steps
+
+    def _get_references(self):
+        if self._references is None:
+            self._references = _References(self)
+        return self._references
+
+    # ******************** Loaders ********************
+
+    def _children_table(self, children, parent_module):
+        # name -> (loader, name used in the normalized output)
+        table = {}
+        for name, index in children.items():
+            module = self.nodes[index][2]
+            out_name = name if module == parent_module else "{}:{}".format(module, name)
+            table[name] = (self._loaders[index], out_name)
+        return table
+
+    def _load_children(self, children, data, force):
+        out = {}
+        for key, value in data.items():
+            if "@" in key:
+                # metadata annotations are not validated
+                continue
+            name = key.rpartition(":")[2]
+            child = children.get(name)
+            if child is None:
+                if force:
+                    continue
+                raise CompiledValidationError("Unknown element '{}'".format(key), [key])
+            if value is None or value == []:
+                continue
+            loader, out_name = child
+            try:
+                result = loader(value, force)
+            except CompiledValidationError as e:
+                e.path.insert(0, key)
+                raise
+            except (ValueError, TypeError, ArithmeticError) as e:
+                raise CompiledValidationError(str(e) or type(e).__name__, [key])
+            if result is not _SKIP:
+                out[out_name] = result
+        return out
+
+    def _build_loader(self, index):
+        kind, name, module, path, info = self.nodes[index]
+        if kind == "container":
+            return self._container_loader(info, module)
+        if kind == "list":
+            return self._list_loader(info, module)
+        if kind == "leaf":
+            return self._leaf_loader(info, module)
+        if kind == "leaf-list":
+            return self._leaf_list_loader(info, module)
+        # anyxml / anydata: not validated
+        return lambda value, force: value
+
+    def _container_loader(self, info, module):
+        children = self._children_table(info["children"], module)
+        presence = info.get("presence", False)
+        load_children = self._load_children
+
+        def load_container(value, force):
+            if not isinstance(value, dict):
+                raise CompiledValidationError("Expected a mapping, got {}".format(type(value).__name__))
+            out = load_children(children, value, force)
+            if not out and not presence:
+                return _SKIP
+            return out
+
+        return load_container
+
+    def _list_loader(self, info, module):
+        children = self._children_table(info["children"], module)
+        keys = info.get("keys", ())
+        key_nodes = [self.nodes[info["children"][k]] for k in keys]
+        key_converters = tuple(self._converter(node[4]["type"], node[2]) for node in key_nodes)
+        load_children = self._load_children
+        strict = self.strict
+        # pyangbind checks single keys, but joins composite keys into a string without checking them
+        key_value = _single_key_value if len(keys) == 1 else _composite_key_value
+
+        def load_list(value, force):
+            if isinstance(value, dict):
+                if force or not value:
+                    return _SKIP
+                raise CompiledValidationError("Unknown element '{}'".format(next(iter(value))))
+            if not isinstance(value, list):
+                # pyangbind ignores scalars given for a list
+                return _SKIP
+            out = []
+            # list key -> (position in out, entry merged with the later entries with the same key)
+            merged = {}
+            for position, entry in enumerate(value):
+                if not isinstance(entry, dict):
+                    raise CompiledValidationError("Expected a mapping, got {}".format(type(entry).__name__),
+                                                  [str(position)])
+                out_position = len(out)
+                if keys:
+                    try:
+                        entry_key = tuple(key_value(entry[k], convert) for k, convert in zip(keys, key_converters))
+                    except KeyError as e:
+                        raise CompiledValidationError("Missing key {}".format(e), [str(position)])
+                    except (ValueError, TypeError, ArithmeticError) as e:
+                        raise CompiledValidationError("Invalid key: {}".format(e), [str(position)])
+                    if entry_key in merged:
+                        if strict:
+                            raise CompiledValidationError(
+                                "Duplicated key {}".format(" ".join(str(k) for k in entry_key)), [str(position)])
+                        # pyangbind loads the entry over the first one with the same keys
+                        out_position, first_entry = merged[entry_key]
+                        entry = _merge_entries(first_entry, entry)
+                    merged[entry_key] = (out_position, entry)
+                try:
+                    loaded = load_children(children, entry, force)
+                except CompiledValidationError as e:
+                    e.path.insert(0, str(position))
+                    raise
+                if out_position < len(out):
+                    out[out_position] = loaded
+                else:
+                    out.append(loaded)
+            if not out:
+                return _SKIP
+            return out
+
+        return load_list
+
+    def _leaf_loader(self, info, module):
+        convert = self._converter(info["type"], module)
+        type_kind = self.types[info["type"]][0]
+        strict = self.strict
+
+        def load_leaf(value, force):
+            if isinstance(value, dict):
+                # pyangbind tries to load the mapping as children of the leaf
+                if force or not value:
+                    return _SKIP
+                raise CompiledValidationError("Unknown element '{}'".format(next(iter(value))))
+            if type_kind == "empty":
+                if value != [None]:
+                    raise CompiledValidationError("Invalid value for empty, got {}".format(value))
+                return [None]
+            if isinstance(value, list):
+                if strict:
+                    raise CompiledValidationError("Expected a single value, got a list")
+                # pyangbind stores the str() of the list, and 0 in integer leaves
+                if type_kind in _INT_KINDS:
+                    return 0
+                value = str(value)
+            return convert(value)
+
+        return load_leaf
+
+    def _leaf_list_loader(self, info, module):
+        convert = self._item_converter(info["type"], module)
+
+        def load_leaf_list(value, force):
+            if isinstance(value, dict):
+                if force or not value:
+                    return _SKIP
+                raise CompiledValidationError("Unknown element '{}'".format(next(iter(value))))
+            if not isinstance(value, list):
+                value = [value]
+            return [convert(item) for item in value]
+
+        return load_leaf_list
+
+    # ******************** Type converters ********************
+
+    def _converter(self, type_index, module=None):
+        # module: module of the leaf, identityref values are normalized without prefix when their identity is
+        # defined in it
+        kind, restrictions = self.types[type_index]
+        if kind not in ("identityref", "union"):
+            module = None
+        convert = self._converters.get((type_index, module))
+        if convert is None:
+            builder = getattr(self, "_convert_{}".format(kind.replace("-", "_")), None)
+            if builder is None:
+                builder = self._convert_int if kind in _INT_KINDS else self._convert_string
+            if kind in ("identityref", "union"):
+                convert = builder(kind, restrictions, module)
+            else:
+                convert = builder(kind, restrictions)
+            self._converters[(type_index, module)] = convert
+        return convert
+
+    def _item_converter(self, type_index, module=None):
+        # pyangbind typed lists only accept real strings for unrestricted string items
+        convert = self._item_converters.get((type_index, module))
+        if convert is None:
+            kind, restrictions = self.types[type_index]
+            if kind == "leafref" or (kind == "string" and not restrictions):
+                def convert(value):
+                    if not isinstance(value, str):
+                        raise CompiledValidationError("Expected a string, got {}".format(type(value).__name__))
+                    return value
+            else:
+                convert = self._converter(type_index, module)
+            self._item_converters[(type_index, module)] = convert
+        return convert
+
+    @staticmethod
+    def _range_check(all_ranges, parse=None):
+        if parse:
+            all_ranges = [[(None if lo is None else parse(lo), None if hi is None else parse(hi)) for lo, hi in ranges]
+                          for ranges in all_ranges]
+
+        def check(value):
+            for ranges in all_ranges:
+                for lo, hi in ranges:
+                    if (lo is None or value >= lo) and (hi is None or value <= hi):
+                        break
+                else:
+                    raise CompiledValidationError("{} out of range".format(value))
+
+        return check
+
+    def _convert_int(self, kind, restrictions):
+        check = self._range_check(restrictions.get("ranges", []))
+        as_string = kind in ("int64", "uint64")
+
+        def convert(value):
+            value = int(value)
+            check(value)
+            return str(value) if as_string else value
+
+        return convert
+
+    def _convert_decimal64(self, kind, restrictions):
+        quantum = Decimal(1).scaleb(-restrictions["fraction-digits"])
+        check = self._range_check(restrictions.get("ranges", []), Decimal)
+
+        def convert(value):
+            value = Decimal(value).quantize(quantum)
+            check(value)
+            return str(value)
+
+        return convert
+
+    def _convert_string(self, kind, restrictions):
+        lengths = restrictions.get("lengths")
+        check_length = self._range_check(lengths) if lengths else None
+        patterns = [(regex.compile(_xsd_to_python_pattern(p)), invert)
+                    for p, invert in restrictions.get("patterns", ())]
+
+        def convert(value):
+            value = str(value)
+            if check_length:
+                check_length(len(value))
+            for pattern, invert in patterns:
+                if (pattern.match(value) is None) != invert:
+                    raise CompiledValidationError("'{}' does not match pattern '{}'".format(value, pattern.pattern))
+            return value
+
+        return convert
+
+    def _convert_boolean(self, kind, restrictions):
+        def convert(value):
+            try:
+                return _BOOL_VALUES[value]
+            except (KeyError, TypeError):
+                raise CompiledValidationError("{} is an invalid value for a boolean".format(value))
+
+        return convert
+
+    def _convert_empty(self, kind, restrictions):
+        def convert(value):
+            if value not in ([None], True):
+                raise CompiledValidationError("Invalid value for empty, got {}".format(value))
+            return [None]
+
+        return convert
+
+    def _convert_enumeration(self, kind, restrictions):
+        enums = frozenset(restrictions["enums"])
+
+        def convert(value):
+            value = str(value)
+            if value not in enums:
+                raise CompiledValidationError("'{}' is not one of {}".format(value, sorted(enums)))
+            return value
+
+        return convert
+
+    def _convert_identityref(self, kind, restrictions, module):
+        # identity name -> [(module, prefixes accepted for the module)]
+        by_name = {}
+        for (identity_module, name), prefixes in sorted(restrictions["identities"].items()):
+            by_name.setdefault(name, []).append((identity_module, frozenset(prefixes)))
+        names = sorted("{}:{}".format(identity_module, name) for identity_module, name in restrictions["identities"])
+        strict = self.strict
+
+        def convert(value):
+            value = str(value)
+            prefix, _, name = value.partition(":") if ":" in value else ("", "", value)
+            candidates = by_name.get(name, ())
+            if prefix:
+                matching = [candidate for candidate in candidates if prefix in candidate[1]]
+                # pyangbind ignores the prefix
+                if matching or strict:
+                    candidates = matching
+            if not candidates:
+                raise CompiledValidationError("'{}' is not one of {}".format(value, names))
+            if strict and len(candidates) > 1:
+                raise CompiledValidationError("'{}' is ambiguous, expected one of {}".format(
+                    value, ["{}:{}".format(identity_module, name) for identity_module, _ in candidates]))
+            identity_module = candidates[0][0]
+            return name if identity_module == module else "{}:{}".format(identity_module, name)
+
+        return convert
+
+    def _convert_bits(self, kind, restrictions):
+        bits = frozenset(restrictions["bits"])
+
+        def convert(value):
+            value = str(value)
+            for bit in value.split():
+                if bit not in bits:
+                    raise CompiledValidationError("'{}' is not one of {}".format(bit, sorted(bits)))
+            return value
+
+        return convert
+
+    def _convert_leafref(self, kind, restrictions):
+        # Bindings are generated without xpath helper, so leafrefs behave as plain strings
+        return str
+
+    def _convert_union(self, kind, restrictions, module):
+        members = [self._converter(t, module) for t in restrictions["types"]]
+
+        def convert(value):
+            for member in members:
+                try:
+                    return member(value)
+                except (ValueError, TypeError, ArithmeticError, AttributeError):
+                    pass
+            raise CompiledValidationError("'{}' does not match any type of the union".format(value))
+
+        return convert
+
+
+class _References:
+    # Leafrefs of a model resolved to nodes of its tables. Leafrefs to other models (nsd to vnfd) are ignored
+
+    def __init__(self, model):
+        nodes = model.nodes
+        self.chains = [None] * len(nodes)
+        pending = [(index, ()) for index in model.root.values()]
+        while pending:
+            index, parent_chain = pending.pop()
+            self.chains[index] = parent_chain + (index,)
+            pending.extend((child, self.chains[index]) for child in nodes[index][4].get("children", {}).values())
+        by_names = {tuple(nodes[i][1] for i in chain): chain[-1] for chain in self.chains if chain is not None}
+
+        # leafref node -> (target node, depth of the chain shared by both, the scope of the leafref)
+        self.leafrefs = {}
+        # target node -> [(leafref node, depth)]
+        self.referenced_by = {}
+        for index, (kind, name, module, path, info) in enumerate(nodes):
+            if kind not in ("leaf", "leaf-list") or self.chains[index] is None:
+                continue
+            type_kind, restrictions = model.types[info["type"]]
+            if type_kind != "leafref" or "target" not in restrictions:
+                continue
+            target = by_names.get(tuple(part.rpartition(":")[2] for part in restrictions["target"][1:].split("/")))
+            if target is None:
+                continue
+            depth = _leafref_scope_depth(restrictions["path"], self.chains[index], self.chains[target])
+            self.leafrefs[index] = (target, depth)
+            self.referenced_by.setdefault(target, []).append((index, depth))
+        # nodes with leafrefs below them, to only walk the parts of a subtree with leafrefs
+        self.with_leafrefs = set()
+        for index in self.leafrefs:
+            self.with_leafrefs.update(self.chains[index])
+
+
+def _leafref_scope_depth(path, chain, target_chain):
+    # The leafref and its target are in the same instance of the first depth nodes of their chains.
+    # Relative paths go up to the scope; predicates are ignored, so any target in the scope is accepted
+    shared = 0
+    for index, target_index in zip(chain, target_chain):
+        if index != target_index:
+            break
+        shared += 1
+    if path.startswith("/"):
+        return 0
+    depth = len(chain) - len(regex.match(r"(\.\./)*", path).group(0)) // 3
+    return depth if 0 <= depth <= shared else shared
+
+
+class _ReferenceChecker:
+    # Checks the constraints a changed subtree touches against the document containing it
+
+    def __init__(self, model, references, document):
+        self.nodes = model.nodes
+        self.references = references
+        self.document = document
+        # (target node, scope steps) -> values of the target instances in the scope
+        self._targets = {}
+
+    def check_keys(self, steps, tokens):
+        # Keys of the list entry at the path, or of the entry whose key leaf is at the path, among its siblings
+        last = len(steps) - 1
+        if steps[last][1] is None and last > 0 and self.nodes[steps[last][0]][4].get("key"):
+            last -= 1
+        index, position = steps[last]
+        if position is None or self.nodes[index][0] != "list":
+            return
+        info = self.nodes[index][4]
+        entries = self._value(steps[:last] + [(index, None)])
+        if not isinstance(entries, list) or position >= len(entries):
+            raise CompiledValidationError("Not found in the document", list(tokens))
+        for names in ([info["keys"]] if info.get("keys") else []) + list(info.get("unique", ())):
+            entry_key = self._entry_values(entries[position], names)
+            if None in entry_key:
+                continue
+            for other_position, other in enumerate(entries):
+                if other_position != position and self._entry_values(other, names) == entry_key:
+                    raise CompiledValidationError("Duplicated {} {} in entry {}".format(
+                        "key" if names is info.get("keys") else "unique value", " ".join(entry_key),
+                        other_position), _entry_tokens(tokens, steps, last))
+
+    def check_leafrefs(self, steps, tokens, subtree):
+        # Leafrefs in the subtree must reference a target in their scope of the document
+        for index, value, leaf_steps, leaf_tokens in self._leafref_instances(steps, tokens, subtree):
+            target, depth = self.references.leafrefs[index]
+            values = self._target_values(target, depth, leaf_steps)
+            for item in value if isinstance(value, list) else (value,):
+                if str(item) not in values:
+                    raise CompiledValidationError("Leafref '{}' not found in {}".format(
+                        item, self.nodes[target][3]), leaf_tokens)
+
+    def check_referencing(self, steps, subtree, previous):
+        # Leafrefs out of the subtree referencing targets in it. Leafrefs inside it are checked by check_leafrefs
+        nodes = tuple(index for index, _ in steps)
+        for target, referencing in self.references.referenced_by.items():
+            chain = self.references.chains[target]
+            if chain[:len(nodes)] != nodes:
+                continue
+            removed = None
+            if previous is not None:
+                removed = (self._subtree_values(previous, steps[-1], chain[len(nodes):])
+                           - self._subtree_values(subtree, steps[-1], chain[len(nodes):]))
+                if not removed:
+                    continue
+            for index, depth in referencing:
+                if depth >= len(steps):
+                    continue
+                values = self._target_values(target, depth, steps)
+                scope_value = self._value(steps[:depth])
+                scope_tokens = self._tokens(steps[:depth])
+                for value, value_tokens in self._descendants(scope_value, self.references.chains[index][depth:],
+                                                             scope_tokens):
+                    for item in value if isinstance(value, list) else (value,):
+                        item = str(item)
+                        if (removed is None or item in removed) and item not in values:
+                            raise CompiledValidationError("Leafref '{}' not found in {}".format(
+                                item, self.nodes[target][3]), value_tokens)
+
+    def _leafref_instances(self, steps, tokens, subtree):
+        # (leafref node, value, steps, tokens) of the leafrefs in the subtree
+        with_leafrefs = self.references.with_leafrefs
+        pending = [(steps, list(tokens), subtree)]
+        while pending:
+            steps, tokens, value = pending.pop()
+            index, position = steps[-1]
+            if index not in with_leafrefs or value is None:
+                continue
+            kind, name, module, path, info = self.nodes[index]
+            if kind in ("leaf", "leaf-list"):
+                yield index, value, steps, tokens
+                continue
+            if kind == "list" and position is None:
+                if isinstance(value, list):
+                    pending.extend((steps[:-1] + [(index, entry_position)], tokens + [str(entry_position)], entry)
+                                   for entry_position, entry in enumerate(value))
+                continue
+            if not isinstance(value, dict):
+                continue
+            children = info["children"]
+            for key, child_value in value.items():
+                child = children.get(key.rpartition(":")[2])
+                if child is not None:
+                    pending.append((steps + [(child, None)], tokens + [key], child_value))
+
+    def _target_values(self, target, depth, steps):
+        scope = tuple(steps[:depth])
+        values = self._targets.get((target, scope))
+        if values is None:
+            values = set(str(item) for value, _ in self._descendants(
+                self._value(scope), self.references.chains[target][depth:], [])
+                for item in (value if isinstance(value, list) else (value,)))
+            self._targets[(target, scope)] = values
+        return values
+
+    def _value(self, steps):
+        # Value of the document at the steps, None when it is not there
+        value = self.document
+        for index, position in steps:
+            value = _child_value(value, self.nodes[index][1])
+            if position is not None:
+                value = value[position] if isinstance(value, list) and position < len(value) else None
+        return value
+
+    def _tokens(self, steps):
+        tokens = []
+        value = self.document
+        for index, position in steps:
+            name = self.nodes[index][1]
+            key = next((key for key in value if key.rpartition(":")[2] == name), name) \
+                if isinstance(value, dict) else name
+            tokens.append(key)
+            value = _child_value(value, name)
+            if position is not None:
+                tokens.append(str(position))
+                value = value[position] if isinstance(value, list) and position < len(value) else None
+        return tokens
+
+    def _descendants(self, value, chain, tokens):
+        # (value, tokens) of the instances of the nodes of chain, a descent in the schema from value
+        current = [(value, tokens)]
+        for index in chain:
+            name = self.nodes[index][1]
+            found = []
+            for item, item_tokens in current:
+                if not isinstance(item, dict):
+                    continue
+                for key, child in item.items():
+                    if key.rpartition(":")[2] != name or child is None:
+                        continue
+                    if self.nodes[index][0] == "list" and isinstance(child, list):
+                        found.extend((entry, item_tokens + [key, str(position)])
+                                     for position, entry in enumerate(child))
+                    else:
+                        found.append((child, item_tokens + [key]))
+            current = found
+        return current
+
+    def _subtree_values(self, subtree, step, chain):
+        # Values of the target instances in a subtree value at step, chain: descent from its node to the target
+        index, position = step
+        entries = subtree if self.nodes[index][0] == "list" and position is None else [subtree]
+        return set(str(item) for entry in (entries if isinstance(entries, list) else ())
+                   for value, _ in self._descendants(entry, chain, [])
+                   for item in (value if isinstance(value, list) else (value,)))
+
+    @staticmethod
+    def _entry_values(entry, names):
+        if not isinstance(entry, dict):
+            return (None,)
+        values = []
+        for name in names:
+            value = entry
+            for part in name.split("/"):
+                value = _child_value(value, part.rpartition(":")[2]) if isinstance(value, dict) else None
+            values.append(None if value is None else str(value))
+        return tuple(values)
+
+
+def _child_value(value, name):
+    # Child of a mapping, with or without module prefix in its key
+    if not isinstance(value, dict):
+        return None
+    if name in value:
+        return value[name]
+    for key, child in value.items():
+        if key.rpartition(":")[2] == name:
+            return child
+    return None
+
+
+def _entry_tokens(tokens, steps, last):
+    # Tokens of the path up to the list entry of steps[last]
+    count = sum(1 if position is None else 2 for _, position in steps[:last + 1])
+    return list(tokens[:count])
+
+
+def _parse_path(path):
+    if not path.startswith("/"):
+        raise CompiledValidationError("Invalid path '{}'".format(path))
+    return [token.replace("~1", "/").replace("~0", "~") for token in path[1:].split("/") if token]
+
+
+def _merge_entries(entry, other):
+    # List entry loaded by pyangbind from two entries with the same keys: the values of other replace the ones
+    # of entry, but null values and empty lists are skipped, containers are merged and list entries are added
+    # (the list loader merges the ones with the same keys again). Leaf-lists are replaced
+    merged = dict(entry)
+    for key, value in other.items():
+        if value is None or value == []:
+            continue
+        previous = merged.get(key)
+        if isinstance(value, dict) and isinstance(previous, dict):
+            merged[key] = _merge_entries(previous, value)
+        elif (isinstance(value, list) and isinstance(previous, list)
+              and all(isinstance(item, dict) for item in previous + value)):
+            merged[key] = previous + value
+        else:
+            merged[key] = value
+    return merged
+
+
+def _single_key_value(value, convert):
+    if value is None or value == "" or isinstance(value, (list, dict)):
+        raise CompiledValidationError("Expected a non empty single value, got {!r}".format(value))
+    return convert(value)
+
+
+def _composite_key_value(value, convert):
+    if value is None or value == "" or isinstance(value, (list, dict)):
+        return str(value)
+    return convert(value)
+
+
+_INT_KINDS = ("int8", "int16", "int32", "int64", "uint8", "uint16", "uint32", "uint64")
+
+
+def _xsd_to_python_pattern(pattern):
+    # Same anchoring pyangbind applies to YANG patterns
+    trimmed = pattern.endswith("$")
+    if trimmed:
+        pattern = pattern[:-1]
+    pattern = pattern.replace("$", r"\$")
+    if trimmed:
+        pattern += "$"
+    if not pattern.startswith("^"):
+        pattern = "^" + pattern
+    if not pattern.endswith("$"):
+        pattern += "$"
+    return pattern
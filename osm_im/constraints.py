@@ -0,0 +1,753 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import math
+
+import regex
+
+from osm_im.compiled_validation import get_compiled_model, _xsd_to_python_pattern
+
+_constraint_checkers = {}
+
+
+class XPathError(ValueError):
+    pass
+
+
+class ConstraintViolation:
+    '''
+    Violation of a leafref, must or when constraint of a descriptor.
+    kind: leafref, must or when; schema_path: schema path of the constrained node
+    path: JSON pointer of the wrong instance in the descriptor; message: description of the violation
+    '''
+    __slots__ = ("kind", "schema_path", "path", "message")
+
+    def __init__(self, kind, schema_path, path, message):
+        self.kind = kind
+        self.schema_path = schema_path
+        self.path = path
+        self.message = message
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, key) == getattr(other, key) for key in self.__slots__)
+
+    def __str__(self):
+        return "{}: {} ({} of {})".format(self.path, self.message, self.kind, self.schema_path)
+
+    def __repr__(self):
+        return "ConstraintViolation({})".format(
+            ", ".join("{}={!r}".format(key, getattr(self, key)) for key in self.__slots__))
+
+
+def get_constraint_checker(item):
+    '''
+    Returns the ConstraintChecker for a descriptor type (vnfd, nsd, nst, etsi_nfv_vnfd, etsi_nfv_nsd),
+    compiling its constraints the first time it is needed
+    '''
+    checker = _constraint_checkers.get(item)
+    if checker is None:
+        checker = ConstraintChecker(get_compiled_model(item))
+        _constraint_checkers[item] = checker
+    return checker
+
+
+def check_constraints(item, data):
+    '''
+    item: vnfd, nst, nsd, etsi_nfv_vnfd, etsi_nfv_nsd
+    data: dict object loaded from the descriptor file, already validated against its schema
+    Returns the list of ConstraintViolation of the descriptor, empty when every constraint holds
+    '''
+    return get_constraint_checker(item).check(data)
+
+
+class ConstraintChecker:
+    '''
+    Leafref, must and when constraints of a CompiledModel, compiled once into closures over the plain dict
+    descriptor. Leafref paths and must/when expressions are compiled from the YANG XPath subset they use
+    (location paths with predicates, comparisons, arithmetic, and/or, and the core and YANG functions but
+    deref, enum-value and bit-is-set); expressions outside of it are listed in unsupported and not checked.
+    Leafrefs to another descriptor type (nsd to vnfd) are left to osm_im.catalog_references.
+    Checking is linear in the size of the descriptor: the targets of a leafref are collected once per
+    scope instance, and predicates on list keys are resolved with per-document key indexes
+    '''
+
+    def __init__(self, model):
+        self.model = model
+        self.identities = model.identities
+        # identity name -> (module, name) of the identities with that name
+        self.identities_by_name = {}
+        for identity in self.identities:
+            self.identities_by_name.setdefault(identity[1], []).append(identity)
+        # node index -> [(kind, compiled check, xpath, option)]
+        self.constraints = {}
+        # (schema path, xpath, reason) of the constraints that cannot be compiled
+        self.unsupported = []
+        for index, (kind, name, module, path, info) in enumerate(model.nodes):
+            self._compile_node(index, kind, path, info)
+        # constrained nodes and their ancestors, the only ones walked by check
+        self._walked = set()
+        pending = [(index, ()) for index in model.root.values()]
+        while pending:
+            index, ancestors = pending.pop()
+            if index in self.constraints:
+                self._walked.update(ancestors + (index,))
+            children = model.nodes[index][4].get("children", {})
+            pending.extend((child, ancestors + (index,)) for child in children.values())
+
+    def _compile_node(self, index, kind, path, info):
+        checks = []
+        if kind in ("leaf", "leaf-list"):
+            type_kind, restrictions = self.model.types[info["type"]]
+            if type_kind == "leafref":
+                leafref_path = restrictions["path"]
+                try:
+                    expression = _XPathParser(leafref_path).parse()
+                    if expression[0] != "path" or expression[3] is not None:
+                        raise XPathError("Expected a location path")
+                    if expression[1] and (not expression[2] or expression[2][0][1] not in self.model.root):
+                        # target in another descriptor type
+                        expression = None
+                    if expression is not None:
+                        checks.append(("leafref", self._leafref_check(expression), leafref_path, None))
+                except XPathError as e:
+                    self.unsupported.append((path, leafref_path, str(e)))
+        for xpath, error_message in info.get("must", ()):
+            try:
+                checks.append(("must", _compile(_XPathParser(xpath).parse(), self), xpath, error_message))
+            except XPathError as e:
+                self.unsupported.append((path, xpath, str(e)))
+        for xpath, on_parent in info.get("when", ()):
+            try:
+                checks.append(("when", _compile(_XPathParser(xpath).parse(), self), xpath, on_parent))
+            except XPathError as e:
+                self.unsupported.append((path, xpath, str(e)))
+        if checks:
+            self.constraints[index] = checks
+
+    def _leafref_check(self, expression):
+        # Targets of the leafref, memoized by the node its path starts from after going up, and by the values
+        # its predicates compare with, the only parts of the path that depend on the leafref instance
+        _, absolute, steps, _ = expression
+        ups = 0
+        while not absolute and ups < len(steps) and steps[ups][0] == "parent":
+            ups += 1
+        rest = steps[ups:]
+        predicates = [predicate for step in rest for predicate in step[2]]
+        key_values = [_compile(key_predicate[1], self) for key_predicate in map(_key_predicate, predicates)
+                      if key_predicate is not None]
+        memoizable = len(key_values) == len(predicates)
+        select = _compile(("path", False, rest, None), self)
+        memo_id = object()
+
+        def targets(node, document):
+            base = document.root if absolute else node
+            for _ in range(ups):
+                base = base.parent if base is not None else None
+            if base is None:
+                return frozenset()
+            if not memoizable:
+                return frozenset(_string(target) for target in select(base, node, document))
+            key = (memo_id, id(base), tuple(tuple(_strings(value(base, node, document))) for value in key_values))
+            values = document.memo.get(key)
+            if values is None:
+                values = frozenset(_string(target) for target in select(base, node, document))
+                document.memo[key] = values
+            return values
+
+        return targets
+
+    def check(self, data):
+        '''
+        data: dict object loaded from the descriptor file
+        Returns the list of ConstraintViolation of the descriptor, in document order
+        '''
+        document = _Document(self.model, data)
+        violations = []
+        walked = self._walked
+        constraints = self.constraints
+        pending = [document.root]
+        while pending:
+            node = pending.pop()
+            checks = constraints.get(node.index)
+            if checks:
+                self._check_node(node, checks, document, violations)
+            children = [child for name, index in document.child_names(node) if index in walked
+                        for child in document.children(node, name)]
+            pending.extend(reversed(children))
+        return violations
+
+    def _check_node(self, node, checks, document, violations):
+        for kind, check, xpath, option in checks:
+            if kind == "leafref":
+                value = _string(node)
+                if value not in check(node, document):
+                    message = "'{}' does not match any instance of '{}'".format(value, xpath)
+                else:
+                    continue
+            elif kind == "must":
+                if _boolean(check(node, node, document)):
+                    continue
+                message = option or "must '{}' is not satisfied".format(xpath)
+            else:
+                context = node.parent if option else node
+                if _boolean(check(context, context, document)):
+                    continue
+                message = "present but when '{}' is false".format(xpath)
+            violations.append(ConstraintViolation(kind, self.model.nodes[node.index][3], node.path(), message))
+
+    def derived_from(self, value, identity, or_self):
+        # True when the identity of an identityref value is derived from identity (prefixes are ignored)
+        name = value.rpartition(":")[2]
+        target = identity.rpartition(":")[2]
+        if or_self and name == target:
+            return True
+        pending = [base for identity in self.identities_by_name.get(name, ()) for base in self.identities[identity]]
+        seen = set()
+        while pending:
+            base = pending.pop()
+            if base[1] == target:
+                return True
+            if base not in seen:
+                seen.add(base)
+                pending.extend(self.identities.get(base, ()))
+        return False
+
+
+class _Node:
+    # Instance of a schema node in the descriptor. index: schema node (None for the document);
+    # tokens: JSON pointer tokens from the parent instance
+    __slots__ = ("index", "value", "parent", "tokens")
+
+    def __init__(self, index, value, parent, tokens):
+        self.index = index
+        self.value = value
+        self.parent = parent
+        self.tokens = tokens
+
+    def path(self):
+        tokens = []
+        node = self
+        while node is not None:
+            tokens[0:0] = node.tokens
+            node = node.parent
+        return "/" + "/".join(tokens)
+
+
+class _Document:
+    # Instances of a descriptor, built on demand and shared by every expression evaluated on it
+
+    def __init__(self, model, data):
+        self.model = model
+        self.root = _Node(None, data, None, ())
+        # id(node), name -> [child instances]
+        self._children = {}
+        # id(node), list name, key name -> {key value: [entries]}
+        self._key_indexes = {}
+        self.memo = {}
+
+    def _schema_children(self, node):
+        if node.index is None:
+            return self.model.root
+        return self.model.nodes[node.index][4].get("children", {})
+
+    def children(self, node, name):
+        # Instances of the child name of node, list and leaf-list entries one by one
+        memo_key = (id(node), name)
+        children = self._children.get(memo_key)
+        if children is None:
+            children = ()
+            value = node.value
+            if isinstance(value, dict):
+                key = name if name in value else next((key for key in value if key.endswith(":" + name)), None)
+                index = self._schema_children(node).get(name)
+                if key is not None and index is not None and value[key] is not None:
+                    value = value[key]
+                    if self.model.nodes[index][0] in ("list", "leaf-list") and isinstance(value, list):
+                        children = [_Node(index, item, node, (key, str(position)))
+                                    for position, item in enumerate(value)]
+                    else:
+                        children = [_Node(index, value, node, (key,))]
+            # nodes are kept alive by the children of their parent, so ids are not reused
+            self._children[memo_key] = children
+        return children
+
+    def child_names(self, node):
+        # Names of the children of node in the document that are in the schema
+        if not isinstance(node.value, dict):
+            return []
+        schema_children = self._schema_children(node)
+        return [(name, schema_children[name]) for name in (key.rpartition(":")[2] for key in node.value)
+                if name in schema_children]
+
+    def all_children(self, node):
+        return [child for name, _ in self.child_names(node) for child in self.children(node, name)]
+
+    def key_lookup(self, node, name, key_name, key_value):
+        key = (id(node), name, key_name)
+        index = self._key_indexes.get(key)
+        if index is None:
+            index = {}
+            for entry in self.children(node, name):
+                for key_node in self.children(entry, key_name):
+                    index.setdefault(_string(key_node), []).append(entry)
+            self._key_indexes[key] = index
+        return index.get(key_value, ())
+
+
+# ******************** XPath ********************
+
+_TOKEN = regex.compile(r"""\s*(?:
+    (?P<number>\d+(?:\.\d*)?|\.\d+)
+    |(?P<literal>"[^"]*"|'[^']*')
+    |(?P<op>\.\.|//|!=|<=|>=|[/()\[\],=<>+*|.-])
+    |(?P<name>(?:[A-Za-z_][\w.-]*:)?[A-Za-z_][\w.-]*)
+    )""", regex.VERBOSE)
+
+_UNSUPPORTED_FUNCTIONS = ("deref", "enum-value", "bit-is-set")
+
+
+class _XPathParser:
+    # Parses the XPath 1.0 subset used by YANG into a tree of tuples, compiled by _compile
+
+    def __init__(self, expression):
+        self.expression = expression
+        self.tokens = []
+        position = 0
+        expression = expression.rstrip()
+        while position < len(expression):
+            match = _TOKEN.match(expression, position)
+            if match is None or match.end() == position:
+                raise XPathError("Unexpected character at {} in '{}'".format(position, self.expression))
+            self.tokens.append((match.lastgroup, match.group(match.lastgroup)))
+            position = match.end()
+        self.position = 0
+
+    def parse(self):
+        expression = self._or()
+        if self.position != len(self.tokens):
+            raise XPathError("Unexpected '{}' in '{}'".format(self.tokens[self.position][1], self.expression))
+        return expression
+
+    def _peek(self, offset=0):
+        position = self.position + offset
+        return self.tokens[position] if position < len(self.tokens) else (None, None)
+
+    def _accept(self, kind, *values):
+        token_kind, value = self._peek()
+        if token_kind == kind and value in values:
+            self.position += 1
+            return value
+        return None
+
+    def _expect(self, kind, value):
+        if self._accept(kind, value) is None:
+            raise XPathError("Expected '{}' in '{}'".format(value, self.expression))
+
+    def _or(self):
+        expression = self._and()
+        while self._accept("name", "or"):
+            expression = ("or", expression, self._and())
+        return expression
+
+    def _and(self):
+        expression = self._equality()
+        while self._accept("name", "and"):
+            expression = ("and", expression, self._equality())
+        return expression
+
+    def _equality(self):
+        expression = self._relational()
+        while True:
+            operator = self._accept("op", "=", "!=")
+            if operator is None:
+                return expression
+            expression = ("compare", operator, expression, self._relational())
+
+    def _relational(self):
+        expression = self._additive()
+        while True:
+            operator = self._accept("op", "<", ">", "<=", ">=")
+            if operator is None:
+                return expression
+            expression = ("compare", operator, expression, self._additive())
+
+    def _additive(self):
+        expression = self._multiplicative()
+        while True:
+            operator = self._accept("op", "+", "-")
+            if operator is None:
+                return expression
+            expression = ("arithmetic", operator, expression, self._multiplicative())
+
+    def _multiplicative(self):
+        expression = self._unary()
+        while True:
+            operator = self._accept("op", "*") or self._accept("name", "div", "mod")
+            if operator is None:
+                return expression
+            expression = ("arithmetic", operator, expression, self._unary())
+
+    def _unary(self):
+        if self._accept("op", "-"):
+            return ("negative", self._unary())
+        expression = self._path()
+        while self._accept("op", "|"):
+            expression = ("union", expression, self._path())
+        return expression
+
+    def _path(self):
+        kind, value = self._peek()
+        if kind == "op" and value in ("/", ".", "..", "*") or kind == "name" and self._peek(1) != ("op", "("):
+            return self._location_path()
+        if kind == "op" and value == "//":
+            raise XPathError("Descendant axis not supported in '{}'".format(self.expression))
+        start = self._primary()
+        predicates = self._predicates()
+        if predicates:
+            start = ("path", False, [("self", None, predicates)], start)
+        if self._peek() != ("op", "/"):
+            return start
+        self.position += 1
+        return ("path", False, self._steps(), start)
+
+    def _location_path(self):
+        absolute = self._accept("op", "/") is not None
+        kind, value = self._peek()
+        if absolute and not (kind == "name" or kind == "op" and value in (".", "..", "*")):
+            # the root node alone
+            return ("path", True, [], None)
+        return ("path", absolute, self._steps(), None)
+
+    def _steps(self):
+        steps = [self._step()]
+        while self._accept("op", "/"):
+            steps.append(self._step())
+        if self._peek() == ("op", "//"):
+            raise XPathError("Descendant axis not supported in '{}'".format(self.expression))
+        return steps
+
+    def _step(self):
+        if self._accept("op", "."):
+            return ("self", None, self._predicates())
+        if self._accept("op", ".."):
+            return ("parent", None, [])
+        if self._accept("op", "*"):
+            return ("child", None, self._predicates())
+        kind, value = self._peek()
+        if kind != "name":
+            raise XPathError("Expected a node name in '{}'".format(self.expression))
+        self.position += 1
+        return ("child", value.rpartition(":")[2], self._predicates())
+
+    def _predicates(self):
+        predicates = []
+        while self._accept("op", "["):
+            predicates.append(self._or())
+            self._expect("op", "]")
+        return predicates
+
+    def _primary(self):
+        kind, value = self._peek()
+        self.position += 1
+        if kind == "literal":
+            return ("literal", value[1:-1])
+        if kind == "number":
+            return ("number", float(value))
+        if kind == "op" and value == "(":
+            expression = self._or()
+            self._expect("op", ")")
+            return expression
+        if kind == "name":
+            self._expect("op", "(")
+            name = value.rpartition(":")[2] if value.partition(":")[0] in ("fn", "yang") else value
+            if name in _UNSUPPORTED_FUNCTIONS or name not in _FUNCTIONS:
+                raise XPathError("Function '{}' not supported in '{}'".format(name, self.expression))
+            arguments = []
+            if not self._accept("op", ")"):
+                arguments.append(self._or())
+                while self._accept("op", ","):
+                    arguments.append(self._or())
+                self._expect("op", ")")
+            return ("call", name, arguments)
+        raise XPathError("Unexpected '{}' in '{}'".format(value, self.expression))
+
+
+def _key_predicate(predicate):
+    # (key name, value expression) for predicates comparing a child leaf with a value that does not depend
+    # on the context node (literals and current()), that are resolved with a key index; None for other predicates
+    if predicate[0] != "compare" or predicate[1] != "=":
+        return None
+    for left, right in ((predicate[2], predicate[3]), (predicate[3], predicate[2])):
+        if (left[0] == "path" and not left[1] and left[3] is None and len(left[2]) == 1
+                and left[2][0][0] == "child" and left[2][0][1] is not None and not left[2][0][2]
+                and _context_free(right)):
+            return (left[2][0][1], right)
+    return None
+
+
+def _context_free(expression):
+    kind = expression[0]
+    if kind in ("literal", "number"):
+        return True
+    if kind == "call":
+        return expression[1] == "current" or all(_context_free(argument) for argument in expression[2])
+    if kind == "path":
+        return expression[1] or (expression[3] is not None and _context_free(expression[3]))
+    if kind in ("arithmetic", "compare"):
+        return _context_free(expression[2]) and _context_free(expression[3])
+    if kind in ("and", "or", "union"):
+        return _context_free(expression[1]) and _context_free(expression[2])
+    if kind == "negative":
+        return _context_free(expression[1])
+    return False
+
+
+def _compile(expression, checker):
+    # Returns evaluate(node, current, document) for a parsed expression
+    kind = expression[0]
+    if kind in ("literal", "number"):
+        value = expression[1]
+        return lambda node, current, document: value
+    if kind in ("and", "or"):
+        left, right = _compile(expression[1], checker), _compile(expression[2], checker)
+        if kind == "and":
+            return lambda node, current, document: (_boolean(left(node, current, document))
+                                                    and _boolean(right(node, current, document)))
+        return lambda node, current, document: (_boolean(left(node, current, document))
+                                                or _boolean(right(node, current, document)))
+    if kind == "compare":
+        operator = expression[1]
+        left, right = _compile(expression[2], checker), _compile(expression[3], checker)
+        return lambda node, current, document: _compare(operator, left(node, current, document),
+                                                        right(node, current, document))
+    if kind == "arithmetic":
+        operation = _ARITHMETIC[expression[1]]
+        left, right = _compile(expression[2], checker), _compile(expression[3], checker)
+        return lambda node, current, document: operation(_number(left(node, current, document)),
+                                                         _number(right(node, current, document)))
+    if kind == "negative":
+        operand = _compile(expression[1], checker)
+        return lambda node, current, document: -_number(operand(node, current, document))
+    if kind == "union":
+        left, right = _compile(expression[1], checker), _compile(expression[2], checker)
+
+        def union(node, current, document):
+            nodes = list(left(node, current, document))
+            seen = set(map(id, nodes))
+            nodes.extend(other for other in right(node, current, document) if id(other) not in seen)
+            return nodes
+
+        return union
+    if kind == "call":
+        function = _FUNCTIONS[expression[1]]
+        arguments = [_compile(argument, checker) for argument in expression[2]]
+        return lambda node, current, document: function(checker, node, current, document, arguments)
+    return _compile_path(expression, checker)
+
+
+def _compile_path(expression, checker):
+    _, absolute, steps, start = expression
+    start = _compile(start, checker) if start is not None else None
+    compiled_steps = []
+    for axis, name, predicates in steps:
+        key_predicates = []
+        other_predicates = []
+        for predicate in predicates:
+            key_predicate = _key_predicate(predicate) if axis == "child" and name is not None else None
+            if key_predicate is not None and not key_predicates:
+                key_predicates.append((key_predicate[0], _compile(key_predicate[1], checker)))
+            else:
+                other_predicates.append(_compile(predicate, checker))
+        compiled_steps.append((axis, name, key_predicates, other_predicates))
+
+    def evaluate(node, current, document):
+        if start is not None:
+            nodes = start(node, current, document)
+            if not isinstance(nodes, list):
+                return []
+        else:
+            nodes = [document.root] if absolute else [node]
+        for axis, name, key_predicates, other_predicates in compiled_steps:
+            found = []
+            for context in nodes:
+                if axis == "self":
+                    found.append(context)
+                elif axis == "parent":
+                    if context.parent is not None:
+                        found.append(context.parent)
+                elif key_predicates:
+                    key_name, value = key_predicates[0]
+                    for key_value in _strings(value(context, current, document)):
+                        found.extend(document.key_lookup(context, name, key_name, key_value))
+                elif name is None:
+                    found.extend(document.all_children(context))
+                else:
+                    found.extend(document.children(context, name))
+            for predicate in other_predicates:
+                selected = []
+                for position, candidate in enumerate(found, 1):
+                    result = predicate(candidate, current, document)
+                    if result == position if isinstance(result, float) else _boolean(result):
+                        selected.append(candidate)
+                found = selected
+            nodes = found
+        return nodes
+
+    return evaluate
+
+
+# ******************** XPath values ********************
+
+def _string(value):
+    if isinstance(value, list):
+        return _string(value[0]) if value else ""
+    if isinstance(value, _Node):
+        value = value.value
+        if isinstance(value, (dict, list)) or value is None:
+            return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float):
+        if math.isnan(value):
+            return "NaN"
+        return str(int(value)) if value.is_integer() else str(value)
+    return str(value)
+
+
+def _strings(value):
+    if isinstance(value, list):
+        return [_string(node) for node in value]
+    return [_string(value)]
+
+
+def _number(value):
+    if isinstance(value, float):
+        return value
+    if isinstance(value, bool):
+        return 1.0 if value else 0.0
+    try:
+        return float(_string(value))
+    except ValueError:
+        return math.nan
+
+
+def _boolean(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, float):
+        return value != 0 and not math.isnan(value)
+    return bool(value)
+
+
+_ARITHMETIC = {
+    "+": lambda a, b: a + b,
+    "-": lambda a, b: a - b,
+    "*": lambda a, b: a * b,
+    "div": lambda a, b: a / b if b else (math.nan if a == 0 or math.isnan(a) else math.copysign(math.inf, a * b)),
+    "mod": lambda a, b: math.fmod(a, b) if b else math.nan,
+}
+
+_COMPARE = {
+    "=": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    ">": lambda a, b: a > b,
+    "<=": lambda a, b: a <= b,
+    ">=": lambda a, b: a >= b,
+}
+
+
+def _compare(operator, left, right):
+    # XPath 1.0 comparison, node-sets compare true when any of their nodes does
+    compare = _COMPARE[operator]
+    if isinstance(left, list) and isinstance(right, list):
+        right_values = [_string(node) for node in right]
+        return any(_compare(operator, _string(node), value) for node in left for value in right_values)
+    if isinstance(left, list):
+        if isinstance(right, bool):
+            return compare(_boolean(left), right)
+        return any(_compare(operator, _string(node) if isinstance(right, str) else _number(node), right)
+                   for node in left)
+    if isinstance(right, list):
+        return _compare(_SWAPPED[operator], right, left)
+    if operator in ("=", "!="):
+        if isinstance(left, bool) or isinstance(right, bool):
+            return compare(_boolean(left), _boolean(right))
+        if isinstance(left, float) or isinstance(right, float):
+            return compare(_number(left), _number(right))
+        return compare(_string(left), _string(right))
+    return compare(_number(left), _number(right))
+
+
+_SWAPPED = {"=": "=", "!=": "!=", "<": ">", ">": "<", "<=": ">=", ">=": "<="}
+
+
+# ******************** XPath functions ********************
+
+def _argument_values(node, current, document, arguments):
+    return [argument(node, current, document) for argument in arguments]
+
+
+def _function_derived_from(or_self):
+    def derived_from(checker, node, current, document, arguments):
+        nodes, identity = _argument_values(node, current, document, arguments)
+        identity = _string(identity)
+        return any(checker.derived_from(_string(value), identity, or_self)
+                   for value in (nodes if isinstance(nodes, list) else [nodes]))
+
+    return derived_from
+
+
+def _function_re_match(checker, node, current, document, arguments):
+    value, pattern = (_string(value) for value in _argument_values(node, current, document, arguments))
+    return regex.match(_xsd_to_python_pattern(pattern), value) is not None
+
+
+def _contains(value, part):
+    return part in value
+
+
+def _context_or_argument(function):
+    # Functions of one optional argument, applied to the context node when it is missing
+    def call(checker, node, current, document, arguments):
+        values = _argument_values(node, current, document, arguments)
+        return function(values[0] if values else [node])
+
+    return call
+
+
+_FUNCTIONS = {
+    "current": lambda checker, node, current, document, arguments: [current],
+    "not": lambda checker, node, current, document, arguments: not _boolean(arguments[0](node, current, document)),
+    "true": lambda checker, node, current, document, arguments: True,
+    "false": lambda checker, node, current, document, arguments: False,
+    "count": lambda checker, node, current, document, arguments: float(len(arguments[0](node, current, document))),
+    "boolean": lambda checker, node, current, document, arguments: _boolean(arguments[0](node, current, document)),
+    "string": _context_or_argument(_string),
+    "number": _context_or_argument(_number),
+    "string-length": _context_or_argument(lambda value: float(len(_string(value)))),
+    "concat": lambda checker, node, current, document, arguments: "".join(
+        _string(value) for value in _argument_values(node, current, document, arguments)),
+    "contains": lambda checker, node, current, document, arguments: _contains(
+        *(_string(value) for value in _argument_values(node, current, document, arguments))),
+    "starts-with": lambda checker, node, current, document, arguments: str.startswith(
+        *(_string(value) for value in _argument_values(node, current, document, arguments))),
+    "derived-from": _function_derived_from(False),
+    "derived-from-or-self": _function_derived_from(True),
+    "re-match": _function_re_match,
+}
+
@@ -22,7 +22,15 @@
 # contact: agarcia@whitestack.com
 ##
 
-from osm_im.validation import Validation, ValidationException
+import copy
+from collections.abc import Mapping, Sequence
+
+from osm_im import instrumentation
+from osm_im.parallel import get_async_executor
+from osm_im.validation import Validation, ValidationException, get_descriptor_type
+
+
+TRANSLATION_VALIDATION_MODES = ("full", "none", "reuse")
 
 
 class TranslationException(Exception):
@@ -31,68 +39,283 @@ class TranslationException(Exception):
 
 # ******************** Translation public functions ********************
 
-def translate_im_model_to_sol006(im_model_data):
-    _validate_im_model(im_model_data)
-    descriptor_type = _get_im_model_descriptor_type(im_model_data)
-    if descriptor_type == "vnfd":
-        return translate_im_vnfd_to_sol006(im_model_data)
-    if descriptor_type == "nsd":
-        return translate_im_nsd_to_sol006(im_model_data)
-    # For sanity, should not happen
-    raise TranslationException("Error in translation: cannot determine the type of OSM-IM descriptor. Found {}, "
-                               "expected one of: vnfd:vnfd-catalog, vnfd-catalog, nsd:nsd-catalog, nsd-catalog."
-                               .format(descriptor_type))
+def translate_im_model_to_sol006(im_model_data, validate="full", validate_output=False):
+    '''
+    validate: full to validate the input model before translating it, none to translate it without
+    validation (already validated inputs), or reuse to validate it and translate the normalized model
+    returned by the validation, with values typed as in the model
+    validate_output: True to validate the translated model against the SOL006 model
+    The input model is never modified. The translated model shares the subtrees that are not changed by
+    the translation with it, so they must be copied before modifying any of them, unless the input model is
+    a read_only_view: then the translation copies them
+    '''
+    if validate not in TRANSLATION_VALIDATION_MODES:
+        raise TranslationException("Error in translation: unknown validation mode '{}'. Expected values: {}"
+                                   .format(validate, ", ".join(TRANSLATION_VALIDATION_MODES)))
+    with instrumentation.stage("translate_im_model_to_sol006", im_model_data):
+        if validate == "full":
+            _validate_im_model(im_model_data)
+        elif validate == "reuse":
+            im_model_data = _validate_im_model(im_model_data, return_normalized=True)
+        descriptor_type = _get_im_model_descriptor_type(im_model_data)
+        if descriptor_type == "vnfd":
+            sol006_model_data = translate_im_vnfd_to_sol006(im_model_data)
+        elif descriptor_type == "nsd":
+            sol006_model_data = translate_im_nsd_to_sol006(im_model_data)
+        else:
+            # For sanity, should not happen
+            raise TranslationException("Error in translation: cannot determine the type of OSM-IM descriptor. "
+                                       "Found {}, expected one of: vnfd:vnfd-catalog, vnfd-catalog, nsd:nsd-catalog, "
+                                       "nsd-catalog.".format(descriptor_type))
+        if validate_output:
+            _validate_sol006_model(descriptor_type, sol006_model_data)
+    return sol006_model_data
+
+
+async def atranslate_im_model_to_sol006(im_model_data, validate="full", validate_output=False, timeout=None,
+                                        executor=None):
+    '''
+    Same as translate_im_model_to_sol006 without blocking the event loop, run by executor, an
+    osm_im.parallel.AsyncExecutor (get_async_executor() when None).
+    timeout: seconds, None for the default timeout of the executor. Raises TimeoutError when exceeded
+    '''
+    return await (executor or get_async_executor()).run(translate_im_model_to_sol006, im_model_data, validate,
+                                                         validate_output, timeout=timeout)
 
 
 def translate_im_vnfd_to_sol006(im_vnfd):
-    im_vnfd = _remove_im_vnfd_envelope(im_vnfd)
-    sol006_vnfd = {}
-    _add_im_vnfd_basic_data_to_sol006_vnfd(im_vnfd, sol006_vnfd)
-    _add_im_vnfd_mgmt_interface_cp_to_sol006_vnfd(im_vnfd, sol006_vnfd)
-    _add_im_vdu_flavors_to_sol006_vnfd(im_vnfd, sol006_vnfd)
-    _add_im_vdu_guest_epa_to_sol006_vnfd(im_vnfd, sol006_vnfd)
-    _add_im_vdu_images_to_sol006_vnfd(im_vnfd, sol006_vnfd)
-    _add_im_vdus_to_sol006_vnfd(im_vnfd, sol006_vnfd)
-    _add_im_internal_vlds_to_sol006_vfnd(im_vnfd, sol006_vnfd)
-    _add_im_vnf_configuration_to_sol006_vnfd(im_vnfd, sol006_vnfd)
-    _add_im_ip_profiles_to_sol006_vnfd(im_vnfd, sol006_vnfd)
-    _add_im_vdu_monitoring_params_to_sol006_vnfd(im_vnfd, sol006_vnfd)
-    _add_im_scaling_group_descriptors_to_sol006_vnfd(im_vnfd, sol006_vnfd)
-    _add_im_kdus_to_sol006_vnfd(im_vnfd, sol006_vnfd)
-    _add_im_k8s_clusters_to_sol006_vnfd(im_vnfd, sol006_vnfd)
-    _add_im_placement_groups_to_sol006_vnfd(im_vnfd, sol006_vnfd)
-    _cleanup_juju_in_configurations(sol006_vnfd)
-    return {"vnfd": sol006_vnfd}
+    '''
+    Translates an OSM-IM VNFD catalog to a SOL006 VNFD ({vnfd: {...}}). The IM descriptor is never modified, but
+    by default the subtrees that are not changed are shared by reference, so modifying them in the translated
+    model modifies the IM descriptor too. When im_vnfd is a read_only_view, those subtrees are copied instead
+    '''
+    with instrumentation.stage("translate_im_vnfd_to_sol006", im_vnfd):
+        sol006_vnfd = {}
+        _run_translation_stages(_IM_VNFD_TRANSLATION_STAGES, _remove_im_vnfd_envelope(im_vnfd), sol006_vnfd)
+    return _copy_shared_views(im_vnfd, {"vnfd": sol006_vnfd})
 
 
 def translate_im_nsd_to_sol006(im_nsd):
-    im_nsd = _remove_im_nsd_envelope(im_nsd)
-    sol006_nsd = {}
-    _add_im_nsd_basic_data_to_sol006_nsd(im_nsd, sol006_nsd)
-    _add_im_constituent_vnfds_to_sol006_nsd(im_nsd, sol006_nsd)
-    _add_im_vlds_to_sol006_nsd(im_nsd, sol006_nsd)
-    return {"nsd": {"nsd": [sol006_nsd]}}
+    '''
+    Translates an OSM-IM NSD catalog to a SOL006 NSD ({nsd: {nsd: [...]}}), sharing the subtrees that are not
+    changed with im_nsd as translate_im_vnfd_to_sol006 does
+    '''
+    with instrumentation.stage("translate_im_nsd_to_sol006", im_nsd):
+        sol006_nsd = {}
+        _run_translation_stages(_IM_NSD_TRANSLATION_STAGES, _remove_im_nsd_envelope(im_nsd), sol006_nsd)
+    return _copy_shared_views(im_nsd, {"nsd": {"nsd": [sol006_nsd]}})
+
+
+def translate_sol006_to_im_vnfd(sol006_vnfd):
+    '''
+    Translates a SOL006 VNFD ({vnfd: {...}}) to an OSM-IM VNFD catalog, the inverse of translate_im_vnfd_to_sol006:
+    translating the result back to SOL006 gives the same descriptor, except for the SOL006 contents that
+    translate_im_vnfd_to_sol006 never generates. The SOL006 descriptor is never modified, and subtrees that
+    are not changed are shared by reference (copied when sol006_vnfd is a read_only_view)
+    '''
+    with instrumentation.stage("translate_sol006_to_im_vnfd", sol006_vnfd):
+        im_vnfd = {}
+        _run_translation_stages(_SOL006_VNFD_TRANSLATION_STAGES, _remove_sol006_vnfd_envelope(sol006_vnfd), im_vnfd)
+    return _copy_shared_views(sol006_vnfd, {"vnfd:vnfd-catalog": {"vnfd": [im_vnfd]}})
+
+
+def translate_sol006_to_im_nsd(sol006_nsd):
+    '''
+    Translates a SOL006 NSD ({nsd: {nsd: [...]}}) to an OSM-IM NSD catalog, the inverse of translate_im_nsd_to_sol006,
+    sharing the subtrees that are not changed as translate_sol006_to_im_vnfd does
+    '''
+    with instrumentation.stage("translate_sol006_to_im_nsd", sol006_nsd):
+        im_nsd = {}
+        _run_translation_stages(_SOL006_NSD_TRANSLATION_STAGES, _remove_sol006_nsd_envelope(sol006_nsd), im_nsd)
+    return _copy_shared_views(sol006_nsd, {"nsd:nsd-catalog": {"nsd": [im_nsd]}})
+
+
+def register_im_vdu_translation_handler(handler, finish=None):
+    '''
+    Extends the IM to SOL006 VNFD translation with a per VDU handler, called as handler(walk, im_vdu, sol006_vdu)
+    for every VDU, after the built-in handlers. finish, if given, is called as finish(walk) once all the VDUs
+    were visited. walk is the VduTranslationWalk of the VNFD being translated
+    '''
+    _IM_VDU_TRANSLATION_HANDLERS.append(handler)
+    if finish is not None:
+        _IM_VDU_TRANSLATION_FINISHERS.append(finish)
+
+
+def unregister_im_vdu_translation_handler(handler, finish=None):
+    '''
+    Removes a handler (and its finish function) added with register_im_vdu_translation_handler.
+    Raises ValueError if it was not registered
+    '''
+    _IM_VDU_TRANSLATION_HANDLERS.remove(handler)
+    if finish is not None:
+        _IM_VDU_TRANSLATION_FINISHERS.remove(finish)
+
+
+class VduTranslationWalk:
+    '''
+    State of the single traversal of the VDUs of an IM VNFD.
+    im_vnfd, sol006_vnfd: descriptors being translated
+    vdus: SOL006 VDUs created so far, in IM order
+    data: free dict where registered handlers can keep their own state
+    The remaining attributes are the state of the built-in handlers
+    '''
+
+    def __init__(self, im_vnfd, sol006_vnfd):
+        self.im_vnfd = im_vnfd
+        self.sol006_vnfd = sol006_vnfd
+        self.vdus = []
+        self.data = {}
+        self.cps_by_name = {cp.get("name", ""): cp for cp in im_vnfd.get("connection-point", ())}
+        self.scaling_group_descriptors_by_vdu_id = _get_im_scaling_group_descriptors_by_vdu_id(im_vnfd)
+        # Descriptors from the VDU flavors come first, then the ones created only for the guest EPA
+        self.flavor_compute_descriptors = []
+        self.flavor_storage_descriptors = []
+        self.epa_compute_descriptors = []
+        self.epa_storage_descriptors = []
+        self.image_descriptors = []
+        self.images = set()
+        self.ext_cpds = []
+        self.vdu_configurations = []
+        self.df = {"id": "default-df", "vdu-profile": [],
+                   "instantiation-level": [{"id": "default-instantiation-level", "vdu-level": []}]}
+        self.int_cp_refs_interfaces = {}
+        self.sol006_int_cpds = {}
+        self.vdu_monitoring_param_metrics = {}
+        self.sol006_vdus_by_id = {}
+        # Compute and storage descriptors of the VDU being visited
+        self.compute_descriptor = None
+        self.storage_descriptor = None
+
+
+def read_only_view(data):
+    '''
+    Returns a read-only view of a parsed descriptor, without copying it. It can be given to the translate
+    functions, which fail if they try to modify it, and then copy the subtrees of the translated model that
+    they would share with the descriptor. The translated model is made of plain dicts and lists, that can be
+    modified and serialized without changing the descriptor
+    '''
+    if isinstance(data, (dict, _ReadOnlyDict)):
+        return _ReadOnlyDict(data)
+    if isinstance(data, (list, _ReadOnlyList)):
+        return _ReadOnlyList(data)
+    return data
 
 
 # ******************** Common translation private functions ********************
 
-def _validate_im_model(im_model_data):
+class _ReadOnlyDict(Mapping):
+    __slots__ = ("_data",)
+
+    def __init__(self, data):
+        self._data = data._data if isinstance(data, _ReadOnlyDict) else data
+
+    def __getitem__(self, key):
+        return read_only_view(self._data[key])
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __repr__(self):
+        return "read_only_view({!r})".format(self._data)
+
+
+class _ReadOnlyList(Sequence):
+    __slots__ = ("_data",)
+
+    def __init__(self, data):
+        self._data = data._data if isinstance(data, _ReadOnlyList) else data
+
+    def __getitem__(self, index):
+        return read_only_view(self._data[index])
+
+    def __len__(self):
+        return len(self._data)
+
+    def __eq__(self, other):
+        if isinstance(other, _ReadOnlyList):
+            other = other._data
+        return isinstance(other, list) and self._data == other
+
+    def __repr__(self):
+        return "read_only_view({!r})".format(self._data)
+
+
+def _copy_shared_views(descriptor, translated_model):
+    # Replaces the views of subtrees of descriptor, when it is a read-only view, by copies of them
+    if isinstance(descriptor, _ReadOnlyDict):
+        _copy_views(translated_model)
+    return translated_model
+
+
+def _copy_views(data):
+    items = data.items() if isinstance(data, dict) else enumerate(data)
+    for key, value in items:
+        if isinstance(value, (_ReadOnlyDict, _ReadOnlyList)):
+            data[key] = copy.deepcopy(value._data)
+        elif isinstance(value, (dict, list)):
+            _copy_views(value)
+
+
+def _validate_im_model(im_model_data, return_normalized=False):
     descriptor_type = _get_im_model_descriptor_type(im_model_data)
+    if isinstance(im_model_data, _ReadOnlyDict):
+        # the validation never modifies the descriptor, but the bindings only load dicts and lists
+        im_model_data = im_model_data._data
     try:
-        Validation().pyangbind_validation(descriptor_type, im_model_data)
+        with instrumentation.stage("validate_input"):
+            return Validation().pyangbind_validation(descriptor_type, im_model_data,
+                                                     return_normalized=return_normalized)
     except ValidationException as e:
         raise TranslationException("Error on input model validation: {}".format(str(e)))
 
 
+def _validate_sol006_model(descriptor_type, sol006_model_data):
+    try:
+        with instrumentation.stage("validate_output"):
+            Validation().pyangbind_validation("etsi_nfv_{}".format(descriptor_type), sol006_model_data,
+                                              return_normalized=False)
+    except ValidationException as e:
+        raise TranslationException("Error on output model validation: {}".format(str(e)))
+
+
 def _get_im_model_descriptor_type(im_model_data):
-    data_root = list(im_model_data.keys())[0]
-    if "vnfd" in data_root:
-        return "vnfd"
-    if "nsd" in data_root:
-        return "nsd"
+    descriptor_type = get_descriptor_type(im_model_data)
+    if descriptor_type in ("vnfd", "nsd"):
+        return descriptor_type
     raise TranslationException("Error in translation: cannot determine the type of OSM-IM descriptor. Found {}, "
                                "expected one of: vnfd:vnfd-catalog, vnfd-catalog, nsd:nsd-catalog, nsd-catalog."
-                               .format(data_root))
+                               .format(", ".join(im_model_data) if isinstance(im_model_data, Mapping) else
+                                       type(im_model_data).__name__))
+
+
+def _run_translation_stages(stages, descriptor, translated_descriptor):
+    if not instrumentation.is_enabled():
+        for stage in stages:
+            stage(descriptor, translated_descriptor)
+        return
+    for stage in stages:
+        # Every stage is reported to the instrumentation callbacks with its name
+        with instrumentation.stage(stage.__name__.lstrip("_")):
+            stage(descriptor, translated_descriptor)
+
+
+def _walk_vdus(walk, vdus, handlers, finishers):
+    # Single traversal of the VDUs: every handler is called with each VDU and the translated VDU,
+    # created here with the same id, then the finishers write what the handlers collected
+    handlers = tuple(handlers)
+    for vdu in vdus:
+        translated_vdu = {"id": vdu["id"]}
+        walk.vdus.append(translated_vdu)
+        for handler in handlers:
+            handler(walk, vdu, translated_vdu)
+    for finish in tuple(finishers):
+        finish(walk)
 
 
 # ******************** VNFD translation private functions ********************
@@ -118,54 +341,63 @@ def _add_im_vnfd_mgmt_interface_cp_to_sol006_vnfd(im_vnfd, sol006_vnfd):
     sol006_vnfd["mgmt-cp"] = "{}-ext".format(im_vnfd["mgmt-interface"]["cp"])
 
 
-def _add_im_vdu_flavors_to_sol006_vnfd(im_vnfd, sol006_vnfd):
-    storage_descriptors = []
-    compute_descriptors = []
-    for vdu in im_vnfd.get("vdu", ()):
-        vdu_id = vdu.get("id")
-        vdu_flavor = vdu.get("vm-flavor")
-        if not vdu_flavor:
-            continue
-        storage_descriptor = {"id": "{}-storage".format(vdu_id)}
-        compute_descriptor = {"id": "{}-compute".format(vdu_id)}
-        if vdu_flavor.get("storage-gb"):
-            storage_descriptor["size-of-storage"] = int(vdu_flavor["storage-gb"])
-            storage_descriptors.append(storage_descriptor)
-        if vdu_flavor.get("vcpu-count"):
-            compute_descriptor["virtual-cpu"] = {"num-virtual-cpu": int(vdu_flavor["vcpu-count"])}
-        if vdu_flavor.get("memory-mb"):
-            compute_descriptor["virtual-memory"] = {"size": float(vdu_flavor["memory-mb"]) / 1024.0}
-        if len(compute_descriptor) > 1:
-            compute_descriptors.append(compute_descriptor)
-    if len(storage_descriptors) > 0:
-        sol006_vnfd["virtual-storage-desc"] = storage_descriptors
-    if len(compute_descriptors) > 0:
-        sol006_vnfd["virtual-compute-desc"] = compute_descriptors
-
-
-def _add_im_vdu_guest_epa_to_sol006_vnfd(im_vnfd, sol006_vnfd):
-    for vdu in im_vnfd.get("vdu", ()):
-        vdu_guest_epa = vdu.get("guest-epa")
-        if not vdu_guest_epa:
-            continue
+def _walk_im_vdus_to_sol006_vnfd(im_vnfd, sol006_vnfd):
+    walk = VduTranslationWalk(im_vnfd, sol006_vnfd)
+    _walk_vdus(walk, im_vnfd.get("vdu", ()), _IM_VDU_TRANSLATION_HANDLERS, _IM_VDU_TRANSLATION_FINISHERS)
+
 
-        _add_im_vdu_guest_epa_memory_and_cpu_to_sol006_vnfd(vdu, sol006_vnfd)
-        _add_im_vdu_guest_epa_disk_io_to_sol006_vnfd(vdu, sol006_vnfd)
+def _translate_im_vdu_flavor(walk, im_vdu, sol006_vdu):
+    vdu_id = im_vdu.get("id")
+    vdu_flavor = im_vdu.get("vm-flavor")
+    walk.compute_descriptor = None
+    walk.storage_descriptor = None
+    if not vdu_flavor:
+        return
+    storage_descriptor = {"id": "{}-storage".format(vdu_id)}
+    compute_descriptor = {"id": "{}-compute".format(vdu_id)}
+    if vdu_flavor.get("storage-gb"):
+        storage_descriptor["size-of-storage"] = int(vdu_flavor["storage-gb"])
+        walk.flavor_storage_descriptors.append(storage_descriptor)
+        walk.storage_descriptor = storage_descriptor
+    if vdu_flavor.get("vcpu-count"):
+        compute_descriptor["virtual-cpu"] = {"num-virtual-cpu": int(vdu_flavor["vcpu-count"])}
+    if vdu_flavor.get("memory-mb"):
+        compute_descriptor["virtual-memory"] = {"size": float(vdu_flavor["memory-mb"]) / 1024.0}
+    if len(compute_descriptor) > 1:
+        walk.flavor_compute_descriptors.append(compute_descriptor)
+        walk.compute_descriptor = compute_descriptor
+
+
+def _finish_im_vdu_flavors(walk):
+    if walk.flavor_storage_descriptors:
+        walk.sol006_vnfd["virtual-storage-desc"] = walk.flavor_storage_descriptors
+    if walk.flavor_compute_descriptors:
+        walk.sol006_vnfd["virtual-compute-desc"] = walk.flavor_compute_descriptors
+    if walk.epa_compute_descriptors:
+        walk.sol006_vnfd.setdefault("virtual-compute-desc", []).extend(walk.epa_compute_descriptors)
+    if walk.epa_storage_descriptors:
+        walk.sol006_vnfd.setdefault("virtual-storage-desc", []).extend(walk.epa_storage_descriptors)
+
+
+def _translate_im_vdu_guest_epa(walk, im_vdu, sol006_vdu):
+    vdu_guest_epa = im_vdu.get("guest-epa")
+    if not vdu_guest_epa:
+        return
+    _add_im_vdu_guest_epa_memory_and_cpu_to_sol006_vnfd(walk, im_vdu)
+    _add_im_vdu_guest_epa_disk_io_to_sol006_vnfd(walk, im_vdu)
 
 
-def _add_im_vdu_guest_epa_memory_and_cpu_to_sol006_vnfd(im_vdu, sol006_vnfd):
+def _add_im_vdu_guest_epa_memory_and_cpu_to_sol006_vnfd(walk, im_vdu):
     vdu_guest_epa = im_vdu.get("guest-epa")
     virtual_memory = _get_virtual_memory_from_im_vdu_guest_epa(vdu_guest_epa)
     virtual_cpu = _get_virtual_cpu_from_im_vdu_guest_epa(vdu_guest_epa)
-    # Find this vdu compute descriptor and update it with the EPA options. If the
-    # vdu compute descriptor does not exist, create one with the EPA options only.
-    compute_descriptor_id = "{}-compute".format(im_vdu["id"])
-    compute_descriptor = {"id": compute_descriptor_id}
-    compute_descriptor_found = False
-    for vcd in sol006_vnfd.get("virtual-compute-desc", ()):
-        if vcd.get("id") == compute_descriptor_id:
-            compute_descriptor = vcd
-            compute_descriptor_found = True
+    # Update this vdu compute descriptor with the EPA options. If the vdu
+    # compute descriptor does not exist, create one with the EPA options only.
+    compute_descriptor = walk.compute_descriptor
+    if compute_descriptor is None:
+        compute_descriptor = {"id": "{}-compute".format(im_vdu["id"])}
+        walk.epa_compute_descriptors.append(compute_descriptor)
+        walk.compute_descriptor = compute_descriptor
 
     compute_descriptor_virtual_memory = compute_descriptor.get("virtual-memory", {})
     compute_descriptor_virtual_cpu = compute_descriptor.get("virtual-cpu", {})
@@ -176,34 +408,21 @@ def _add_im_vdu_guest_epa_memory_and_cpu_to_sol006_vnfd(im_vdu, sol006_vnfd):
     if compute_descriptor_virtual_cpu:
         compute_descriptor["virtual-cpu"] = compute_descriptor_virtual_cpu
 
-    if not compute_descriptor_found:
-        if sol006_vnfd.get("virtual-compute-desc"):
-            sol006_vnfd["virtual-compute-desc"].append(compute_descriptor)
-        else:
-            sol006_vnfd["virtual-compute-desc"] = [compute_descriptor]
-
 
-def _add_im_vdu_guest_epa_disk_io_to_sol006_vnfd(im_vdu, sol006_vnfd):
+def _add_im_vdu_guest_epa_disk_io_to_sol006_vnfd(walk, im_vdu):
     vdu_guest_epa = im_vdu.get("guest-epa")
     disk_io_quota = vdu_guest_epa.get("disk-io-quota", {})
     if not disk_io_quota:
         return
-    # Find this vdu storage descriptor and update it with the EPA options. If the
-    # vdu storage descriptor does not exist, create one with the EPA options only.
-    storage_descriptor_id = "{}-storage".format(im_vdu["id"])
-    storage_descriptor = {"id": storage_descriptor_id}
-    storage_descriptor_found = False
-    for vsd in sol006_vnfd.get("virtual-storage-desc", ()):
-        if vsd.get("id") == storage_descriptor_id:
-            storage_descriptor = vsd
-            storage_descriptor_found = True
+    # Update this vdu storage descriptor with the EPA options. If the vdu
+    # storage descriptor does not exist, create one with the EPA options only.
+    storage_descriptor = walk.storage_descriptor
+    if storage_descriptor is None:
+        storage_descriptor = {"id": "{}-storage".format(im_vdu["id"])}
+        walk.epa_storage_descriptors.append(storage_descriptor)
+        walk.storage_descriptor = storage_descriptor
 
     storage_descriptor["disk-io-quota"] = disk_io_quota
-    if not storage_descriptor_found:
-        if sol006_vnfd.get("virtual-storage-desc"):
-            sol006_vnfd["virtual-storage-desc"].append(storage_descriptor)
-        else:
-            sol006_vnfd["virtual-storage-desc"] = [storage_descriptor]
 
 
 def _get_virtual_memory_from_im_vdu_guest_epa(im_vdu_guest_epa):
@@ -234,76 +453,71 @@ def _get_virtual_cpu_from_im_vdu_guest_epa(im_vdu_guest_epa):
     return virtual_cpu
 
 
-def _add_im_vdu_images_to_sol006_vnfd(im_vnfd, sol006_vnfd):
-    image_descriptors = []
-    all_images = set()  # To avoid duplicated images
-    for vdu in im_vnfd.get("vdu", ()):
-        vdu_image = vdu.get("image")
-        if vdu_image and vdu_image not in all_images:
-            image_descriptors.append({"id": vdu_image, "name": vdu_image, "image": vdu_image})
-            all_images.add(vdu_image)
-        for alternative_image in vdu.get("alternative-images", ()):
-            alt_image = alternative_image.get("image")
-            alt_image_descriptor = {"id": alt_image, "name": alt_image, "image": alt_image}
-            if alternative_image.get("vim-type"):
-                alt_image_descriptor["vim-type"] = alternative_image["vim-type"]
-            if alt_image not in all_images:
-                image_descriptors.append(alt_image_descriptor)
-                all_images.add(alt_image)
-
-    if len(image_descriptors) > 0:
-        sol006_vnfd["sw-image-desc"] = image_descriptors
-
-
-def _add_im_vdus_to_sol006_vnfd(im_vnfd, sol006_vnfd):
-    vdus = []
-    ext_cpds = []
-    vdu_configurations = []
-    df_instantiation_level = {"id": "default-instantiation-level", "vdu-level": []}
-    df = {"id": "default-df", "vdu-profile": [], "instantiation-level": [df_instantiation_level]}
-    for vdu in im_vnfd.get("vdu", ()):
-        vdu_descriptor = {"id": vdu["id"]}
-        if vdu.get("description"):
-            vdu_descriptor["description"] = vdu["description"]
-        if vdu.get("name"):
-            vdu_descriptor["name"] = vdu["name"]
-        if vdu.get("cloud-init-file"):
-            vdu_descriptor["cloud-init-file"] = vdu["cloud-init-file"]
-        if vdu.get("cloud-init"):
-            vdu_descriptor["cloud-init"] = vdu["cloud-init"]
-        if vdu.get("supplemental-boot-data"):
-            vdu_descriptor["supplemental-boot-data"] = vdu["supplemental-boot-data"]
-        if vdu.get("alarm"):
-            vdu_descriptor["alarm"] = vdu["alarm"]
-        if vdu.get("pdu-type"):
-            vdu_descriptor["pdu-type"] = vdu["pdu-type"]
-
-        _add_im_vdu_images_to_sol006_vdu(vdu, vdu_descriptor)
-        _add_im_vdu_flavor_to_sol006_vdu(vdu, vdu_descriptor)
-
-        vdu_int_cpds, vdu_ext_cpds = _get_int_and_ext_cpds_from_im_vdu(vdu, im_vnfd)
-        vdu_descriptor["int-cpd"] = vdu_int_cpds
-        ext_cpds.extend(vdu_ext_cpds)
-
-        vdu_profile = _get_vdu_profile_from_im_vdu(vdu, im_vnfd)
-        vdu_level = _get_instantiation_level_vdu_level_from_im_vdu(vdu)
-        if vdu.get("vdu-configuration"):
-            vdu_configuration = vdu["vdu-configuration"]
-            vdu_configuration["id"] = vdu["id"]
-            vdu_configurations.append(vdu_configuration)
-        df["vdu-profile"].append(vdu_profile)
-        df["instantiation-level"][0]["vdu-level"].append(vdu_level)
-
-        vdus.append(vdu_descriptor)
-
-    if len(vdus) > 0:
-        sol006_vnfd["vdu"] = vdus
-        sol006_vnfd["df"] = [df]
-    if len(ext_cpds) > 0:
-        sol006_vnfd["ext-cpd"] = ext_cpds
-    if len(vdu_configurations) > 0:
+def _translate_im_vdu_images(walk, im_vdu, sol006_vdu):
+    vdu_image = im_vdu.get("image")
+    if vdu_image and vdu_image not in walk.images:
+        walk.image_descriptors.append({"id": vdu_image, "name": vdu_image, "image": vdu_image})
+        walk.images.add(vdu_image)
+    for alternative_image in im_vdu.get("alternative-images", ()):
+        alt_image = alternative_image.get("image")
+        alt_image_descriptor = {"id": alt_image, "name": alt_image, "image": alt_image}
+        if alternative_image.get("vim-type"):
+            alt_image_descriptor["vim-type"] = alternative_image["vim-type"]
+        if alt_image not in walk.images:
+            walk.image_descriptors.append(alt_image_descriptor)
+            walk.images.add(alt_image)
+
+
+def _finish_im_vdu_images(walk):
+    if len(walk.image_descriptors) > 0:
+        walk.sol006_vnfd["sw-image-desc"] = walk.image_descriptors
+
+
+def _translate_im_vdu(walk, im_vdu, sol006_vdu):
+    if im_vdu.get("description"):
+        sol006_vdu["description"] = im_vdu["description"]
+    if im_vdu.get("name"):
+        sol006_vdu["name"] = im_vdu["name"]
+    if im_vdu.get("cloud-init-file"):
+        sol006_vdu["cloud-init-file"] = im_vdu["cloud-init-file"]
+    if im_vdu.get("cloud-init"):
+        sol006_vdu["cloud-init"] = im_vdu["cloud-init"]
+    if im_vdu.get("supplemental-boot-data"):
+        sol006_vdu["supplemental-boot-data"] = im_vdu["supplemental-boot-data"]
+    if im_vdu.get("alarm"):
+        sol006_vdu["alarm"] = im_vdu["alarm"]
+    if im_vdu.get("pdu-type"):
+        sol006_vdu["pdu-type"] = im_vdu["pdu-type"]
+
+    _add_im_vdu_images_to_sol006_vdu(im_vdu, sol006_vdu)
+    _add_im_vdu_flavor_to_sol006_vdu(im_vdu, sol006_vdu)
+
+    vdu_int_cpds, vdu_ext_cpds = _get_int_and_ext_cpds_from_im_vdu(im_vdu, walk.cps_by_name)
+    sol006_vdu["int-cpd"] = vdu_int_cpds
+    walk.ext_cpds.extend(vdu_ext_cpds)
+    for int_cpd in vdu_int_cpds:
+        walk.sol006_int_cpds.setdefault((im_vdu["id"], int_cpd["id"]), []).append(int_cpd)
+    walk.sol006_vdus_by_id.setdefault(im_vdu["id"], []).append(sol006_vdu)
+
+    vdu_profile = _get_vdu_profile_from_im_vdu(im_vdu, walk.scaling_group_descriptors_by_vdu_id)
+    vdu_level = _get_instantiation_level_vdu_level_from_im_vdu(im_vdu)
+    if im_vdu.get("vdu-configuration"):
+        walk.vdu_configurations.append(dict(im_vdu["vdu-configuration"], id=im_vdu["id"]))
+    walk.df["vdu-profile"].append(vdu_profile)
+    walk.df["instantiation-level"][0]["vdu-level"].append(vdu_level)
+
+
+def _finish_im_vdus(walk):
+    sol006_vnfd = walk.sol006_vnfd
+    if len(walk.vdus) > 0:
+        sol006_vnfd["vdu"] = walk.vdus
+        sol006_vnfd["df"] = [walk.df]
+    if len(walk.ext_cpds) > 0:
+        sol006_vnfd["ext-cpd"] = walk.ext_cpds
+    if len(walk.vdu_configurations) > 0:
         _prepare_dict_entries_for_configurations(sol006_vnfd)
-        sol006_vnfd["df"][0]["lcm-operations-configuration"]["operate-vnf-op-config"]["day1-2"].extend(vdu_configurations)
+        sol006_vnfd["df"][0]["lcm-operations-configuration"]["operate-vnf-op-config"]["day1-2"].extend(
+            walk.vdu_configurations)
 
 
 def _add_im_vdu_images_to_sol006_vdu(im_vdu, sol006_vdu):
@@ -325,7 +539,7 @@ def _add_im_vdu_flavor_to_sol006_vdu(im_vdu, sol006_vdu):
             sol006_vdu["virtual-storage-desc"] = ["{}-storage".format(im_vdu["id"])]
 
 
-def _get_int_and_ext_cpds_from_im_vdu(im_vdu, im_vnfd):
+def _get_int_and_ext_cpds_from_im_vdu(im_vdu, cps_by_name):
     int_cpds = []
     ext_cpds = []
     for interface in im_vdu.get("interface", ()):
@@ -344,9 +558,8 @@ def _get_int_and_ext_cpds_from_im_vdu(im_vdu, im_vnfd):
                     "cpd": int_cpd["id"]
                 }
             }
-            for cp in im_vnfd.get("connection-point", ()):
-                if cp.get("name", "") != interface["external-connection-point-ref"]:
-                    continue
+            cp = cps_by_name.get(interface["external-connection-point-ref"])
+            if cp is not None:
                 if "port-security-enabled" in cp:
                     ext_cpd["port-security-enabled"] = cp["port-security-enabled"]
                 if cp.get("port-security-disable-strategy"):
@@ -358,17 +571,25 @@ def _get_int_and_ext_cpds_from_im_vdu(im_vdu, im_vnfd):
     return int_cpds, ext_cpds
 
 
-def _get_vdu_profile_from_im_vdu(im_vdu, im_vnfd):
+def _get_im_scaling_group_descriptors_by_vdu_id(im_vnfd):
+    # When several scaling groups refer to the same vdu, the last one is used
+    scaling_group_descriptors_by_vdu_id = {}
+    for scaling_group_descriptor in im_vnfd.get("scaling-group-descriptor", ()):
+        for sgd_vdu in scaling_group_descriptor.get("vdu", []):
+            scaling_group_descriptors_by_vdu_id[sgd_vdu.get("vdu-id-ref")] = scaling_group_descriptor
+    return scaling_group_descriptors_by_vdu_id
+
+
+def _get_vdu_profile_from_im_vdu(im_vdu, scaling_group_descriptors_by_vdu_id):
     vdu_profile = {"id": im_vdu["id"]}
     initial_instances = int(im_vdu.get("count", 1))
     vdu_profile["min-number-of-instances"] = initial_instances
-    for scaling_group_descriptor in im_vnfd.get("scaling-group-descriptor", ()):
-        for sgd_vdu in scaling_group_descriptor.get("vdu", []):
-            if sgd_vdu.get("vdu-id-ref") == im_vdu["id"]:
-                sgd_max_instances = int(scaling_group_descriptor.get("max-instance-count", 1))
-                sgd_min_instances = int(scaling_group_descriptor.get("min-instance-count", 0))
-                vdu_profile["min-number-of-instances"] = sgd_min_instances + initial_instances
-                vdu_profile["max-number-of-instances"] = sgd_max_instances + initial_instances
+    scaling_group_descriptor = scaling_group_descriptors_by_vdu_id.get(im_vdu["id"])
+    if scaling_group_descriptor is not None:
+        sgd_max_instances = int(scaling_group_descriptor.get("max-instance-count", 1))
+        sgd_min_instances = int(scaling_group_descriptor.get("min-instance-count", 0))
+        vdu_profile["min-number-of-instances"] = sgd_min_instances + initial_instances
+        vdu_profile["max-number-of-instances"] = sgd_max_instances + initial_instances
     return vdu_profile
 
 
@@ -378,38 +599,35 @@ def _get_instantiation_level_vdu_level_from_im_vdu(im_vdu):
     return vdu_level
 
 
-def _add_im_internal_vlds_to_sol006_vfnd(im_vnfd, sol006_vnfd):
+def _translate_im_vdu_internal_cp_refs(walk, im_vdu, sol006_vdu):
+    for interface in im_vdu.get("interface", ()):
+        int_cp_ref = interface.get("internal-connection-point-ref")
+        if not int_cp_ref:
+            continue
+        walk.int_cp_refs_interfaces[int_cp_ref] = (im_vdu["id"], interface["name"])
+
+
+def _finish_im_internal_vlds(walk):
     int_virtual_link_descs = []
-    for ivld in im_vnfd.get("internal-vld", ()):
+    for ivld in walk.im_vnfd.get("internal-vld", ()):
         int_virtual_link_desc = {"id": ivld["id"]}
-        _add_im_internal_vld_connection_point_refs_to_sol006_vnfd(ivld, im_vnfd, sol006_vnfd)
+        _add_im_internal_vld_connection_point_refs_to_sol006_vnfd(ivld, walk.int_cp_refs_interfaces,
+                                                                  walk.sol006_int_cpds)
 
         int_virtual_link_descs.append(int_virtual_link_desc)
 
     if len(int_virtual_link_descs) > 0:
-        sol006_vnfd["int-virtual-link-desc"] = int_virtual_link_descs
-
+        walk.sol006_vnfd["int-virtual-link-desc"] = int_virtual_link_descs
 
-def _add_im_internal_vld_connection_point_refs_to_sol006_vnfd(ivld, im_vnfd, sol006_vnfd):
-    all_int_cp_refs_interfaces = {}
-    for vdu in im_vnfd.get("vdu", ()):
-        for interface in vdu.get("interface", ()):
-            int_cp_ref = interface.get("internal-connection-point-ref")
-            if not int_cp_ref:
-                continue
-            all_int_cp_refs_interfaces[int_cp_ref] = (vdu["id"], interface["name"])
 
+def _add_im_internal_vld_connection_point_refs_to_sol006_vnfd(ivld, all_int_cp_refs_interfaces, sol006_int_cpds):
     for int_cp in ivld.get("internal-connection-point", ()):
         int_cp_ref = int_cp["id-ref"]
         (vdu_id, interface_name) = all_int_cp_refs_interfaces[int_cp_ref]
         sol006_int_cpd_id = "{}-int".format(interface_name)
         # Search for this int_cp on sol006_vnfd and update it
-        for vdu in sol006_vnfd.get("vdu", ()):
-            if vdu["id"] != vdu_id:
-                continue
-            for int_cpd in vdu.get("int-cpd", ()):
-                if int_cpd["id"] == sol006_int_cpd_id:
-                    int_cpd["int-virtual-link-desc"] = ivld["id"]
+        for int_cpd in sol006_int_cpds.get((vdu_id, sol006_int_cpd_id), ()):
+            int_cpd["int-virtual-link-desc"] = ivld["id"]
 
 def _prepare_dict_entries_for_configurations(sol006_vnfd):
     sol006_vnfd["df"] = sol006_vnfd.get("df", [{}])
@@ -426,26 +644,22 @@ def _cleanup_juju_in_configurations(sol006_vnfd):
         for day12_config in configs["operate-vnf-op-config"]["day1-2"]:
             if "juju" in day12_config:
                 ee_name = _create_execution_environment_for_juju(day12_config, day12_config["juju"]["charm"])
-                for primitive in day12_config.get("config-primitive", []):
-                    primitive["execution-environment-ref"] = ee_name
-                for primitive in day12_config.get("initial-config-primitive", []):
-                    primitive["execution-environment-ref"] = ee_name
-                for primitive in day12_config.get("terminate-config-primitive", []):
-                    primitive["execution-environment-ref"] = ee_name
+                # Primitives are shared with the IM descriptor, they are replaced instead of updated
+                for primitives in ("config-primitive", "initial-config-primitive", "terminate-config-primitive"):
+                    if primitives in day12_config:
+                        day12_config[primitives] = [dict(primitive, **{"execution-environment-ref": ee_name})
+                                                    for primitive in day12_config[primitives]]
                 day12_config.pop("juju", None)
 
 def _create_execution_environment_for_juju(day12_config, charm_name):
-    if not "execution-environment-list" in day12_config:
-        day12_config["execution-environment-list"] = []
-
-    day12_config["execution-environment-list"].append(
+    day12_config["execution-environment-list"] = list(day12_config.get("execution-environment-list", ())) + [
         {
             "id": charm_name + "-ee",
             "juju": {
                 "charm": charm_name
             }
         }
-    )
+    ]
 
     return charm_name + "-ee"
 
@@ -453,9 +667,9 @@ def _add_im_vnf_configuration_to_sol006_vnfd(im_vnfd, sol006_vnfd):
     vnf_configuration = im_vnfd.get("vnf-configuration")
     if not vnf_configuration:
         return
-    vnf_configuration["id"] = im_vnfd.get("id")
     _prepare_dict_entries_for_configurations(sol006_vnfd)
-    sol006_vnfd["df"][0]["lcm-operations-configuration"]["operate-vnf-op-config"]["day1-2"].append(vnf_configuration)
+    sol006_vnfd["df"][0]["lcm-operations-configuration"]["operate-vnf-op-config"]["day1-2"].append(
+        dict(vnf_configuration, id=im_vnfd.get("id")))
 
 
 def _add_im_ip_profiles_to_sol006_vnfd(im_vnfd, sol006_vnfd):
@@ -491,28 +705,26 @@ def _add_im_ip_profiles_to_sol006_vnfd(im_vnfd, sol006_vnfd):
         sol006_vnfd["df"][0]["virtual-link-profile"] = virtual_link_profiles
 
 
-def _add_im_vdu_monitoring_params_to_sol006_vnfd(im_vnfd, sol006_vnfd):
-    all_vdu_monitoring_param_metrics = {}
-    for vdu in im_vnfd.get("vdu", ()):
-        for monitoring_param in vdu.get("monitoring-param", ()):
-            monitoring_param_metric = monitoring_param.get("nfvi-metric")
-            if monitoring_param_metric:
-                all_vdu_monitoring_param_metrics[(vdu["id"], monitoring_param["id"])] = monitoring_param_metric
+def _translate_im_vdu_monitoring_params(walk, im_vdu, sol006_vdu):
+    for monitoring_param in im_vdu.get("monitoring-param", ()):
+        monitoring_param_metric = monitoring_param.get("nfvi-metric")
+        if monitoring_param_metric:
+            walk.vdu_monitoring_param_metrics[(im_vdu["id"], monitoring_param["id"])] = monitoring_param_metric
+
 
-    for monitoring_param in im_vnfd.get("monitoring-param", ()):
+def _finish_im_vdu_monitoring_params(walk):
+    for monitoring_param in walk.im_vnfd.get("monitoring-param", ()):
         sol006_mp = {"id": monitoring_param["id"]}
         if monitoring_param.get("name"):
             sol006_mp["name"] = monitoring_param["name"]
         if monitoring_param.get("vdu-monitoring-param"):
             monitoring_param_vdu_id = monitoring_param["vdu-monitoring-param"].get("vdu-ref")
             monitoring_param_id = monitoring_param["vdu-monitoring-param"].get("vdu-monitoring-param-ref")
-            metric = all_vdu_monitoring_param_metrics.get((monitoring_param_vdu_id, monitoring_param_id))
+            metric = walk.vdu_monitoring_param_metrics.get((monitoring_param_vdu_id, monitoring_param_id))
             if metric:
                 sol006_mp["performance-metric"] = metric
-            # Find that vdu inside sol006_vnfd and update its monitoring-parameter list
-            for vdu in sol006_vnfd.get("vdu", ()):
-                if vdu["id"] != monitoring_param_vdu_id:
-                    continue
+            # Add it to the monitoring-parameter list of that vdu
+            for vdu in walk.sol006_vdus_by_id.get(monitoring_param_vdu_id, ()):
                 if vdu.get("monitoring-parameter"):
                     vdu["monitoring-parameter"].append(sol006_mp)
                 else:
@@ -551,13 +763,13 @@ def _add_im_scaling_group_descriptors_to_sol006_vnfd(im_vnfd, sol006_vnfd):
 
 def _add_im_kdus_to_sol006_vnfd(im_vnfd, sol006_vnfd):
     if im_vnfd.get("kdu"):
-        sol006_vnfd["kdu"] = im_vnfd["kdu"]
+        kdus = []
         kdu_configs = []
-        for a_kdu in sol006_vnfd["kdu"]:
+        for a_kdu in im_vnfd["kdu"]:
+            kdus.append({key: value for key, value in a_kdu.items() if key != "kdu-configuration"})
             if "kdu-configuration" in a_kdu:
-                kdu_config = a_kdu.pop("kdu-configuration")
-                kdu_config["id"] = a_kdu["name"]
-                kdu_configs.append(kdu_config)
+                kdu_configs.append(dict(a_kdu["kdu-configuration"], id=a_kdu["name"]))
+        sol006_vnfd["kdu"] = kdus
         if len(sol006_vnfd.get("df", ())) == 0:
             sol006_vnfd["df"] = [{"id": "default-df"}]
         if len(kdu_configs) > 0:
@@ -599,6 +811,45 @@ def _add_im_placement_groups_to_sol006_vnfd(im_vnfd, sol006_vnfd):
         sol006_vnfd["placement-groups"] = im_vnfd["placement-groups"]
 
 
+def _cleanup_juju_in_sol006_vnfd(im_vnfd, sol006_vnfd):
+    _cleanup_juju_in_configurations(sol006_vnfd)
+
+
+# Stages of the VNFD translation, in execution order. Every stage is called with the IM VNFD
+# (without its envelope) and the SOL006 VNFD being built
+_IM_VNFD_TRANSLATION_STAGES = (
+    _add_im_vnfd_basic_data_to_sol006_vnfd,
+    _add_im_vnfd_mgmt_interface_cp_to_sol006_vnfd,
+    _walk_im_vdus_to_sol006_vnfd,
+    _add_im_vnf_configuration_to_sol006_vnfd,
+    _add_im_ip_profiles_to_sol006_vnfd,
+    _add_im_scaling_group_descriptors_to_sol006_vnfd,
+    _add_im_kdus_to_sol006_vnfd,
+    _add_im_k8s_clusters_to_sol006_vnfd,
+    _add_im_placement_groups_to_sol006_vnfd,
+    _cleanup_juju_in_sol006_vnfd,
+)
+
+# Per VDU handlers of the VNFD translation, called in order for every VDU in a single traversal,
+# and the functions called once all the VDUs were visited. Extended with register_im_vdu_translation_handler
+_BUILT_IN_IM_VDU_TRANSLATION_HANDLERS = (
+    _translate_im_vdu_flavor,
+    _translate_im_vdu_guest_epa,
+    _translate_im_vdu_images,
+    _translate_im_vdu,
+    _translate_im_vdu_internal_cp_refs,
+    _translate_im_vdu_monitoring_params,
+)
+_IM_VDU_TRANSLATION_HANDLERS = list(_BUILT_IN_IM_VDU_TRANSLATION_HANDLERS)
+_IM_VDU_TRANSLATION_FINISHERS = [
+    _finish_im_vdu_flavors,
+    _finish_im_vdu_images,
+    _finish_im_vdus,
+    _finish_im_internal_vlds,
+    _finish_im_vdu_monitoring_params,
+]
+
+
 # ******************** NSD translation private functions ********************
 
 def _remove_im_nsd_envelope(im_nsd):
@@ -619,59 +870,48 @@ def _add_im_nsd_basic_data_to_sol006_nsd(im_nsd, sol006_nsd):
 
 
 def _add_im_constituent_vnfds_to_sol006_nsd(im_nsd, sol006_nsd):
-    vnfd_ids = set()
+    vnfd_ids = {}  # Keeps the first occurrence order, a set would make the output order change between runs
     for constituent_vnfd in im_nsd.get("constituent-vnfd", ()):
         if constituent_vnfd.get("vnfd-id-ref"):
-            vnfd_ids.add(constituent_vnfd["vnfd-id-ref"])
+            vnfd_ids[constituent_vnfd["vnfd-id-ref"]] = None
 
     if len(vnfd_ids) > 0:
         sol006_nsd["vnfd-id"] = list(vnfd_ids)
 
 
 def _add_im_vlds_to_sol006_nsd(im_nsd, sol006_nsd):
-    vlds = im_nsd.get("vld", [])
-    flattened_vlds = [{**vld, **cp_ref} for vld in vlds for cp_ref in vld.get("vnfd-connection-point-ref", ())]
-    all_vlds_by_member_vnf_index = {}
-    for vld in flattened_vlds:
-        member_vnf_index = str(vld.get("member-vnf-index-ref", ""))
-        if member_vnf_index in all_vlds_by_member_vnf_index:
-            all_vlds_by_member_vnf_index[member_vnf_index].append(vld)
-        else:
-            all_vlds_by_member_vnf_index[member_vnf_index] = [vld]
-
-    df = {"id": "default-df", "vnf-profile": []}
-
-    for member_vnf_index in all_vlds_by_member_vnf_index:
-        vnf_profile = {"id": member_vnf_index}
-        vnf_profile["vnfd-id"] = all_vlds_by_member_vnf_index.get(member_vnf_index, [{}])[0].get("vnfd-id-ref")
-        vnf_profile["virtual-link-connectivity"] = []
-        for vld in all_vlds_by_member_vnf_index[member_vnf_index]:
-            virtual_link_connectivity = {"virtual-link-profile-id": vld["id"]}
-            virtual_link_connectivity["constituent-cpd-id"] = [{
-                "constituent-base-element-id": member_vnf_index,
-                "constituent-cpd-id": "{}-ext".format(vld.get("vnfd-connection-point-ref"))
-            }]
-            if vld.get("ip-address"):
-                virtual_link_connectivity["constituent-cpd-id"][0]["ip-address"] = vld["ip-address"]
-            vnf_profile["virtual-link-connectivity"].append(virtual_link_connectivity)
-
-        vlcs_by_virtual_link_profile = {}
-        for vlc in vnf_profile.get("virtual-link-connectivity"):
-            vl_profile_id = vlc.get("virtual-link-profile-id")
-            if vl_profile_id in vlcs_by_virtual_link_profile:
-                vlc_constituent_cpds = vlcs_by_virtual_link_profile[vl_profile_id].get("constituent-cpd-id")
-                vlc_constituent_cpds.extend(vlc.get("constituent-cpd-id"))
-            else:
-                vlcs_by_virtual_link_profile[vl_profile_id] = vlc
-
-        vnf_profile["virtual-link-connectivity"] = list(vlcs_by_virtual_link_profile.values())
-
-        df["vnf-profile"].append(vnf_profile)
-
-    sol006_nsd["df"] = [df]
-
+    # vnf profiles by member-vnf-index, each with its virtual link connectivities by virtual link profile id
+    vnf_profiles = {}
     virtual_link_descs = []
     for vld in im_nsd.get("vld", ()):
+        # Connection point refs inherit the values of their vld
+        vld_member_vnf_index = vld.get("member-vnf-index-ref", "")
+        vld_vnfd_id = vld.get("vnfd-id-ref")
+        vld_cp = vld.get("vnfd-connection-point-ref")
+        vld_ip_address = vld.get("ip-address")
+        for cp_ref in vld.get("vnfd-connection-point-ref", ()):
+            member_vnf_index = str(cp_ref.get("member-vnf-index-ref", vld_member_vnf_index))
+            if member_vnf_index not in vnf_profiles:
+                vnf_profile = {"id": member_vnf_index}
+                vnf_profile["vnfd-id"] = cp_ref.get("vnfd-id-ref", vld_vnfd_id)
+                vnf_profile["virtual-link-connectivity"] = []
+                vnf_profiles[member_vnf_index] = (vnf_profile, {})
+            vnf_profile, vlcs_by_virtual_link_profile = vnf_profiles[member_vnf_index]
+
+            constituent_cpd = {
+                "constituent-base-element-id": member_vnf_index,
+                "constituent-cpd-id": "{}-ext".format(cp_ref.get("vnfd-connection-point-ref", vld_cp))
+            }
+            ip_address = cp_ref.get("ip-address", vld_ip_address)
+            if ip_address:
+                constituent_cpd["ip-address"] = ip_address
+            virtual_link_connectivity = vlcs_by_virtual_link_profile.get(vld["id"])
+            if virtual_link_connectivity is None:
+                virtual_link_connectivity = {"virtual-link-profile-id": vld["id"], "constituent-cpd-id": []}
+                vlcs_by_virtual_link_profile[vld["id"]] = virtual_link_connectivity
+                vnf_profile["virtual-link-connectivity"].append(virtual_link_connectivity)
+            virtual_link_connectivity["constituent-cpd-id"].append(constituent_cpd)
+
         virtual_link_desc = {"id": vld["id"]}
         if vld.get("mgmt-network"):
             virtual_link_desc["mgmt-network"] = vld["mgmt-network"]
@@ -679,5 +919,462 @@ def _add_im_vlds_to_sol006_nsd(im_nsd, sol006_nsd):
             virtual_link_desc["vim-network-name"] = vld["vim-network-name"]
         virtual_link_descs.append(virtual_link_desc)
 
+    sol006_nsd["df"] = [{"id": "default-df", "vnf-profile": [vnf_profile for vnf_profile, _ in vnf_profiles.values()]}]
+
     if len(virtual_link_descs) > 0:
         sol006_nsd["virtual-link-desc"] = virtual_link_descs
+
+
+# Stages of the NSD translation, in execution order
+_IM_NSD_TRANSLATION_STAGES = (
+    _add_im_nsd_basic_data_to_sol006_nsd,
+    _add_im_constituent_vnfds_to_sol006_nsd,
+    _add_im_vlds_to_sol006_nsd,
+)
+
+
+# ******************** SOL006 to IM VNFD translation private functions ********************
+
+class _Sol006VduTranslationWalk:
+    # State of the single traversal of the VDUs of a SOL006 VNFD, with the indexes used by the VDU handlers
+
+    def __init__(self, sol006_vnfd, im_vnfd):
+        self.sol006_vnfd = sol006_vnfd
+        self.im_vnfd = im_vnfd
+        self.vdus = []
+        self.df = _get_sol006_vnfd_default_df(sol006_vnfd)
+        self.compute_descriptors_by_id = {vcd.get("id"): vcd for vcd in sol006_vnfd.get("virtual-compute-desc", ())}
+        self.storage_descriptors_by_id = {vsd.get("id"): vsd for vsd in sol006_vnfd.get("virtual-storage-desc", ())}
+        self.image_descriptors_by_id = {swid.get("id"): swid for swid in sol006_vnfd.get("sw-image-desc", ())}
+        self.ext_cpds_by_int_cpd = {}
+        for ext_cpd in sol006_vnfd.get("ext-cpd", ()):
+            if ext_cpd.get("int-cpd"):
+                self.ext_cpds_by_int_cpd[(ext_cpd["int-cpd"].get("vdu-id"), ext_cpd["int-cpd"].get("cpd"))] = ext_cpd
+        self.configurations_by_id = _get_sol006_vnfd_configurations_by_id(sol006_vnfd)
+        self.vdu_counts_by_id = _get_sol006_vnfd_vdu_counts_by_id(sol006_vnfd)
+        self.int_cp_refs_by_ivld = {}
+        self.monitoring_params = []
+
+
+def _remove_sol006_vnfd_envelope(sol006_vnfd):
+    # Data is wrapped as { vnfd: <data> }
+    return list(sol006_vnfd.values())[0]
+
+
+def _remove_suffix(value, suffix):
+    if isinstance(value, str) and value.endswith(suffix):
+        return value[:-len(suffix)]
+    return value
+
+
+def _get_sol006_vnfd_default_df(sol006_vnfd):
+    return (sol006_vnfd.get("df") or [{}])[0]
+
+
+def _get_sol006_vnfd_configurations_by_id(sol006_vnfd):
+    configs = _get_sol006_vnfd_default_df(sol006_vnfd).get("lcm-operations-configuration") or {}
+    return {day12_config.get("id"): day12_config
+            for day12_config in (configs.get("operate-vnf-op-config") or {}).get("day1-2", ())}
+
+
+def _get_sol006_vnfd_vdu_counts_by_id(sol006_vnfd):
+    df = _get_sol006_vnfd_default_df(sol006_vnfd)
+    vdu_counts_by_id = {vdu_profile.get("id"): int(vdu_profile.get("min-number-of-instances", 1))
+                        for vdu_profile in df.get("vdu-profile", ())}
+    for instantiation_level in df.get("instantiation-level", ())[:1]:
+        for vdu_level in instantiation_level.get("vdu-level", ()):
+            vdu_counts_by_id[vdu_level.get("vdu-id")] = int(vdu_level.get("number-of-instances", 1))
+    return vdu_counts_by_id
+
+
+def _get_im_configuration_from_sol006_day12_config(day12_config):
+    # The execution environments are kept as they are, OSM-IM configurations support them too
+    return {key: value for key, value in day12_config.items() if key != "id"}
+
+
+def _add_sol006_vnfd_basic_data_to_im_vnfd(sol006_vnfd, im_vnfd):
+    im_vnfd["id"] = sol006_vnfd["id"]
+    if sol006_vnfd.get("product-name"):
+        im_vnfd["name"] = sol006_vnfd["product-name"]
+    if sol006_vnfd.get("description"):
+        im_vnfd["description"] = sol006_vnfd["description"]
+    if sol006_vnfd.get("provider"):
+        im_vnfd["vendor"] = sol006_vnfd["provider"]
+    if sol006_vnfd.get("version"):
+        im_vnfd["version"] = sol006_vnfd["version"]
+
+
+def _add_sol006_vnfd_mgmt_cp_to_im_vnfd(sol006_vnfd, im_vnfd):
+    if sol006_vnfd.get("mgmt-cp"):
+        im_vnfd["mgmt-interface"] = {"cp": _remove_suffix(sol006_vnfd["mgmt-cp"], "-ext")}
+
+
+def _add_sol006_ext_cpds_to_im_vnfd(sol006_vnfd, im_vnfd):
+    connection_points = []
+    for ext_cpd in sol006_vnfd.get("ext-cpd", ()):
+        connection_point = {"name": _remove_suffix(ext_cpd["id"], "-ext")}
+        if "port-security-enabled" in ext_cpd:
+            connection_point["port-security-enabled"] = ext_cpd["port-security-enabled"]
+        if ext_cpd.get("port-security-disable-strategy"):
+            connection_point["port-security-disable-strategy"] = ext_cpd["port-security-disable-strategy"]
+        connection_points.append(connection_point)
+    if len(connection_points) > 0:
+        im_vnfd["connection-point"] = connection_points
+
+
+def _walk_sol006_vdus_to_im_vnfd(sol006_vnfd, im_vnfd):
+    walk = _Sol006VduTranslationWalk(sol006_vnfd, im_vnfd)
+    _walk_vdus(walk, sol006_vnfd.get("vdu", ()), _SOL006_VDU_TRANSLATION_HANDLERS, _SOL006_VDU_TRANSLATION_FINISHERS)
+
+
+def _translate_sol006_vdu(walk, sol006_vdu, im_vdu):
+    for key in ("name", "description", "cloud-init-file", "cloud-init", "supplemental-boot-data", "alarm",
+                "pdu-type"):
+        if sol006_vdu.get(key):
+            im_vdu[key] = sol006_vdu[key]
+    im_vdu["count"] = walk.vdu_counts_by_id.get(sol006_vdu["id"], 1)
+    vdu_configuration = walk.configurations_by_id.get(sol006_vdu["id"])
+    if vdu_configuration is not None:
+        im_vdu["vdu-configuration"] = _get_im_configuration_from_sol006_day12_config(vdu_configuration)
+
+
+def _translate_sol006_vdu_flavor(walk, sol006_vdu, im_vdu):
+    vdu_flavor = {}
+    guest_epa = {}
+    # Descriptors not referenced by the VDU only have its guest EPA options
+    compute_descriptor = walk.compute_descriptors_by_id.get(
+        sol006_vdu.get("virtual-compute-desc") or "{}-compute".format(sol006_vdu["id"]), {})
+    if sol006_vdu.get("virtual-compute-desc"):
+        if compute_descriptor.get("virtual-cpu", {}).get("num-virtual-cpu"):
+            vdu_flavor["vcpu-count"] = int(compute_descriptor["virtual-cpu"]["num-virtual-cpu"])
+        if compute_descriptor.get("virtual-memory", {}).get("size"):
+            memory_mb = float(compute_descriptor["virtual-memory"]["size"]) * 1024.0
+            vdu_flavor["memory-mb"] = int(memory_mb) if memory_mb.is_integer() else memory_mb
+    storage_descriptor_ids = sol006_vdu.get("virtual-storage-desc") or ["{}-storage".format(sol006_vdu["id"])]
+    storage_descriptor = walk.storage_descriptors_by_id.get(storage_descriptor_ids[0], {})
+    if sol006_vdu.get("virtual-storage-desc") and storage_descriptor.get("size-of-storage"):
+        vdu_flavor["storage-gb"] = int(storage_descriptor["size-of-storage"])
+
+    virtual_memory = compute_descriptor.get("virtual-memory", {})
+    virtual_cpu = compute_descriptor.get("virtual-cpu", {})
+    if virtual_memory.get("mempage-size"):
+        guest_epa["mempage-size"] = virtual_memory["mempage-size"]
+    if virtual_memory.get("numa-node-policy"):
+        guest_epa["numa-node-policy"] = virtual_memory["numa-node-policy"]
+    if virtual_memory.get("mem-quota"):
+        guest_epa["mem-quota"] = virtual_memory["mem-quota"]
+    if virtual_cpu.get("pinning", {}).get("policy"):
+        guest_epa["cpu-pinning-policy"] = "SHARED" if virtual_cpu["pinning"]["policy"] == "dynamic" else "DEDICATED"
+    if virtual_cpu.get("pinning", {}).get("thread-policy"):
+        guest_epa["cpu-thread-pinning-policy"] = virtual_cpu["pinning"]["thread-policy"]
+    if virtual_cpu.get("cpu-quota"):
+        guest_epa["cpu-quota"] = virtual_cpu["cpu-quota"]
+    if storage_descriptor.get("disk-io-quota"):
+        guest_epa["disk-io-quota"] = storage_descriptor["disk-io-quota"]
+
+    if vdu_flavor:
+        im_vdu["vm-flavor"] = vdu_flavor
+    if guest_epa:
+        im_vdu["guest-epa"] = guest_epa
+
+
+def _translate_sol006_vdu_images(walk, sol006_vdu, im_vdu):
+    if sol006_vdu.get("sw-image-desc"):
+        image_descriptor = walk.image_descriptors_by_id.get(sol006_vdu["sw-image-desc"], {})
+        im_vdu["image"] = image_descriptor.get("image", sol006_vdu["sw-image-desc"])
+    alternative_images = []
+    for image_descriptor_id in sol006_vdu.get("alternative-sw-image-desc", ()):
+        image_descriptor = walk.image_descriptors_by_id.get(image_descriptor_id, {})
+        alternative_image = {"image": image_descriptor.get("image", image_descriptor_id)}
+        if image_descriptor.get("vim-type"):
+            alternative_image["vim-type"] = image_descriptor["vim-type"]
+        alternative_images.append(alternative_image)
+    if len(alternative_images) > 0:
+        im_vdu["alternative-images"] = alternative_images
+
+
+def _translate_sol006_vdu_int_cpds(walk, sol006_vdu, im_vdu):
+    interfaces = []
+    internal_connection_points = []
+    for int_cpd in sol006_vdu.get("int-cpd", ()):
+        requirement = (int_cpd.get("virtual-network-interface-requirement") or [{}])[0]
+        interface = {"name": requirement.get("name") or _remove_suffix(int_cpd["id"], "-int")}
+        ext_cpd = walk.ext_cpds_by_int_cpd.get((sol006_vdu["id"], int_cpd["id"]))
+        interface["type"] = "EXTERNAL" if ext_cpd is not None else "INTERNAL"
+        if requirement.get("virtual-interface"):
+            interface["virtual-interface"] = requirement["virtual-interface"]
+        if "position" in requirement:
+            interface["position"] = int(requirement["position"])
+        if ext_cpd is not None:
+            interface["external-connection-point-ref"] = _remove_suffix(ext_cpd["id"], "-ext")
+        if int_cpd.get("int-virtual-link-desc"):
+            internal_connection_point_id = "{}-{}".format(sol006_vdu["id"], interface["name"])
+            interface["internal-connection-point-ref"] = internal_connection_point_id
+            internal_connection_points.append({"id": internal_connection_point_id,
+                                               "name": internal_connection_point_id, "type": "VPORT"})
+            walk.int_cp_refs_by_ivld.setdefault(int_cpd["int-virtual-link-desc"], []).append(
+                internal_connection_point_id)
+        interfaces.append(interface)
+    if len(interfaces) > 0:
+        im_vdu["interface"] = interfaces
+    if len(internal_connection_points) > 0:
+        im_vdu["internal-connection-point"] = internal_connection_points
+
+
+def _translate_sol006_vdu_monitoring_parameters(walk, sol006_vdu, im_vdu):
+    vdu_monitoring_params = []
+    for monitoring_parameter in sol006_vdu.get("monitoring-parameter", ()):
+        vdu_monitoring_param = {"id": monitoring_parameter["id"]}
+        if monitoring_parameter.get("performance-metric"):
+            vdu_monitoring_param["nfvi-metric"] = monitoring_parameter["performance-metric"]
+        vdu_monitoring_params.append(vdu_monitoring_param)
+
+        monitoring_param = {"id": monitoring_parameter["id"]}
+        if monitoring_parameter.get("name"):
+            monitoring_param["name"] = monitoring_parameter["name"]
+        monitoring_param["vdu-monitoring-param"] = {"vdu-ref": sol006_vdu["id"],
+                                                    "vdu-monitoring-param-ref": monitoring_parameter["id"]}
+        walk.monitoring_params.append(monitoring_param)
+    if len(vdu_monitoring_params) > 0:
+        im_vdu["monitoring-param"] = vdu_monitoring_params
+
+
+def _finish_sol006_vdus(walk):
+    if len(walk.vdus) > 0:
+        walk.im_vnfd["vdu"] = walk.vdus
+
+
+def _finish_sol006_int_virtual_link_descs(walk):
+    virtual_link_profiles_by_id = {vlp.get("id"): vlp for vlp in walk.df.get("virtual-link-profile", ())}
+    internal_vlds = []
+    ip_profiles = []
+    for int_virtual_link_desc in walk.sol006_vnfd.get("int-virtual-link-desc", ()):
+        internal_vld = {"id": int_virtual_link_desc["id"], "name": int_virtual_link_desc["id"]}
+        int_cp_refs = walk.int_cp_refs_by_ivld.get(int_virtual_link_desc["id"], ())
+        if len(int_cp_refs) > 0:
+            internal_vld["internal-connection-point"] = [{"id-ref": int_cp_ref} for int_cp_ref in int_cp_refs]
+        virtual_link_profile = virtual_link_profiles_by_id.get(int_virtual_link_desc["id"])
+        if virtual_link_profile is not None:
+            ip_profile = _get_im_ip_profile_from_sol006_virtual_link_profile(virtual_link_profile)
+            internal_vld["ip-profile-ref"] = ip_profile["name"]
+            ip_profiles.append(ip_profile)
+        internal_vlds.append(internal_vld)
+
+    if len(internal_vlds) > 0:
+        walk.im_vnfd["internal-vld"] = internal_vlds
+    if len(ip_profiles) > 0:
+        walk.im_vnfd["ip-profiles"] = ip_profiles
+
+
+def _get_im_ip_profile_from_sol006_virtual_link_profile(virtual_link_profile):
+    ip_profile = {"name": "{}-ip-profile".format(virtual_link_profile["id"])}
+    l3_protocol_data = (virtual_link_profile.get("virtual-link-protocol-data") or {}).get("l3-protocol-data")
+    if l3_protocol_data:
+        if l3_protocol_data.get("description"):
+            ip_profile["description"] = l3_protocol_data["description"]
+        ip_profile_params = {}
+        if l3_protocol_data.get("ip-version"):
+            ip_profile_params["ip-version"] = l3_protocol_data["ip-version"]
+        if l3_protocol_data.get("cidr"):
+            ip_profile_params["subnet-address"] = l3_protocol_data["cidr"]
+        if l3_protocol_data.get("gateway-ip"):
+            ip_profile_params["gateway-address"] = l3_protocol_data["gateway-ip"]
+        if l3_protocol_data.get("security-group"):
+            ip_profile_params["security-group"] = l3_protocol_data["security-group"]
+        if "dhcp-enabled" in l3_protocol_data:
+            ip_profile_params["dhcp-params"] = {"enabled": l3_protocol_data["dhcp-enabled"]}
+        ip_profile["ip-profile-params"] = ip_profile_params
+    return ip_profile
+
+
+def _finish_sol006_vdu_monitoring_parameters(walk):
+    if len(walk.monitoring_params) > 0:
+        walk.im_vnfd["monitoring-param"] = walk.monitoring_params
+
+
+def _add_sol006_vnf_configuration_to_im_vnfd(sol006_vnfd, im_vnfd):
+    vnf_configuration = _get_sol006_vnfd_configurations_by_id(sol006_vnfd).get(sol006_vnfd["id"])
+    if vnf_configuration is not None:
+        im_vnfd["vnf-configuration"] = _get_im_configuration_from_sol006_day12_config(vnf_configuration)
+
+
+def _add_sol006_scaling_aspects_to_im_vnfd(sol006_vnfd, im_vnfd):
+    vdu_counts_by_id = None
+    vdu_profiles_by_id = None
+    scaling_group_descriptors = []
+    for scaling_aspect in _get_sol006_vnfd_default_df(sol006_vnfd).get("scaling-aspect", ()):
+        if vdu_counts_by_id is None:
+            vdu_counts_by_id = _get_sol006_vnfd_vdu_counts_by_id(sol006_vnfd)
+            vdu_profiles_by_id = {vdu_profile.get("id"): vdu_profile for vdu_profile in
+                                  _get_sol006_vnfd_default_df(sol006_vnfd).get("vdu-profile", ())}
+        scaling_group_descriptor = {"name": scaling_aspect["id"]}
+        if scaling_aspect.get("max-scale-level"):
+            scaling_group_descriptor["max-instance-count"] = int(scaling_aspect["max-scale-level"])
+
+        deltas = (scaling_aspect.get("aspect-delta-details") or {}).get("deltas") or [{}]
+        vdus = []
+        for vdu_delta in deltas[0].get("vdu-delta", ()):
+            vdu = {}
+            if vdu_delta.get("id"):
+                vdu["vdu-id-ref"] = vdu_delta["id"]
+                # The vdu profile minimum adds the scaling group minimum to the vdu count
+                vdu_profile = vdu_profiles_by_id.get(vdu_delta["id"], {})
+                min_instances = (int(vdu_profile.get("min-number-of-instances", 0)) -
+                                 vdu_counts_by_id.get(vdu_delta["id"], 1))
+                if min_instances > 0:
+                    scaling_group_descriptor["min-instance-count"] = min_instances
+            if vdu_delta.get("number-of-instances"):
+                vdu["count"] = int(vdu_delta["number-of-instances"])
+            vdus.append(vdu)
+        if len(vdus) > 0:
+            scaling_group_descriptor["vdu"] = vdus
+        if scaling_aspect.get("scaling-policy"):
+            scaling_group_descriptor["scaling-policy"] = scaling_aspect["scaling-policy"]
+        if scaling_aspect.get("scaling-config-action"):
+            scaling_group_descriptor["scaling-config-action"] = scaling_aspect["scaling-config-action"]
+        scaling_group_descriptors.append(scaling_group_descriptor)
+
+    if len(scaling_group_descriptors) > 0:
+        im_vnfd["scaling-group-descriptor"] = scaling_group_descriptors
+
+
+def _add_sol006_kdus_to_im_vnfd(sol006_vnfd, im_vnfd):
+    if sol006_vnfd.get("kdu"):
+        configurations_by_id = _get_sol006_vnfd_configurations_by_id(sol006_vnfd)
+        kdus = []
+        for kdu in sol006_vnfd["kdu"]:
+            kdu_configuration = configurations_by_id.get(kdu.get("name"))
+            if kdu_configuration is not None:
+                kdu = dict(kdu, **{"kdu-configuration": _get_im_configuration_from_sol006_day12_config(
+                    kdu_configuration)})
+            kdus.append(kdu)
+        im_vnfd["kdu"] = kdus
+
+
+def _add_sol006_k8s_cluster_to_im_vnfd(sol006_vnfd, im_vnfd):
+    sol006_k8s_cluster = sol006_vnfd.get("k8s-cluster")
+    if sol006_k8s_cluster is None:
+        return
+
+    im_k8s_cluster = {}
+    if sol006_k8s_cluster.get("version"):
+        im_k8s_cluster["version"] = sol006_k8s_cluster["version"]
+    if sol006_k8s_cluster.get("cni"):
+        im_k8s_cluster["cni"] = sol006_k8s_cluster["cni"]
+    ext_cpds_by_net = {ext_cpd["k8s-cluster-net"]: ext_cpd for ext_cpd in sol006_vnfd.get("ext-cpd", ())
+                       if ext_cpd.get("k8s-cluster-net")}
+    nets = []
+    for net in sol006_k8s_cluster.get("nets", ()):
+        im_net = {"id": net["id"]}
+        if net["id"] in ext_cpds_by_net:
+            im_net["external-connection-point-ref"] = _remove_suffix(ext_cpds_by_net[net["id"]]["id"], "-ext")
+        nets.append(im_net)
+    # An empty cluster is kept with an empty list of nets, as an empty k8s-cluster is not translated
+    im_k8s_cluster["nets"] = nets
+    im_vnfd["k8s-cluster"] = im_k8s_cluster
+
+
+def _add_sol006_placement_groups_to_im_vnfd(sol006_vnfd, im_vnfd):
+    if sol006_vnfd.get("placement-groups"):
+        im_vnfd["placement-groups"] = sol006_vnfd["placement-groups"]
+
+
+# Stages of the SOL006 to IM VNFD translation, in execution order. Every stage is called with the SOL006 VNFD
+# (without its envelope) and the IM VNFD being built
+_SOL006_VNFD_TRANSLATION_STAGES = (
+    _add_sol006_vnfd_basic_data_to_im_vnfd,
+    _add_sol006_vnfd_mgmt_cp_to_im_vnfd,
+    _add_sol006_ext_cpds_to_im_vnfd,
+    _walk_sol006_vdus_to_im_vnfd,
+    _add_sol006_vnf_configuration_to_im_vnfd,
+    _add_sol006_scaling_aspects_to_im_vnfd,
+    _add_sol006_kdus_to_im_vnfd,
+    _add_sol006_k8s_cluster_to_im_vnfd,
+    _add_sol006_placement_groups_to_im_vnfd,
+)
+
+# Per VDU handlers of the SOL006 to IM VNFD translation and the functions called once all the VDUs were visited
+_SOL006_VDU_TRANSLATION_HANDLERS = (
+    _translate_sol006_vdu,
+    _translate_sol006_vdu_flavor,
+    _translate_sol006_vdu_images,
+    _translate_sol006_vdu_int_cpds,
+    _translate_sol006_vdu_monitoring_parameters,
+)
+_SOL006_VDU_TRANSLATION_FINISHERS = (
+    _finish_sol006_vdus,
+    _finish_sol006_int_virtual_link_descs,
+    _finish_sol006_vdu_monitoring_parameters,
+)
+
+
+# ******************** SOL006 to IM NSD translation private functions ********************
+
+def _remove_sol006_nsd_envelope(sol006_nsd):
+    # Data is wrapped as { nsd: { nsd: [ <data> ] } }
+    return list(sol006_nsd.values())[0]["nsd"][0]
+
+
+def _add_sol006_nsd_basic_data_to_im_nsd(sol006_nsd, im_nsd):
+    im_nsd["id"] = sol006_nsd["id"]
+    if sol006_nsd.get("name"):
+        im_nsd["name"] = sol006_nsd["name"]
+    if sol006_nsd.get("description"):
+        im_nsd["description"] = sol006_nsd["description"]
+    if sol006_nsd.get("designer"):
+        im_nsd["vendor"] = sol006_nsd["designer"]
+    if sol006_nsd.get("version"):
+        im_nsd["version"] = sol006_nsd["version"]
+
+
+def _add_sol006_vnf_profiles_to_im_nsd(sol006_nsd, im_nsd):
+    vlds = {}
+    for virtual_link_desc in sol006_nsd.get("virtual-link-desc", ()):
+        vld = {"id": virtual_link_desc["id"], "name": virtual_link_desc["id"]}
+        if virtual_link_desc.get("mgmt-network"):
+            vld["mgmt-network"] = virtual_link_desc["mgmt-network"]
+        if virtual_link_desc.get("vim-network-name"):
+            vld["vim-network-name"] = virtual_link_desc["vim-network-name"]
+        vld["vnfd-connection-point-ref"] = []
+        vlds[virtual_link_desc["id"]] = vld
+
+    constituent_vnfds = []
+    for vnf_profile in (sol006_nsd.get("df") or [{}])[0].get("vnf-profile", ()):
+        member_vnf_index = vnf_profile["id"]
+        constituent_vnfds.append({"member-vnf-index": member_vnf_index, "vnfd-id-ref": vnf_profile.get("vnfd-id")})
+        for virtual_link_connectivity in vnf_profile.get("virtual-link-connectivity", ()):
+            vld_id = virtual_link_connectivity["virtual-link-profile-id"]
+            if vld_id not in vlds:
+                vlds[vld_id] = {"id": vld_id, "name": vld_id, "vnfd-connection-point-ref": []}
+            for constituent_cpd in virtual_link_connectivity.get("constituent-cpd-id", ()):
+                cp_ref = {
+                    "member-vnf-index-ref": member_vnf_index,
+                    "vnfd-id-ref": vnf_profile.get("vnfd-id"),
+                    "vnfd-connection-point-ref": _remove_suffix(constituent_cpd["constituent-cpd-id"], "-ext"),
+                }
+                if constituent_cpd.get("ip-address"):
+                    cp_ref["ip-address"] = constituent_cpd["ip-address"]
+                vlds[vld_id]["vnfd-connection-point-ref"].append(cp_ref)
+
+    # vnfds without vnf profile are constituents without connection points, indexed by their id
+    profile_vnfd_ids = {constituent_vnfd["vnfd-id-ref"] for constituent_vnfd in constituent_vnfds}
+    member_vnf_indexes = {constituent_vnfd["member-vnf-index"] for constituent_vnfd in constituent_vnfds}
+    for vnfd_id in sol006_nsd.get("vnfd-id", ()):
+        if vnfd_id not in profile_vnfd_ids and vnfd_id not in member_vnf_indexes:
+            constituent_vnfds.append({"member-vnf-index": vnfd_id, "vnfd-id-ref": vnfd_id})
+            member_vnf_indexes.add(vnfd_id)
+
+    if len(constituent_vnfds) > 0:
+        im_nsd["constituent-vnfd"] = constituent_vnfds
+    for vld in vlds.values():
+        if not vld["vnfd-connection-point-ref"]:
+            del vld["vnfd-connection-point-ref"]
+    if len(vlds) > 0:
+        im_nsd["vld"] = list(vlds.values())
+
+
+# Stages of the SOL006 to IM NSD translation, in execution order
+_SOL006_NSD_TRANSLATION_STAGES = (
+    _add_sol006_nsd_basic_data_to_im_nsd,
+    _add_sol006_vnf_profiles_to_im_nsd,
+)
@@ -0,0 +1,417 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import copy
+from collections.abc import Mapping, MutableMapping
+
+from osm_im.im_translation import TranslationException, VduTranslationWalk, _get_im_model_descriptor_type
+from osm_im.im_translation import _IM_VNFD_TRANSLATION_STAGES, _IM_VDU_TRANSLATION_HANDLERS
+from osm_im.im_translation import _IM_VDU_TRANSLATION_FINISHERS, _BUILT_IN_IM_VDU_TRANSLATION_HANDLERS
+from osm_im.im_translation import _remove_im_vnfd_envelope, _walk_im_vdus_to_sol006_vnfd, _walk_vdus
+
+# Marks a stage that depends on every key of a descriptor (it iterated over the descriptor)
+_ALL_KEYS = "*"
+
+
+class IncrementalVnfdTranslation:
+    '''
+    Keeps the SOL006 translation of an OSM-IM VNFD up to date while the VNFD is edited with JSON patches
+    (RFC 6902). Every translation stage records the top level keys of the IM VNFD it reads and the top
+    level keys of the SOL006 VNFD it touches, so that a patch only re-runs the stages depending on the
+    changed keys (plus the stages sharing SOL006 keys with them).
+    The VDU walk keeps the output of the per VDU handlers of every VDU, so only the VDUs changed by a patch are
+    translated again, and the outputs of the others are merged with them (unless other handlers were registered
+    with register_im_vdu_translation_handler, then every VDU is translated again).
+    The IM model is copied, patches are applied to that copy and never to the caller's data. The translated
+    model shares subtrees with that copy, which are replaced by the affected stages when a patch changes them
+    '''
+
+    def __init__(self, im_model_data):
+        if _get_im_model_descriptor_type(im_model_data) != "vnfd":
+            raise TranslationException("Error in translation: incremental translation only supports OSM-IM vnfd")
+        self.im_model_data = copy.deepcopy(im_model_data)
+        self.stages_run = 0
+        self.vdus_translated = 0
+        self._stages = tuple(self._walk_vdus if stage is _walk_im_vdus_to_sol006_vnfd else stage
+                             for stage in _IM_VNFD_TRANSLATION_STAGES)
+        self._translate_all()
+
+    @property
+    def sol006_vnfd(self):
+        '''
+        Translated model, as returned by translate_im_vnfd_to_sol006. It is the cached translation, so it must
+        be copied before modifying it
+        '''
+        return {"vnfd": self._sol006_vnfd}
+
+    def apply_patch(self, patch):
+        '''
+        patch: list of JSON patch operations ({"op", "path", "value", "from"}) over the OSM-IM model
+        Applies the patch to the model and re-translates the affected stages. Returns the translated model.
+        If an operation fails, the operations applied before it are kept (and translated), and
+        TranslationException is raised
+        '''
+        changed_keys = set()
+        try:
+            for operation in patch:
+                for path in (operation.get("path"), operation.get("from")):
+                    self._discard_vdu_record(path)
+                changed_keys.update(self._apply_patch_operation(operation))
+        finally:
+            if changed_keys:
+                self._translate_changes(changed_keys)
+        return self.sol006_vnfd
+
+    def _translate_all(self):
+        self._im_vnfd = _remove_im_vnfd_envelope(self.im_model_data)
+        self._sol006_vnfd = {}
+        self._stage_reads = [None] * len(_IM_VNFD_TRANSLATION_STAGES)
+        self._stage_footprints = [None] * len(_IM_VNFD_TRANSLATION_STAGES)
+        self._stage_writes = [None] * len(_IM_VNFD_TRANSLATION_STAGES)
+        # id(IM VDU) -> _VduRecord
+        self._vdu_records = {}
+        # keys of the IM VNFD, besides the VDUs, read to translate the VDUs, and read by the finishers
+        self._vdu_context_reads = set()
+        self._vdu_finish_reads = set()
+        # ids and internal connection points of the VDUs changed since the last VDU walk
+        self._changed_vdu_keys = set()
+        self._run_stages(range(len(_IM_VNFD_TRANSLATION_STAGES)))
+
+    def _run_stages(self, stage_indexes):
+        im_view = _ImVnfdView(self._im_vnfd)
+        for index in stage_indexes:
+            im_view.reads = set()
+            sol006_view = _Sol006VnfdView(self._sol006_vnfd)
+            self._stages[index](im_view, sol006_view)
+            self._stage_reads[index] = im_view.reads
+            self._stage_footprints[index] = sol006_view.footprint
+            self._stage_writes[index] = sol006_view.writes
+            self.stages_run += 1
+
+    def _translate_changes(self, changed_keys):
+        if _ALL_KEYS in changed_keys:
+            return self._translate_all()
+        self._im_vnfd = _remove_im_vnfd_envelope(self.im_model_data)
+        if changed_keys & self._vdu_context_reads:
+            self._vdu_records = {}
+            self._vdu_context_reads = set()
+        if changed_keys & self._vdu_finish_reads:
+            for record in self._vdu_records.values():
+                record.vdus = record.configurations = None
+            self._vdu_finish_reads = set()
+        affected = {index for index, reads in enumerate(self._stage_reads)
+                    if _ALL_KEYS in reads or reads & changed_keys}
+        # Stages sharing SOL006 keys build those keys together, so all of them must run again
+        footprint = set()
+        while True:
+            for index in affected:
+                footprint |= self._stage_footprints[index]
+            coupled = {index for index, stage_footprint in enumerate(self._stage_footprints)
+                       if index not in affected and stage_footprint & footprint}
+            if not coupled:
+                break
+            affected |= coupled
+        if not affected:
+            return
+        for key in footprint:
+            self._sol006_vnfd.pop(key, None)
+        self._run_stages(sorted(affected))
+
+        new_footprint = set()
+        for index in affected:
+            new_footprint |= self._stage_footprints[index]
+        if any(self._stage_footprints[index] & new_footprint for index in range(len(self._stage_footprints))
+               if index not in affected):
+            # Re-run stages started sharing keys with stages that did not run, fall back to a full translation
+            return self._translate_all()
+        self._sort_sol006_vnfd()
+
+    def _walk_vdus(self, im_vnfd, sol006_vnfd):
+        # Replaces _walk_im_vdus_to_sol006_vnfd: the handlers only run for the VDUs without a record, and the
+        # finishers only complete the copies of those VDUs, unless they may change the other VDUs too
+        if tuple(_IM_VDU_TRANSLATION_HANDLERS) != _BUILT_IN_IM_VDU_TRANSLATION_HANDLERS:
+            self.vdus_translated += len(im_vnfd.get("vdu", ()))
+            return _walk_im_vdus_to_sol006_vnfd(im_vnfd, sol006_vnfd)
+        reads = im_vnfd.reads
+        im_vnfd.reads = set()
+        walk = VduTranslationWalk(im_vnfd, sol006_vnfd)
+        records = []
+        changed_keys = self._changed_vdu_keys
+        for vdu in im_vnfd._im_vnfd.get("vdu", ()):
+            record = self._vdu_records.pop(id(vdu), None)
+            if record is None or record.im_vdu is not vdu:
+                record = _VduRecord(vdu, _vdu_walk(walk))
+                changed_keys |= record.keys
+                self.vdus_translated += 1
+            records.append(record)
+        self._vdu_context_reads |= im_vnfd.reads
+        for record in self._vdu_records.values():
+            # VDUs removed by the patch
+            changed_keys |= record.keys
+        self._vdu_records = {}
+
+        refinish = [record for record in records if record.vdus is None]
+        if any(record.keys & changed_keys for record in records if record.vdus is not None):
+            # A finished VDU shares an id or an internal connection point with a changed VDU
+            refinish = records
+        for record in refinish:
+            record.copy_output()
+        _merge_vdu_records(walk, records, refinish)
+        im_vnfd.reads = set()
+        for finish in tuple(_IM_VDU_TRANSLATION_FINISHERS):
+            finish(walk)
+        self._vdu_finish_reads |= im_vnfd.reads
+        # If the translation failed, no record is kept and every VDU is translated again
+        self._vdu_records = {id(record.im_vdu): record for record in records}
+        self._changed_vdu_keys = set()
+        im_vnfd.reads |= reads | self._vdu_context_reads
+        im_vnfd.reads.add("vdu")
+
+    def _discard_vdu_record(self, pointer):
+        # Drops the record of the VDU containing the value at pointer, changed by a patch operation
+        try:
+            path = _parse_pointer(pointer)
+            if len(path) < 6 or path[1:4] != ["vnfd", "0", "vdu"]:
+                return
+            vdu = _get_pointer(self.im_model_data, path[:5])
+        except (KeyError, IndexError, ValueError, TypeError, AttributeError):
+            return
+        record = self._vdu_records.get(id(vdu))
+        if record is not None and record.im_vdu is vdu:
+            self._changed_vdu_keys |= record.keys
+            del self._vdu_records[id(vdu)]
+
+    def _sort_sol006_vnfd(self):
+        # Same key order as a full translation, where keys are sorted by the first stage writing them
+        ordered = {}
+        for writes in self._stage_writes:
+            for key in writes:
+                if key not in ordered and key in self._sol006_vnfd:
+                    ordered[key] = self._sol006_vnfd[key]
+        for key, value in self._sol006_vnfd.items():
+            ordered.setdefault(key, value)
+        self._sol006_vnfd = ordered
+
+    def _apply_patch_operation(self, operation):
+        '''
+        Applies a JSON patch operation to the model, returns the changed keys of the IM VNFD
+        '''
+        try:
+            op = operation["op"]
+            path = _parse_pointer(operation["path"])
+            if op == "test":
+                if _get_pointer(self.im_model_data, path) != operation["value"]:
+                    raise TranslationException("test failed for path {}".format(operation["path"]))
+                return set()
+            if op in ("add", "replace"):
+                _set_pointer(self.im_model_data, path, copy.deepcopy(operation["value"]), op == "add")
+                return _changed_keys(path)
+            if op == "remove":
+                _remove_pointer(self.im_model_data, path)
+                return _changed_keys(path)
+            if op in ("move", "copy"):
+                from_path = _parse_pointer(operation["from"])
+                value = _get_pointer(self.im_model_data, from_path)
+                if op == "copy":
+                    value = copy.deepcopy(value)
+                else:
+                    # the moved value keeps its identity, so a moved VDU keeps its translation
+                    _remove_pointer(self.im_model_data, from_path)
+                _set_pointer(self.im_model_data, path, value, True)
+                return _changed_keys(path) | (_changed_keys(from_path) if op == "move" else set())
+            raise TranslationException("unknown operation '{}'".format(op))
+        except TranslationException as e:
+            raise TranslationException("Error in patch operation {}: {}".format(operation, e))
+        except (KeyError, IndexError, ValueError, TypeError) as e:
+            raise TranslationException("Error in patch operation {}: {!r}".format(operation, e))
+
+
+class _ImVnfdView(Mapping):
+    '''
+    Read-only view of the IM VNFD given to the translation stages, recording the keys read
+    '''
+
+    def __init__(self, im_vnfd):
+        self._im_vnfd = im_vnfd
+        self.reads = set()
+
+    def __getitem__(self, key):
+        self.reads.add(key)
+        return self._im_vnfd[key]
+
+    def __iter__(self):
+        self.reads.add(_ALL_KEYS)
+        return iter(self._im_vnfd)
+
+    def __len__(self):
+        self.reads.add(_ALL_KEYS)
+        return len(self._im_vnfd)
+
+
+class _Sol006VnfdView(MutableMapping):
+    '''
+    View of the SOL006 VNFD being built, recording the keys read or written by a translation stage
+    '''
+
+    def __init__(self, sol006_vnfd):
+        self._sol006_vnfd = sol006_vnfd
+        self.footprint = set()
+        self.writes = []
+
+    def __getitem__(self, key):
+        self.footprint.add(key)
+        return self._sol006_vnfd[key]
+
+    def __setitem__(self, key, value):
+        self.footprint.add(key)
+        self.writes.append(key)
+        self._sol006_vnfd[key] = value
+
+    def __delitem__(self, key):
+        self.footprint.add(key)
+        del self._sol006_vnfd[key]
+
+    def __iter__(self):
+        self.footprint.update(self._sol006_vnfd)
+        return iter(self._sol006_vnfd)
+
+    def __len__(self):
+        self.footprint.update(self._sol006_vnfd)
+        return len(self._sol006_vnfd)
+
+
+# Attributes of a VduTranslationWalk that do not depend on the VDUs visited
+_VDU_WALK_CONTEXT = ("im_vnfd", "sol006_vnfd", "cps_by_name", "scaling_group_descriptors_by_vdu_id")
+
+
+def _vdu_walk(walk):
+    # Walk to visit a single VDU, sharing the context of walk
+    vdu_walk = VduTranslationWalk({}, None)
+    for name in _VDU_WALK_CONTEXT:
+        setattr(vdu_walk, name, getattr(walk, name))
+    return vdu_walk
+
+
+class _VduRecord:
+    '''
+    Translation of a single IM VDU by the built-in handlers.
+    walk: VduTranslationWalk that only visited im_vdu, never modified after the handlers ran
+    vdus, configurations: copies of the SOL006 VDUs and VDU configurations of walk given to the finishers
+    and kept in the translated model, or None when the finishers must complete new copies
+    keys: VDU id and internal connection points, the finishers look them up in the output of every VDU
+    '''
+
+    __slots__ = ("im_vdu", "walk", "vdus", "configurations", "keys")
+
+    def __init__(self, im_vdu, walk):
+        _walk_vdus(walk, (im_vdu,), _BUILT_IN_IM_VDU_TRANSLATION_HANDLERS, ())
+        self.im_vdu = im_vdu
+        self.walk = walk
+        self.vdus = None
+        self.configurations = None
+        self.keys = {("id", vdu_id) for vdu_id in walk.sol006_vdus_by_id}
+        self.keys.update(("cp", int_cp_ref) for int_cp_ref in walk.int_cp_refs_interfaces)
+
+    def copy_output(self):
+        # The finishers and the later stages modify the SOL006 VDUs, their internal connection points and the
+        # VDU configurations, so they get copies and walk is kept unchanged
+        self.vdus = []
+        for vdu in self.walk.vdus:
+            vdu = dict(vdu)
+            if "int-cpd" in vdu:
+                vdu["int-cpd"] = [dict(int_cpd) for int_cpd in vdu["int-cpd"]]
+            self.vdus.append(vdu)
+        self.configurations = [dict(configuration) for configuration in self.walk.vdu_configurations]
+
+
+def _merge_vdu_records(walk, records, refinish):
+    # Fills walk as if it had visited the VDUs of records, in order. Only the copies of the records in refinish
+    # can be found by id by the finishers, so the copies of the other records are kept as they were finished
+    for record in records:
+        vdu_walk = record.walk
+        walk.flavor_compute_descriptors += vdu_walk.flavor_compute_descriptors
+        walk.flavor_storage_descriptors += vdu_walk.flavor_storage_descriptors
+        walk.epa_compute_descriptors += vdu_walk.epa_compute_descriptors
+        walk.epa_storage_descriptors += vdu_walk.epa_storage_descriptors
+        for image_descriptor in vdu_walk.image_descriptors:
+            if image_descriptor["id"] not in walk.images:
+                walk.image_descriptors.append(image_descriptor)
+                walk.images.add(image_descriptor["id"])
+        walk.ext_cpds += vdu_walk.ext_cpds
+        walk.vdus += record.vdus
+        walk.vdu_configurations += record.configurations
+        walk.df["vdu-profile"] += vdu_walk.df["vdu-profile"]
+        walk.df["instantiation-level"][0]["vdu-level"] += vdu_walk.df["instantiation-level"][0]["vdu-level"]
+        walk.int_cp_refs_interfaces.update(vdu_walk.int_cp_refs_interfaces)
+        walk.vdu_monitoring_param_metrics.update(vdu_walk.vdu_monitoring_param_metrics)
+    for record in refinish:
+        for vdu in record.vdus:
+            walk.sol006_vdus_by_id.setdefault(vdu["id"], []).append(vdu)
+            for int_cpd in vdu.get("int-cpd", ()):
+                walk.sol006_int_cpds.setdefault((vdu["id"], int_cpd["id"]), []).append(int_cpd)
+
+
+def _changed_keys(path):
+    # Paths are /<catalog>/vnfd/0/<key>/..., changes above a key of the translated VNFD change everything
+    if len(path) < 4:
+        return {_ALL_KEYS}
+    if path[1] != "vnfd" or path[2] != "0":
+        return set()
+    return {path[3]}
+
+
+def _parse_pointer(pointer):
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise ValueError("invalid JSON pointer '{}'".format(pointer))
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _get_pointer(data, path):
+    for token in path:
+        data = data[int(token)] if isinstance(data, list) else data[token]
+    return data
+
+
+def _set_pointer(data, path, value, insert):
+    if not path:
+        raise ValueError("the whole model cannot be replaced, create a new translation instead")
+    parent = _get_pointer(data, path[:-1])
+    token = path[-1]
+    if isinstance(parent, list):
+        if token == "-" and insert:
+            parent.append(value)
+        elif insert:
+            index = int(token)
+            if not 0 <= index <= len(parent):
+                raise IndexError("list index out of range")
+            parent.insert(index, value)
+        else:
+            parent[int(token)] = value
+    else:
+        if not insert and token not in parent:
+            raise KeyError(token)
+        parent[token] = value
+
+
+def _remove_pointer(data, path):
+    if not path:
+        raise ValueError("the whole model cannot be removed")
+    parent = _get_pointer(data, path[:-1])
+    if isinstance(parent, list):
+        del parent[int(path[-1])]
+    else:
+        del parent[path[-1]]
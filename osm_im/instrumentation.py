@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextlib
+import contextvars
+import cProfile
+import pstats
+import time
+import tracemalloc
+from collections.abc import Mapping, Sequence
+
+CAPTURE_MODES = ("cprofile", "tracemalloc")
+
+# Callbacks of the current context (thread or asyncio task), and path of the stage being run
+_stage_callbacks = contextvars.ContextVar("osm_im_stage_callbacks", default=())
+_stage_path = contextvars.ContextVar("osm_im_stage_path", default="")
+
+
+class StageEvent:
+    '''
+    Report of a stage of the validation or the translation.
+    name: name of the stage; path: names of the enclosing stages and the stage, separated by /
+    elapsed: wall time in seconds
+    allocated: memory allocated (minus freed) during the stage in bytes, None when tracemalloc is not tracing
+    size: size of the descriptor given to the stage (bytes for unparsed descriptors, number of nodes for
+    parsed ones), None for inner stages
+    failed: True when the stage raised an exception
+    '''
+    __slots__ = ("name", "path", "elapsed", "allocated", "size", "failed")
+
+    def __init__(self, name, path, elapsed, allocated=None, size=None, failed=False):
+        self.name = name
+        self.path = path
+        self.elapsed = elapsed
+        self.allocated = allocated
+        self.size = size
+        self.failed = failed
+
+    def as_dict(self):
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def __repr__(self):
+        return "StageEvent({})".format(", ".join("{}={!r}".format(key, getattr(self, key)) for key in self.__slots__))
+
+
+class _NullStage:
+    # Returned by stage() when nothing is instrumented, so that disabled instrumentation costs a context var read
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("name", "data", "callbacks", "path", "_token", "_memory", "_size", "_start")
+
+    def __init__(self, name, data, callbacks):
+        self.name = name
+        self.data = data
+        self.callbacks = callbacks
+
+    def __enter__(self):
+        parent_path = _stage_path.get()
+        self.path = "{}/{}".format(parent_path, self.name) if parent_path else self.name
+        self._token = _stage_path.set(self.path)
+        self._size = None if self.data is None else descriptor_size(self.data)
+        self.data = None
+        self._memory = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        elapsed = time.perf_counter() - self._start
+        allocated = None
+        if self._memory is not None and tracemalloc.is_tracing():
+            allocated = tracemalloc.get_traced_memory()[0] - self._memory
+        _stage_path.reset(self._token)
+        event = StageEvent(self.name, self.path, elapsed, allocated, self._size, exc_type is not None)
+        for callback in self.callbacks:
+            callback(event)
+        return False
+
+
+def stage(name, data=None):
+    '''
+    Context manager delimiting a stage, reported to the callbacks registered with instrument() in the current
+    context. data: descriptor given to the stage, to report its size. When there are no callbacks it does nothing
+    '''
+    callbacks = _stage_callbacks.get()
+    if not callbacks:
+        return _NULL_STAGE
+    return _Stage(name, data, callbacks)
+
+
+def is_enabled():
+    '''
+    True when there are instrumentation callbacks in the current context, for loops of stages that are
+    not worth delimiting one by one when nothing is instrumented
+    '''
+    return bool(_stage_callbacks.get())
+
+
+@contextlib.contextmanager
+def instrument(callback=None):
+    '''
+    Reports every validation and translation stage run inside the with block, in the current thread or asyncio
+    task, to callback(StageEvent). Events are reported when stages end, so inner stages come first.
+    Without callback, the events are appended to the list returned by the context manager:
+        with instrument() as events:
+            Validation().descriptor_validation(descriptor)
+    '''
+    events = []
+    token = _stage_callbacks.set(_stage_callbacks.get() + (callback or events.append,))
+    try:
+        yield events
+    finally:
+        _stage_callbacks.reset(token)
+
+
+class ProfileCapture:
+    '''
+    Result of capture(). stats: pstats.Stats of the cprofile mode. snapshot and peak: tracemalloc.Snapshot and
+    peak traced memory in bytes of the tracemalloc mode
+    '''
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.stats = None
+        self.snapshot = None
+        self.peak = None
+
+
+@contextlib.contextmanager
+def capture(mode="cprofile"):
+    '''
+    Profiles the code run inside the with block, meant for a single validation or translation call:
+        with capture("tracemalloc") as profile:
+            translate_im_model_to_sol006(im_model)
+        print(profile.peak, profile.snapshot.statistics("lineno")[:10])
+    mode: cprofile for a cProfile capture, tracemalloc for a memory capture. Stages reported to instrument()
+    callbacks inside a tracemalloc capture include their allocations
+    '''
+    if mode not in CAPTURE_MODES:
+        raise ValueError("Unknown capture mode '{}'. Expected values: {}".format(mode, ", ".join(CAPTURE_MODES)))
+    result = ProfileCapture(mode)
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield result
+        finally:
+            profiler.disable()
+            result.stats = pstats.Stats(profiler)
+        return
+
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        yield result
+    finally:
+        result.peak = tracemalloc.get_traced_memory()[1]
+        result.snapshot = tracemalloc.take_snapshot()
+        if not was_tracing:
+            tracemalloc.stop()
+
+
+def descriptor_size(data):
+    '''
+    Size of a descriptor: length in bytes of an unparsed one (str or bytes), or number of nodes
+    (containers and leaves) of a parsed one
+    '''
+    if isinstance(data, str):
+        return len(data.encode("utf-8"))
+    if isinstance(data, (bytes, bytearray)):
+        return len(data)
+    size = 0
+    pending = [data]
+    while pending:
+        node = pending.pop()
+        size += 1
+        if isinstance(node, Mapping):
+            pending.extend(node.values())
+        elif isinstance(node, Sequence) and not isinstance(node, (str, bytes)):
+            pending.extend(node)
+    return size
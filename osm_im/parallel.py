@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import contextvars
+import functools
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+ASYNC_EXECUTOR_KINDS = ("thread", "process")
+
+_async_executor = None
+
+
+def process_pool_imap(function, iterable, workers=None, ordered=True, initializer=None, initargs=()):
+    '''
+    Yields function(*args) for every args tuple of the iterable, computed in a pool of worker processes.
+    workers: number of worker processes, None for one per CPU
+    ordered: True to yield results in input order, False in completion order
+    The iterable is read lazily: the items submitted and not yielded yet are bounded, so large inputs
+    are streamed. Exceptions raised by function are raised when their result is yielded
+    '''
+    workers = workers or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(workers, initializer=initializer, initargs=initargs)
+    max_pending = workers * 4
+    pending = {}
+    done_results = {}
+    next_index = 0
+
+    def finished_results():
+        nonlocal next_index
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            index = pending.pop(future)
+            if ordered:
+                done_results[index] = future
+            else:
+                yield future.result()
+        while next_index in done_results:
+            yield done_results.pop(next_index).result()
+            next_index += 1
+
+    try:
+        for index, args in enumerate(iterable):
+            pending[executor.submit(function, *args)] = index
+            while len(pending) + len(done_results) >= max_pending:
+                yield from finished_results()
+        while pending:
+            yield from finished_results()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+class AsyncExecutor:
+    '''
+    Runs blocking functions (validations, translations) from asyncio code in a pool of threads or processes,
+    without blocking the event loop.
+    executor: thread or process to create a pool of that kind, or an existing concurrent.futures.Executor,
+    which shutdown() does not shut down
+    max_workers: workers of the pool created, None for one per CPU
+    max_concurrency: calls of an event loop running in the pool at once, the others wait for a slot; None for
+    max_workers
+    timeout: default timeout in seconds of every call, including the wait for a slot. None for no timeout
+    A call cancelled or timed out before it starts is never run. Once started, a thread cannot be interrupted and
+    the call keeps its slot until it finishes, so the pool is never overloaded. In a process pool created by the
+    executor, the workers are terminated instead and the pool is started again; the other calls that were running
+    in it are submitted again
+    '''
+
+    def __init__(self, executor="thread", max_workers=None, max_concurrency=None, timeout=None):
+        if isinstance(executor, str) and executor not in ASYNC_EXECUTOR_KINDS:
+            raise ValueError("Unknown executor '{}'. Expected values: {}".format(
+                executor, ", ".join(ASYNC_EXECUTOR_KINDS)))
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_concurrency = max_concurrency or self.max_workers
+        self.timeout = timeout
+        self._kind = executor if isinstance(executor, str) else None
+        self._pool = None if self._kind else executor
+        # event loop -> semaphore with the free slots of its calls
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    async def run(self, function, *args, timeout=None):
+        '''
+        Returns function(*args) run in the pool. Raises TimeoutError when it takes longer than timeout seconds,
+        or than the timeout of the executor when it is None
+        '''
+        timeout = self.timeout if timeout is None else timeout
+        if timeout is None:
+            return await self._run(function, args)
+        try:
+            return await asyncio.wait_for(self._run(function, args), timeout)
+        except asyncio.TimeoutError:
+            # asyncio.TimeoutError is only the builtin TimeoutError since Python 3.11
+            raise TimeoutError("Call not finished after {} seconds".format(timeout)) from None
+
+    def shutdown(self, wait=True):
+        if self._kind and self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            pool_class = ThreadPoolExecutor if self._kind == "thread" else ProcessPoolExecutor
+            self._pool = pool_class(self.max_workers)
+        return self._pool
+
+    async def _run(self, function, args):
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        while True:
+            await semaphore.acquire()
+            pool = self._get_pool()
+            try:
+                if isinstance(pool, ThreadPoolExecutor):
+                    # instrumentation callbacks of the calling task apply to the call
+                    future = pool.submit(contextvars.copy_context().run, function, *args)
+                else:
+                    future = pool.submit(function, *args)
+            except BaseException:
+                semaphore.release()
+                raise
+            # The slot is freed when the call finishes, not when the caller stops waiting for it
+            future.add_done_callback(functools.partial(_release_slot, loop, semaphore))
+            try:
+                return await asyncio.wrap_future(future)
+            except BrokenProcessPool:
+                if pool is self._pool:
+                    # a worker died on its own
+                    self._pool = None
+                    raise
+                # pool terminated because of another call
+            except asyncio.CancelledError:
+                if future.running():
+                    self._terminate(pool)
+                raise
+
+    def _terminate(self, pool):
+        if self._kind != "process" or pool is not self._pool:
+            return
+        self._pool = None
+        terminate_workers = getattr(pool, "terminate_workers", None)
+        if terminate_workers is not None:
+            terminate_workers()
+            return
+        for process in list((pool._processes or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _release_slot(loop, semaphore, future):
+    try:
+        loop.call_soon_threadsafe(semaphore.release)
+    except RuntimeError:
+        # event loop closed
+        pass
+
+
+def get_async_executor():
+    '''
+    Returns the AsyncExecutor used by the async validation and translation functions when none is given,
+    a thread pool executor unless set_async_executor is called
+    '''
+    global _async_executor
+    if _async_executor is None:
+        _async_executor = AsyncExecutor()
+    return _async_executor
+
+
+def set_async_executor(executor):
+    global _async_executor
+    _async_executor = executor
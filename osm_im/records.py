@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import importlib
+import keyword
+
+from osm_im.compiled_validation import CompiledModel, CompiledValidationError, SKIPPED
+
+# Generated validator tables of every record model and path of the record list in their data tree. Record
+# models augment /osm-project:project, see the record tables rule of the Makefile
+RECORD_TYPES = {
+    "nsr": ("osm_im.nsr_tables", ("project", "ns-instance-opdata", "nsr")),
+    "nsr-config": ("osm_im.nsr_tables", ("project", "ns-instance-config", "nsr")),
+    "vnfr": ("osm_im.vnfr_tables", ("project", "vnfr-catalog", "vnfr")),
+}
+
+_record_classes = {}
+_compiled_models = {}
+
+
+def get_record_class(record_type):
+    '''
+    Returns the Record class of a record type (nsr, nsr-config, vnfr), building the classes of the record
+    from its generated tables the first time it is needed
+    '''
+    record_class = _record_classes.get(record_type)
+    if record_class is None:
+        if record_type not in RECORD_TYPES:
+            raise KeyError(record_type)
+        tables_module, path = RECORD_TYPES[record_type]
+        model = _compiled_models.get(tables_module)
+        if model is None:
+            model = CompiledModel(importlib.import_module(tables_module), strict=True)
+            _compiled_models[tables_module] = model
+        record_class = _RecordClassBuilder(model).build_path(path)
+        _record_classes[record_type] = record_class
+    return record_class
+
+
+class Record:
+    '''
+    Base class of the record bindings: one class per container and list of the record model, with a slot per
+    child and no per leaf wrapper. Values are plain python values, records for containers and lists of
+    records for lists; unset values are None.
+    Records are built validating a dict with from_dict, and changed validating only the changed values with
+    update. Invalid data raises CompiledValidationError, with the path of the wrong element
+    '''
+    __slots__ = ()
+    # yang name -> _Field, in schema order
+    _fields = {}
+    _keys = ()
+    _presence = False
+    _schema_path = ""
+
+    def __init__(self, **values):
+        '''
+        Record with the given attributes (python names), that are not validated
+        '''
+        for attribute in self.__slots__:
+            setattr(self, attribute, None)
+        for attribute, value in values.items():
+            setattr(self, attribute, value)
+
+    @classmethod
+    def from_dict(cls, data, force=False):
+        '''
+        data: dict with the record (yang names, as in the IETF JSON encoding)
+        force: True to skip unknown fields
+        Validates data, returns the record
+        '''
+        if not isinstance(data, dict):
+            raise CompiledValidationError("Expected a mapping, got {}".format(type(data).__name__))
+        record = cls()
+        fields = cls._fields
+        for key, value in data.items():
+            _check_key(key)
+            if "@" in key:
+                # metadata annotations are not validated
+                continue
+            field = fields.get(key.rpartition(":")[2])
+            if field is None:
+                if force:
+                    continue
+                raise CompiledValidationError("Unknown element '{}'".format(key), [key])
+            if value is None or value == []:
+                continue
+            value = _load_field(field, key, value, force)
+            if value is not SKIPPED:
+                setattr(record, field.attribute, value)
+        return record
+
+    def to_dict(self):
+        '''
+        Returns the record as a dict with yang names, in schema order, without the unset values
+        '''
+        out = {}
+        for name, field in self._fields.items():
+            value = getattr(self, field.attribute)
+            if value is None:
+                continue
+            if field.kind == "container":
+                value = value.to_dict()
+                if not value and not field.record_class._presence:
+                    continue
+            elif field.kind == "list":
+                value = [entry.to_dict() for entry in value]
+            out[name] = value
+        return out
+
+    def update(self, changes, force=False):
+        '''
+        changes: dict with the changed values (yang names). Leaves, leaf-lists and lists are replaced,
+        containers are updated recursively, and None values unset the element
+        Validates only the changed values, and changes the record only when all of them are valid
+        Returns the record
+        '''
+        assignments = []
+        self._prepare_update(changes, force, assignments)
+        for record, attribute, value in assignments:
+            setattr(record, attribute, value)
+        return self
+
+    def _prepare_update(self, changes, force, assignments):
+        if not isinstance(changes, dict):
+            raise CompiledValidationError("Expected a mapping, got {}".format(type(changes).__name__))
+        for key, value in changes.items():
+            _check_key(key)
+            if "@" in key:
+                # metadata annotations are not validated, as in from_dict
+                continue
+            field = self._fields.get(key.rpartition(":")[2])
+            if field is None:
+                if force:
+                    continue
+                raise CompiledValidationError("Unknown element '{}'".format(key), [key])
+            current = getattr(self, field.attribute)
+            if field.kind == "container" and current is not None and isinstance(value, dict):
+                try:
+                    current._prepare_update(value, force, assignments)
+                except CompiledValidationError as e:
+                    e.path.insert(0, key)
+                    raise
+                continue
+            value = None if value is None or value == [] else _load_field(field, key, value, force)
+            if value is SKIPPED:
+                value = None
+            if field.name in self._keys and value != current:
+                # the record would not be found by its key in the list containing it
+                raise CompiledValidationError("List keys cannot be changed", [key])
+            assignments.append((self, field.attribute, value))
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, attribute) == getattr(other, attribute) for attribute in self.__slots__)
+
+    def __repr__(self):
+        values = ("{}={!r}".format(attribute, getattr(self, attribute)) for attribute in self.__slots__
+                  if getattr(self, attribute) is not None)
+        return "{}({})".format(type(self).__name__, ", ".join(values))
+
+
+class _Field:
+    __slots__ = ("name", "attribute", "kind", "load", "record_class")
+
+    def __init__(self, name, attribute, kind, load, record_class=None):
+        self.name = name
+        self.attribute = attribute
+        self.kind = kind
+        self.load = load
+        self.record_class = record_class
+
+
+def _check_key(key):
+    if not isinstance(key, str):
+        raise CompiledValidationError("Element names must be strings, got {!r}".format(key), [str(key)])
+
+
+def _load_field(field, key, value, force):
+    try:
+        return field.load(value, force)
+    except CompiledValidationError as e:
+        e.path.insert(0, key)
+        raise
+    except (ValueError, TypeError, ArithmeticError) as e:
+        raise CompiledValidationError(str(e) or type(e).__name__, [key])
+
+
+def _attribute_name(name):
+    attribute = name.replace("-", "_").replace(".", "_")
+    return attribute + "_" if keyword.iskeyword(attribute) or attribute in _RESERVED_ATTRIBUTES else attribute
+
+
+# Names of the Record methods, that cannot be used as slots
+_RESERVED_ATTRIBUTES = frozenset(name for name in dir(Record) if not name.startswith("__"))
+
+
+def _class_name(name):
+    return "".join(part[:1].upper() + part[1:] for part in name.replace(".", "-").split("-"))
+
+
+class _RecordClassBuilder:
+    # Builds the Record classes of the containers and lists under a node of the tables of a CompiledModel
+
+    def __init__(self, model):
+        self.model = model
+
+    def build_path(self, path):
+        nodes = self.model.nodes
+        index = self.model.root[path[0]]
+        for name in path[1:]:
+            index = nodes[index][4]["children"][name]
+        return self.build(index, _class_name(path[-1]))
+
+    def build(self, index, class_name):
+        kind, name, module, schema_path, info = self.model.nodes[index]
+        fields = {}
+        for child_name, child_index in info["children"].items():
+            child_kind = self.model.nodes[child_index][0]
+            attribute = _attribute_name(child_name)
+            if child_kind in ("container", "list"):
+                child_class = self.build(child_index, class_name + _class_name(child_name))
+                load = _container_loader(child_class) if child_kind == "container" else _list_loader(child_class)
+                fields[child_name] = _Field(child_name, attribute, child_kind, load, child_class)
+            else:
+                fields[child_name] = _Field(child_name, attribute, child_kind, self.model.node_loader(child_index))
+        return type(class_name, (Record,), {
+            "__slots__": tuple(field.attribute for field in fields.values()),
+            "_fields": fields,
+            "_keys": info.get("keys", ()),
+            "_presence": info.get("presence", False),
+            "_schema_path": schema_path,
+        })
+
+
+def _container_loader(record_class):
+    def load_container(value, force):
+        return record_class.from_dict(value, force)
+
+    return load_container
+
+
+def _list_loader(record_class):
+    key_attributes = tuple(record_class._fields[key].attribute for key in record_class._keys)
+
+    def load_list(value, force):
+        if isinstance(value, dict):
+            if force or not value:
+                return SKIPPED
+            raise CompiledValidationError("Unknown element '{}'".format(next(iter(value))))
+        if not isinstance(value, list):
+            raise CompiledValidationError("Expected a list, got {}".format(type(value).__name__))
+        entries = []
+        seen = set()
+        for position, entry in enumerate(value):
+            try:
+                entry = record_class.from_dict(entry, force)
+            except CompiledValidationError as e:
+                e.path.insert(0, str(position))
+                raise
+            if key_attributes:
+                entry_key = tuple(getattr(entry, attribute) for attribute in key_attributes)
+                if None in entry_key:
+                    raise CompiledValidationError("Missing key", [str(position)])
+                if entry_key in seen:
+                    raise CompiledValidationError(
+                        "Duplicated key {}".format(" ".join(str(k) for k in entry_key)), [str(position)])
+                seen.add(entry_key)
+            entries.append(entry)
+        return entries or SKIPPED
+
+    return load_list
@@ -13,69 +13,339 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
 import yaml
 import importlib
-from osm_im.vnfd import vnfd as vnfd_im
-from osm_im.nsd import nsd as nsd_im
-from osm_im.nst import nst as nst_im
-from osm_im import etsi_nfv_vnfd, etsi_nfv_nsd
-from pyangbind.lib.serialise import pybindJSONDecoder
-import pyangbind.lib.pybindJSON as pybindJSON
+from collections.abc import Mapping
+from osm_im import instrumentation
+from osm_im.compiled_validation import get_compiled_model, CompiledValidationError
+from osm_im.constraints import check_constraints
+from osm_im.parallel import process_pool_imap, get_async_executor
+from pyangbind.lib.serialise import pybindJSONDecoder, pybindIETFJSONEncoder, IETFYangDataSerialiser
+
+try:
+    from yaml import CSafeLoader as YamlSafeLoader
+except ImportError:
+    # PyYAML built without LibYAML
+    from yaml import SafeLoader as YamlSafeLoader
+
+VALIDATION_ENGINES = ("pyangbind", "compiled")
+
+# Top level keys identifying the type of a descriptor
+DESCRIPTOR_TYPES = {
+    "vnfd:vnfd-catalog": "vnfd",
+    "vnfd-catalog": "vnfd",
+    "nsd:nsd-catalog": "nsd",
+    "nsd-catalog": "nsd",
+    "nst": "nst",
+    "vnfd": "etsi_nfv_vnfd",
+    "nsd": "etsi_nfv_nsd",
+}
+
+# Generated pyangbind module and root class of every descriptor type. Modules are only
+# imported the first time a descriptor of that type is validated
+MODEL_CLASSES = {
+    "vnfd": ("osm_im.vnfd", "vnfd"),
+    "nsd": ("osm_im.nsd", "nsd"),
+    "nst": ("osm_im.nst", "nst"),
+    "etsi_nfv_vnfd": ("osm_im.etsi_nfv_vnfd", "etsi_nfv_vnfd"),
+    "etsi_nfv_nsd": ("osm_im.etsi_nfv_nsd", "etsi_nfv_nsd"),
+}
+
+_model_classes = {}
+
+
+def get_model_class(item):
+    '''
+    Returns the pyangbind root class for a descriptor type (vnfd, nsd, nst, etsi_nfv_vnfd, etsi_nfv_nsd),
+    importing its generated module the first time it is needed
+    '''
+    model_class = _model_classes.get(item)
+    if model_class is None:
+        if item not in MODEL_CLASSES:
+            raise KeyError(item)
+        module_name, class_name = MODEL_CLASSES[item]
+        model_class = getattr(importlib.import_module(module_name), class_name)
+        _model_classes[item] = model_class
+    return model_class
+
 
 class ValidationException(Exception):
     pass
 
 class Validation:
 
-    def pyangbind_validation(self, item, data, force=False):
+    def __init__(self, engine="pyangbind", cache=None, constraints=False, strict=False):
+        '''
+        engine: pyangbind to validate building the pyangbind object tree, or compiled to use the
+        validator tables generated by 'make models' (same accept/reject results, much faster)
+        cache: optional osm_im.validation_cache.ValidationCache with the normalized output of
+        already validated descriptors
+        constraints: True to also check the leafref, must and when constraints of the descriptors,
+        see constraint_validation
+        strict: True for the compiled engine and the subtree validation to reject the inconsistent data that
+        pyangbind accepts: duplicated list keys, lists given for a scalar leaf and identityref values with the
+        prefix of another module (see compiled_validation.CompiledModel)
+        '''
+        if engine not in VALIDATION_ENGINES:
+            raise ValidationException("Unknown validation engine '{}'. Expected values: {}"
+                                      .format(engine, ", ".join(VALIDATION_ENGINES)))
+        self.engine = engine
+        self.cache = cache
+        self.constraints = constraints
+        self.strict = strict
+
+    def pyangbind_validation(self, item, data, force=False, return_normalized=True):
         '''
         item: vnfd, nst, nsd
         data: dict object loaded from the descriptor file
         force: True to skip unknown fields in the descriptor
+        return_normalized: False to only validate, returning None instead of the normalized descriptor
+        When the compiled engine is selected, the validation is done by compiled_validation.
+        When constraints are enabled, they are checked by constraint_validation after the engine validation.
+        When there is a cache, descriptors already validated are not validated again
         '''
-        if item == "vnfd":
-            myobj = vnfd_im()
-        elif item == "nsd":
-            myobj = nsd_im()
-        elif item == "nst":
-            myobj = nst_im()
-        elif item == "etsi_nfv_vnfd":
-            myobj = etsi_nfv_vnfd.etsi_nfv_vnfd()
-        elif item == "etsi_nfv_nsd":
-            myobj = etsi_nfv_nsd.etsi_nfv_nsd()
-        else:
+        with instrumentation.stage("pyangbind_validation", data):
+            if self.cache is None:
+                return self._engine_validation(item, data, force, return_normalized)
+            with instrumentation.stage("cache_get"):
+                key = self.cache.key(item, data, force, self.constraints, self.engine, self.strict)
+                desc_out = self.cache.get(key) if key is not None else None
+            if key is None:
+                return self._engine_validation(item, data, force, return_normalized)
+            if desc_out is None:
+                desc_out = self._engine_validation(item, data, force, True)
+                with instrumentation.stage("cache_set"):
+                    self.cache.set(key, desc_out)
+            return desc_out if return_normalized else None
+
+    def _engine_validation(self, item, data, force, return_normalized):
+        desc_out = self._schema_validation(item, data, force, return_normalized)
+        if self.constraints:
+            self.constraint_validation(item, data)
+        return desc_out
+
+    def _schema_validation(self, item, data, force, return_normalized):
+        if self.engine == "compiled":
+            desc_out = self.compiled_validation(item, data, force)
+            return desc_out if return_normalized else None
+        try:
+            myobj = get_model_class(item)()
+        except KeyError:
             raise ValidationException("Not possible to validate '{}' item".format(item))
 
         try:
-            pybindJSONDecoder.load_ietf_json(data, None, None, obj=myobj,
-                                             path_helper=True, skip_unknown=force)
-            out = pybindJSON.dumps(myobj, mode="ietf")
-            desc_out = yaml.safe_load(out)
-            return desc_out
+            with instrumentation.stage("load_ietf_json"):
+                pybindJSONDecoder.load_ietf_json(data, None, None, obj=myobj,
+                                                 path_helper=True, skip_unknown=force)
+            if not return_normalized:
+                return None
+            with instrumentation.stage("normalize"):
+                return self._normalize(myobj)
         except Exception as e:
             raise ValidationException("Error in pyangbind validation: {}".format(str(e)))
 
-    def yaml_validation(self, descriptor):
+    @staticmethod
+    def _normalize(myobj):
+        '''
+        Builds the IETF JSON representation of a pyangbind object as plain python objects.
+        Same result as pybindJSON.dumps(myobj, mode="ietf") loaded back, without serializing it
+        '''
+        tree = pybindIETFJSONEncoder.generate_element(myobj, flt=True)
+        return IETFYangDataSerialiser().preprocess_element(tree)
+
+    def compiled_validation(self, item, data, force=False):
+        '''
+        item: vnfd, nst, nsd, etsi_nfv_vnfd, etsi_nfv_nsd
+        data: dict object loaded from the descriptor file
+        force: True to skip unknown fields in the descriptor
+        Validates the plain dict against the generated validator tables, without building
+        the pyangbind object tree. Returns the normalized descriptor
+        '''
         try:
-            data = yaml.safe_load(descriptor)
-        except Exception as e:
-            raise ValidationException("Error in YAML validation. Not a proper YAML file: {}".format(e))
-        if 'vnfd:vnfd-catalog' in data or 'vnfd-catalog' in data:
-            item = "vnfd"
-        elif 'nsd:nsd-catalog' in data or 'nsd-catalog' in data:
-            item = "nsd"
-        elif 'nst' in data:
-            item = "nst"
-        elif 'vnfd' in data:
-            item = "etsi_nfv_vnfd"
-        elif 'nsd' in data:
-            item = "etsi_nfv_nsd"
+            model = get_compiled_model(item, self.strict)
+        except KeyError:
+            raise ValidationException("Not possible to validate '{}' item".format(item))
+        try:
+            with instrumentation.stage("compiled_validation"):
+                return model.validate(data, force)
+        except CompiledValidationError as e:
+            raise ValidationException("Error in compiled validation: {}".format(e))
+
+    def constraint_validation(self, item, data):
+        '''
+        item: vnfd, nst, nsd, etsi_nfv_vnfd, etsi_nfv_nsd
+        data: dict object loaded from the descriptor file, already validated against its schema
+        Checks the leafref, must and when constraints of the descriptor with the constraints compiled from the
+        validator tables. Raises a ValidationException listing every violation with its schema path
+        '''
+        try:
+            with instrumentation.stage("constraint_validation"):
+                violations = check_constraints(item, data)
+        except KeyError:
+            raise ValidationException("Not possible to validate '{}' item".format(item))
+        if violations:
+            raise ValidationException("Error in constraint validation: {}".format(
+                "; ".join(str(violation) for violation in violations)))
+
+    def subtree_validation(self, item, path, subtree, document=None, previous=None, force=False):
+        '''
+        item: vnfd, nst, nsd, etsi_nfv_vnfd, etsi_nfv_nsd
+        path: JSON pointer of the changed subtree in the descriptor (/vnfd:vnfd-catalog/vnfd/0/vdu/1), or its
+        schema path (/vnfd/vdu) to validate a subtree on its own
+        subtree: value of the subtree, a mapping for a list entry
+        document: optional descriptor with the change applied, to check the leafrefs and list keys touched by
+        the change against the rest of the descriptor
+        previous: optional value of the subtree before the change, so that leafrefs referencing it are only
+        checked when the change removes some of their targets
+        force: True to skip unknown fields in the subtree
+        Validates only the subtree, whatever the engine, with the compiled validator tables.
+        Returns the normalized subtree
+        '''
+        try:
+            model = get_compiled_model(item, self.strict)
+        except KeyError:
+            raise ValidationException("Not possible to validate '{}' item".format(item))
+        try:
+            with instrumentation.stage("subtree_validation", subtree):
+                return model.validate_subtree(path, subtree, document, previous, force)
+        except CompiledValidationError as e:
+            raise ValidationException("Error in subtree validation: {}".format(e))
+
+    def yaml_validation(self, descriptor):
+        '''
+        descriptor: descriptor file content as str or bytes (YAML or JSON), a file object open on the descriptor
+        file, or an already parsed dict
+        Returns the descriptor type and the parsed descriptor
+        '''
+        if isinstance(descriptor, dict):
+            data = descriptor
         else:
+            try:
+                with instrumentation.stage("parse", descriptor):
+                    data = parse_descriptor(descriptor)
+            except Exception as e:
+                raise ValidationException("Error in YAML validation. Not a proper YAML file: {}".format(e))
+        item = get_descriptor_type(data)
+        if item is None:
             raise ValidationException("Error in YAML validation. Not possible to determine the type of descriptor in the first line. Expected values: vnfd:vnfd-catalog, vnfd-catalog, nsd:nsd-catalog, nsd-catalog, nst")
 
         return item, data
 
     def descriptor_validation(self, descriptor):
-        item, data = self.yaml_validation(descriptor)
-        self.pyangbind_validation(item, data)
+        with instrumentation.stage("descriptor_validation", descriptor):
+            item, data = self.yaml_validation(descriptor)
+            self.pyangbind_validation(item, data, return_normalized=False)
+
+    async def adescriptor_validation(self, descriptor, timeout=None, executor=None):
+        '''
+        Same as descriptor_validation without blocking the event loop, run by executor, an
+        osm_im.parallel.AsyncExecutor (get_async_executor() when None).
+        timeout: seconds, None for the default timeout of the executor. Raises TimeoutError when exceeded
+        '''
+        await (executor or get_async_executor()).run(self.descriptor_validation, descriptor, timeout=timeout)
+
+    def validate_many(self, descriptors, workers=None, ordered=True, force=False, return_normalized=True):
+        '''
+        descriptors: iterable of descriptor file contents
+        workers: number of worker processes, None for one per CPU, 0 to validate in this process
+        ordered: True to yield results in input order, False in completion order
+        force: True to skip unknown fields in the descriptors
+        return_normalized: False to yield None instead of the normalized descriptors
+        Yields (index, item_type, normalized_or_error) for every descriptor. Errors are yielded as
+        ValidationException instances instead of being raised; item_type is None when the
+        descriptor type could not be determined
+        '''
+        if workers == 0:
+            for index, descriptor in enumerate(descriptors):
+                yield _validate_descriptor(self, index, descriptor, force, return_normalized)
+            return
+
+        yield from process_pool_imap(
+            _worker_validation,
+            ((index, descriptor, force, return_normalized) for index, descriptor in enumerate(descriptors)),
+            workers, ordered, initializer=_init_worker, initargs=(self.engine, self.cache, self.constraints))
+
+
+def get_descriptor_type(data):
+    '''
+    Returns the type of a parsed descriptor (vnfd, nsd, nst, etsi_nfv_vnfd, etsi_nfv_nsd) given by its
+    first top level key that identifies a descriptor type, or None if it cannot be determined
+    '''
+    if not isinstance(data, Mapping):
+        return None
+    for key in data:
+        if key in DESCRIPTOR_TYPES:
+            return DESCRIPTOR_TYPES[key]
+    return None
+
+
+def sniff_descriptor_type(descriptor):
+    '''
+    Same as get_descriptor_type, but for a YAML or JSON descriptor not parsed yet (str, bytes or file object).
+    Only the events of the stream up to the first key identifying the descriptor type are parsed, so
+    descriptors can be routed before paying for their full parse. Returns None if the type cannot be determined
+    '''
+    if isinstance(descriptor, dict):
+        return get_descriptor_type(descriptor)
+    depth = 0
+    expecting_key = False
+    try:
+        for event in yaml.parse(descriptor, Loader=YamlSafeLoader):
+            if isinstance(event, (yaml.MappingStartEvent, yaml.SequenceStartEvent)):
+                if depth == 0 and not isinstance(event, yaml.MappingStartEvent):
+                    return None
+                if depth <= 1:
+                    # after the root mapping start, or after a top level value, a top level key comes
+                    expecting_key = True
+                depth += 1
+            elif isinstance(event, (yaml.MappingEndEvent, yaml.SequenceEndEvent)):
+                depth -= 1
+                if depth == 0:
+                    return None
+            elif depth == 1 and isinstance(event, (yaml.ScalarEvent, yaml.AliasEvent)):
+                if expecting_key and getattr(event, "value", None) in DESCRIPTOR_TYPES:
+                    return DESCRIPTOR_TYPES[event.value]
+                expecting_key = not expecting_key
+    except yaml.YAMLError:
+        return None
+    return None
+
+
+def parse_descriptor(descriptor):
+    '''
+    Parses a YAML or JSON descriptor (str, bytes or a file object open in text or binary mode), using LibYAML
+    when it is available. JSON documents are parsed with the json module, much faster than any YAML parser
+    '''
+    if not isinstance(descriptor, (str, bytes, bytearray)):
+        descriptor = descriptor.read()
+    if descriptor.lstrip()[:1] in ("{", b"{"):
+        try:
+            return json.loads(descriptor)
+        except ValueError:
+            # flow style YAML mapping, not JSON
+            pass
+    return yaml.load(descriptor, Loader=YamlSafeLoader)
+
+
+_worker_validation_instance = None
+
+
+def _init_worker(engine, cache, constraints):
+    global _worker_validation_instance
+    _worker_validation_instance = Validation(engine=engine, cache=cache, constraints=constraints)
+
+
+def _worker_validation(index, descriptor, force, return_normalized):
+    return _validate_descriptor(_worker_validation_instance, index, descriptor, force, return_normalized)
+
 
+def _validate_descriptor(validation, index, descriptor, force, return_normalized):
+    item = None
+    try:
+        item, data = validation.yaml_validation(descriptor)
+        return index, item, validation.pyangbind_validation(item, data, force, return_normalized)
+    except ValidationException as e:
+        return index, item, e
+    except Exception as e:
+        return index, item, ValidationException("Error in descriptor validation: {}".format(e))
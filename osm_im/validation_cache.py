@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from importlib.metadata import version as package_version, PackageNotFoundError
+
+
+def model_version():
+    '''
+    Version of the installed osm_im package (set by setuptools_scm), used to invalidate
+    cached results when the models change
+    '''
+    try:
+        return package_version("osm_im")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+class SqliteCacheBackend:
+    '''
+    Stores cached results in a sqlite database, that can be shared by several processes. The threads of a
+    process share its connection, one at a time
+    '''
+
+    def __init__(self, path, timeout=30):
+        self.path = path
+        self.timeout = timeout
+        self._connection = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_connection(self):
+        # sqlite connections must not be shared with forked processes
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                               check_same_thread=False)
+            self._connection.execute("CREATE TABLE IF NOT EXISTS validation_cache "
+                                     "(key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._pid = os.getpid()
+        return self._connection
+
+    def get(self, key):
+        with self._lock:
+            row = self._get_connection().execute("SELECT value FROM validation_cache WHERE key = ?",
+                                                 (key,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value):
+        with self._lock:
+            self._get_connection().execute("INSERT OR REPLACE INTO validation_cache (key, value) VALUES (?, ?)",
+                                           (key, value))
+
+    def __getstate__(self):
+        return {"path": self.path, "timeout": self.timeout}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
+class DirectoryCacheBackend:
+    '''
+    Stores every cached result in its own file inside a directory, that can be shared by several processes
+    '''
+
+    def __init__(self, path):
+        self.path = path
+
+    def _file(self, key):
+        return os.path.join(self.path, key[:2], key + ".json")
+
+    def get(self, key):
+        try:
+            with open(self._file(key), "r") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def set(self, key, value):
+        file = self._file(key)
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        # Write to a temporary file first so that other processes never read a partial entry
+        fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(file), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(value)
+            os.replace(tmp_file, file)
+        except Exception:
+            os.unlink(tmp_file)
+            raise
+
+
+class ValidationCache:
+    '''
+    Content-addressed cache of normalized descriptors.
+    Entries are keyed by a hash of the descriptor content, the descriptor type, the validation engine, the force,
+    constraints and strict flags and the model version. Up to maxsize entries are kept in memory, evicting the
+    least recently used ones; the optional backend (SqliteCacheBackend, DirectoryCacheBackend) is looked up on
+    memory misses.
+    Entries are kept serialized, so every hit returns an independent copy
+    '''
+
+    def __init__(self, maxsize=1024, backend=None, version=None):
+        self.maxsize = maxsize
+        self.backend = backend
+        self.version = version if version is not None else model_version()
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, item, data, force=False, constraints=False, engine="pyangbind", strict=False):
+        '''
+        Returns the key of a descriptor, or None when it has values of other types than the ones the YAML safe
+        loader builds, so it is not cached
+        '''
+        try:
+            if _is_plain_json(data):
+                content = json.dumps(data, sort_keys=True, separators=(",", ":"))
+            else:
+                # keys that are not strings and scalars that are not JSON ones (dates) keep their type in the key
+                content = "tagged:" + _tagged_encoding(data)
+        except TypeError:
+            return None
+        key_data = "{}\n{}\n{}\n{}\n{}".format(self.version, engine, item, bool(force), content)
+        if constraints:
+            # descriptors validated with their constraints checked are cached apart
+            key_data += "\nconstraints"
+        if strict and engine == "compiled":
+            key_data += "\nstrict"
+        return hashlib.sha256(key_data.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        '''
+        Returns a copy of the cached normalized descriptor, or None if it is not cached
+        '''
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+        if value is None and self.backend is not None:
+            value = self.backend.get(key)
+            if value is not None:
+                self._store(key, value)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(value)
+
+    def set(self, key, normalized):
+        value = json.dumps(normalized, separators=(",", ":"))
+        self._store(key, value)
+        if self.backend is not None:
+            self.backend.set(key, value)
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "maxsize": self.maxsize}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getstate__(self):
+        # Only the configuration is sent to other processes, each one keeps its own memory entries
+        return {"maxsize": self.maxsize, "backend": self.backend, "version": self.version}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
+_JSON_SCALAR_TYPES = (str, int, float, bool, type(None))
+# Other scalar types built by the YAML safe loader
+_TAGGED_SCALAR_TYPES = (bytes, datetime.date, datetime.datetime)
+
+
+def _is_plain_json(data):
+    # True when every mapping key is a string and every scalar a JSON one, so json.dumps keeps the types
+    if type(data) is dict:
+        if any(type(key) is not str for key in data):
+            return False
+        items = data.values()
+    elif type(data) is list:
+        items = data
+    else:
+        return type(data) in _JSON_SCALAR_TYPES
+    for item in items:
+        item_type = type(item)
+        if item_type is dict or item_type is list:
+            if not _is_plain_json(item):
+                return False
+        elif item_type not in _JSON_SCALAR_TYPES:
+            return False
+    return True
+
+
+def _tagged_encoding(data):
+    # Canonical encoding of any descriptor: scalars other than strings are tagged with their type and mappings
+    # and sets are sorted by the encoding of their members. Raises TypeError for types the YAML safe loader
+    # does not build
+    if isinstance(data, str):
+        return json.dumps(data)
+    if isinstance(data, Mapping):
+        entries = sorted((_tagged_encoding(key), _tagged_encoding(value)) for key, value in data.items())
+        return "{" + ",".join("{}:{}".format(key, value) for key, value in entries) + "}"
+    if isinstance(data, list):
+        return "[" + ",".join(_tagged_encoding(item) for item in data) + "]"
+    if isinstance(data, tuple):
+        return "tuple[" + ",".join(_tagged_encoding(item) for item in data) + "]"
+    if isinstance(data, (set, frozenset)):
+        return "set{" + ",".join(sorted(_tagged_encoding(item) for item in data)) + "}"
+    if data is None or type(data) in _JSON_SCALAR_TYPES + _TAGGED_SCALAR_TYPES:
+        return "{}({!r})".format(type(data).__name__, data)
+    raise TypeError("Cannot encode {} values".format(type(data).__name__))
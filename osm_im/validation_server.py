@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''
+Long-running validation and translation server for short-lived clients (CLI, CI linters, NBI workers), which
+otherwise spend most of their time importing the generated models. The server imports every model once and
+forks a pool of workers sharing them, all accepting connections on the same socket.
+
+Requests and responses are one JSON document per line:
+    {"method": "descriptor_validation", "args": [descriptor]}
+    {"result": ...} or {"error": "ValidationException", "message": "..."}
+
+The default socket is only accessible by the user running the server, and clients only connect to sockets
+owned by their own user (or root).
+
+Usage: python3 -m osm_im.validation_server [socket_path] [workers] [engine]
+'''
+
+import gc
+import json
+import os
+import signal
+import socket
+import stat
+import sys
+
+# Environment variable with the socket path of the server, used when no address is given
+ADDRESS_ENVIRONMENT_VARIABLE = "OSM_IM_VALIDATION_SOCKET"
+DEFAULT_SOCKET_NAME = "osm-im-validation.sock"
+
+
+def get_default_address():
+    '''
+    Returns the address in the environment, or the default socket in the runtime directory of the user:
+    $XDG_RUNTIME_DIR, or a directory in /tmp only accessible by the user, created when missing
+    '''
+    address = os.environ.get(ADDRESS_ENVIRONMENT_VARIABLE)
+    if address:
+        return address
+    directory = os.environ.get("XDG_RUNTIME_DIR")
+    if not directory:
+        directory = "/tmp/osm-im-{}".format(os.getuid())
+        try:
+            os.mkdir(directory, 0o700)
+        except FileExistsError:
+            pass
+        info = os.lstat(directory)
+        if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+            raise PermissionError("{} must be a directory only accessible by the current user".format(directory))
+    return os.path.join(directory, DEFAULT_SOCKET_NAME)
+
+
+def _descriptor_validation(validation, descriptor):
+    validation.descriptor_validation(descriptor)
+
+
+def _translate_im_model_to_sol006(validation, im_model_data, validate="full", validate_output=False):
+    from osm_im.im_translation import translate_im_model_to_sol006
+    return translate_im_model_to_sol006(im_model_data, validate, validate_output)
+
+
+# Methods served, run with the Validation instance of the worker, or of the client when it falls back
+_METHODS = {
+    "ping": lambda validation: True,
+    "descriptor_validation": _descriptor_validation,
+    "translate_im_model_to_sol006": _translate_im_model_to_sol006,
+}
+
+
+class ValidationServer:
+    '''
+    Pre-forked validation server.
+    address: path of the Unix socket, or (host, port) to listen on TCP (localhost only, there is no
+    authentication); None for get_default_address()
+    workers: number of worker processes, None for one per CPU
+    engine, constraints: configuration of the Validation instance of the workers
+    timeout: seconds a worker waits for the request of a connected client, every connection serves one request
+    serve_forever() runs the server until SIGTERM or SIGINT, replacing the workers that die.
+    start() and stop() run it in the background of the calling process
+    '''
+
+    def __init__(self, address=None, workers=None, engine="pyangbind", constraints=False, timeout=30):
+        self.address = address or get_default_address()
+        self.workers = workers or os.cpu_count() or 1
+        self.engine = engine
+        self.constraints = constraints
+        self.timeout = timeout
+        self.socket = None
+        self._pids = set()
+
+    def start(self):
+        '''
+        Listens on the address, imports the models and forks the workers
+        '''
+        self.socket = _listen(self.address)
+        try:
+            self._warm_up()
+            for _ in range(self.workers):
+                self._fork_worker()
+        except BaseException:
+            self.stop()
+            raise
+
+    def serve_forever(self):
+        self.start()
+        previous_handler = signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        try:
+            while self._pids:
+                pid, _ = os.wait()
+                if pid in self._pids:
+                    self._pids.discard(pid)
+                    self._fork_worker()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            signal.signal(signal.SIGTERM, previous_handler)
+            self.stop()
+
+    def stop(self):
+        '''
+        Terminates the workers and stops listening
+        '''
+        for pid in self._pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in self._pids:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        self._pids.clear()
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+            if isinstance(self.address, str):
+                try:
+                    os.unlink(self.address)
+                except FileNotFoundError:
+                    pass
+
+    def _warm_up(self):
+        # Imports everything the workers need before forking, so that they share it
+        from osm_im import im_translation  # noqa: F401
+        from osm_im.compiled_validation import get_compiled_model
+        from osm_im.constraints import get_constraint_checker
+        from osm_im.validation import MODEL_CLASSES, get_model_class
+        for item in MODEL_CLASSES:
+            try:
+                get_model_class(item)
+                if self.engine == "compiled":
+                    get_compiled_model(item)
+                if self.constraints:
+                    get_constraint_checker(item)
+            except ImportError:
+                # model not generated
+                continue
+        # Objects created so far are never collected, so that the collector does not touch (and copy) them
+        # in every worker
+        gc.freeze()
+
+    def _fork_worker(self):
+        pid = os.fork()
+        if pid:
+            self._pids.add(pid)
+            return
+        status = 0
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            self._serve()
+        except BaseException:
+            status = 1
+        finally:
+            os._exit(status)
+
+    def _serve(self):
+        from osm_im.validation import Validation
+        validation = Validation(engine=self.engine, constraints=self.constraints)
+        while True:
+            connection, _ = self.socket.accept()
+            with connection:
+                try:
+                    # idle or slow clients cannot keep the worker
+                    connection.settimeout(self.timeout)
+                    line = connection.makefile("rb").readline()
+                    if line:
+                        connection.sendall(_handle_request(validation, line))
+                except OSError:
+                    # client gone or timed out
+                    pass
+
+
+class ValidationClient:
+    '''
+    Client of a ValidationServer, with the same methods and exceptions as validating and translating in process.
+    address: address of the server, None for get_default_address()
+    fallback: True to validate in this process when the server is not running, importing the models on the
+    first use; False to raise the connection error. A socket owned by another user raises PermissionError
+    timeout: timeout in seconds of every socket operation, None to wait for ever
+    engine, constraints: configuration of the Validation instance used on fallback
+    '''
+
+    def __init__(self, address=None, fallback=True, timeout=None, engine="pyangbind", constraints=False):
+        self.address = address or get_default_address()
+        self.fallback = fallback
+        self.timeout = timeout
+        self.engine = engine
+        self.constraints = constraints
+        self._validation = None
+
+    def descriptor_validation(self, descriptor):
+        if isinstance(descriptor, bytes):
+            descriptor = descriptor.decode("utf-8")
+        self._call("descriptor_validation", descriptor)
+
+    def translate_im_model_to_sol006(self, im_model_data, validate="full", validate_output=False):
+        return self._call("translate_im_model_to_sol006", im_model_data, validate, validate_output)
+
+    def is_server_running(self):
+        try:
+            return self._remote_call("ping")
+        except (FileNotFoundError, ConnectionRefusedError):
+            return False
+
+    def _call(self, method, *args):
+        try:
+            return self._remote_call(method, *args)
+        except (FileNotFoundError, ConnectionRefusedError):
+            if not self.fallback:
+                raise
+        if self._validation is None:
+            from osm_im.validation import Validation
+            self._validation = Validation(engine=self.engine, constraints=self.constraints)
+        return _METHODS[method](self._validation, *args)
+
+    def _remote_call(self, method, *args):
+        connection = _connect(self.address, self.timeout)
+        with connection:
+            connection.sendall(json.dumps({"method": method, "args": args}).encode("utf-8") + b"\n")
+            response = connection.makefile("rb").readline()
+        if not response:
+            from osm_im.validation import ValidationException
+            raise ValidationException("Error in validation server: connection closed without a response")
+        response = json.loads(response)
+        if "error" in response:
+            raise _remote_exception(response["error"], response["message"])
+        return response["result"]
+
+
+def _socket_family(address):
+    return socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+
+
+def _connect(address, timeout=None):
+    if isinstance(address, str):
+        owner = os.stat(address).st_uid
+        if owner not in (os.getuid(), 0):
+            raise PermissionError("{} is owned by uid {}, not by the current user".format(address, owner))
+    connection = socket.socket(_socket_family(address), socket.SOCK_STREAM)
+    try:
+        connection.settimeout(timeout)
+        connection.connect(address if isinstance(address, str) else tuple(address))
+    except BaseException:
+        connection.close()
+        raise
+    return connection
+
+
+def _listen(address):
+    if isinstance(address, str) and os.path.exists(address):
+        try:
+            _connect(address, timeout=1).close()
+        except (ConnectionRefusedError, FileNotFoundError):
+            # left by a server that did not stop cleanly
+            os.unlink(address)
+        else:
+            raise OSError("A validation server is already listening on {}".format(address))
+    listener = socket.socket(_socket_family(address), socket.SOCK_STREAM)
+    try:
+        if not isinstance(address, str):
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind(address if isinstance(address, str) else tuple(address))
+        if isinstance(address, str):
+            os.chmod(address, 0o600)
+        listener.listen(socket.SOMAXCONN)
+    except BaseException:
+        listener.close()
+        raise
+    return listener
+
+
+def _handle_request(validation, line):
+    try:
+        request = json.loads(line)
+        response = {"result": _METHODS[request["method"]](validation, *request.get("args", ()))}
+    except Exception as e:
+        response = {"error": type(e).__name__, "message": str(e)}
+    return json.dumps(response, default=str).encode("utf-8") + b"\n"
+
+
+def _remote_exception(error, message):
+    from osm_im.im_translation import TranslationException
+    from osm_im.validation import ValidationException
+    if error == "TranslationException":
+        return TranslationException(message)
+    if error == "ValidationException":
+        return ValidationException(message)
+    return ValidationException("Error in validation server: {}: {}".format(error, message))
+
+
+def main(argv):
+    address = argv[0] if argv else None
+    workers = int(argv[1]) if len(argv) > 1 else None
+    engine = argv[2] if len(argv) > 2 else "pyangbind"
+    ValidationServer(address, workers, engine).serve_forever()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
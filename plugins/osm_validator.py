@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""pyang output plugin generating flat validator tables.
+
+The generated python module only contains literals (NODES, TYPES, ROOT, IDENTITIES) describing
+the data tree of the compiled YANG modules. It is consumed by
+osm_im.compiled_validation, which turns the tables into validation functions that
+work directly over plain dicts, without building pyangbind object trees.
+
+Usage: pyang --plugindir plugins -f osm-validator -o <out>_tables.py <modules>
+"""
+
+import pprint
+from decimal import Decimal
+
+from pyang import plugin, types
+
+DATA_KEYWORDS = ("container", "list", "leaf", "leaf-list", "choice", "case", "anyxml", "anydata")
+
+
+def pyang_plugin_init():
+    plugin.register_plugin(ValidatorTablesPlugin())
+
+
+class ValidatorTablesPlugin(plugin.PyangPlugin):
+    def add_output_format(self, fmts):
+        self.multiple_modules = True
+        fmts["osm-validator"] = self
+
+    def emit(self, ctx, modules, fd):
+        builder = _TablesBuilder(ctx)
+        for module in modules:
+            for child in _data_children(module):
+                builder.add_node(child, None, "")
+        builder.write(fd, [m.arg for m in modules])
+
+
+def _data_children(stmt):
+    for child in getattr(stmt, "i_children", ()):
+        if child.keyword not in DATA_KEYWORDS:
+            continue
+        if child.keyword in ("choice", "case"):
+            # choices and cases are not part of the data tree, pyangbind also flattens them
+            yield from _data_children(child)
+        else:
+            yield child
+
+
+def _module_name(stmt):
+    return stmt.i_module.i_modulename
+
+
+def _argument(stmt):
+    return stmt.arg if stmt is not None else None
+
+
+def _when_conditions(stmt):
+    # (xpath, True when the context node is the parent data node) of the when statements that apply to a data
+    # node: its own, and the ones of the augment and the choices and cases that add it to the data tree
+    conditions = [(when.arg, False) for when in stmt.search("when")]
+    augment = getattr(stmt, "i_augment", None)
+    if augment is not None:
+        conditions.extend((when.arg, True) for when in augment.search("when"))
+    parent = stmt.parent
+    while parent is not None and parent.keyword in ("choice", "case"):
+        conditions.extend((when.arg, True) for when in parent.search("when"))
+        parent = parent.parent
+    return conditions
+
+
+def _bound(value):
+    if value in ("min", "max", None):
+        return None
+    if isinstance(value, types.Decimal64Value):
+        return str(Decimal(value.value).scaleb(-value.fd))
+    return value
+
+
+class _TablesBuilder:
+    def __init__(self, ctx):
+        self.ctx = ctx
+        self.nodes = []
+        self.types = []
+        self.types_index = {}
+        self.root = {}
+        self.prefixes = None
+
+    def add_node(self, stmt, parent, parent_path):
+        module = _module_name(stmt)
+        if parent is None or self.nodes[parent][2] != module:
+            path = "{}/{}:{}".format(parent_path, module, stmt.arg)
+        else:
+            path = "{}/{}".format(parent_path, stmt.arg)
+        info = {}
+        index = len(self.nodes)
+        self.nodes.append((stmt.keyword, stmt.arg, module, path, info))
+        children = self.root if parent is None else self.nodes[parent][4]["children"]
+        children[stmt.arg] = index
+
+        musts = [(must.arg, _argument(must.search_one("error-message"))) for must in stmt.search("must")]
+        if musts:
+            info["must"] = musts
+        whens = _when_conditions(stmt)
+        if whens:
+            info["when"] = whens
+
+        if stmt.keyword in ("container", "list"):
+            info["children"] = {}
+            if stmt.keyword == "container":
+                info["presence"] = stmt.search_one("presence") is not None
+            else:
+                key = stmt.search_one("key")
+                info["keys"] = tuple(key.arg.split()) if key is not None else ()
+                info["unique"] = [tuple(u.arg.split()) for u in stmt.search("unique")]
+            for child in _data_children(stmt):
+                self.add_node(child, index, path)
+        elif stmt.keyword in ("leaf", "leaf-list"):
+            info["type"] = self.add_type(stmt.search_one("type"))
+            if stmt.keyword == "leaf":
+                parent_keys = self.nodes[parent][4].get("keys", ()) if parent is not None else ()
+                info["key"] = stmt.arg in parent_keys
+        return index
+
+    def add_type(self, type_stmt):
+        if type_stmt is None:
+            return self._type_index(("string", {}))
+        return self._type_index(self.build_type(type_stmt))
+
+    def _type_index(self, type_entry):
+        key = repr(type_entry)
+        if key not in self.types_index:
+            self.types_index[key] = len(self.types)
+            self.types.append(type_entry)
+        return self.types_index[key]
+
+    def build_type(self, type_stmt):
+        spec = type_stmt.i_type_spec
+        restrictions = {}
+        # Walk the chain of derived type specs (typedefs with their own restrictions)
+        # down to the built-in type, collecting every restriction found on the way
+        while spec is not None:
+            if isinstance(spec, types.RangeTypeSpec):
+                restrictions.setdefault("ranges", []).insert(
+                    0, [(_bound(lo), _bound(lo) if hi is None else _bound(hi)) for lo, hi in spec.ranges])
+            elif isinstance(spec, types.LengthTypeSpec):
+                restrictions.setdefault("lengths", []).insert(
+                    0, [(_bound(lo), _bound(lo) if hi is None else _bound(hi)) for lo, hi in spec.lengths])
+            elif isinstance(spec, types.PatternTypeSpec):
+                restrictions.setdefault("patterns", [])[0:0] = [(p.spec, p.invert_match) for p in spec.res]
+            elif isinstance(spec, types.EnumTypeSpec):
+                restrictions["enums"] = [name for name, _ in spec.enums]
+            elif isinstance(spec, types.IntTypeSpec):
+                restrictions.setdefault("ranges", []).insert(0, [(spec.min, spec.max)])
+                return (spec.name, restrictions)
+            elif isinstance(spec, types.Decimal64TypeSpec):
+                restrictions["fraction-digits"] = spec.fraction_digits
+                return ("decimal64", restrictions)
+            elif isinstance(spec, types.UnionTypeSpec):
+                return ("union", {"types": [self.add_type(t) for t in spec.types]})
+            elif isinstance(spec, types.PathTypeSpec):
+                restrictions["path"] = spec.path_.arg
+                target = getattr(spec, "i_target_node", None)
+                if target is not None:
+                    restrictions["target"] = _schema_path(target)
+                return ("leafref", restrictions)
+            elif isinstance(spec, types.IdentityrefTypeSpec):
+                restrictions["identities"] = self._derived_identities(spec.idbases)
+                return ("identityref", restrictions)
+            elif isinstance(spec, types.BitTypeSpec):
+                restrictions["bits"] = [name for name, _ in spec.bits]
+                return ("bits", restrictions)
+            elif spec.name in ("string", "boolean", "empty", "binary", "enumeration", "bits", "instance-identifier"):
+                return (spec.name, restrictions)
+            spec = spec.base
+        return ("string", restrictions)
+
+    def _derived_identities(self, idbases):
+        # (module, identity name) -> prefixes accepted before the name, the same ones as pyangbind accepts
+        identities = {}
+        prefixes = self._module_prefixes()
+        for module in self.ctx.modules.values():
+            for identity in module.i_identities.values():
+                if all(types.is_derived_from(identity, base.i_identity) for base in idbases):
+                    module_name = _module_name(identity)
+                    identities[(module_name, identity.arg)] = prefixes.get(module_name, (module_name,))
+        return dict(sorted(identities.items()))
+
+    def _module_prefixes(self):
+        # module name -> its name, its own prefix and the prefixes other modules import it with
+        if self.prefixes is None:
+            prefixes = {}
+            for module in self.ctx.modules.values():
+                module_prefixes = prefixes.setdefault(module.i_modulename, {module.i_modulename})
+                if module.i_prefix:
+                    module_prefixes.add(module.i_prefix)
+                for import_stmt in module.search("import"):
+                    prefix = import_stmt.search_one("prefix")
+                    if prefix is not None:
+                        prefixes.setdefault(import_stmt.arg, {import_stmt.arg}).add(prefix.arg)
+            self.prefixes = {name: tuple(sorted(module_prefixes)) for name, module_prefixes in prefixes.items()}
+        return self.prefixes
+
+    def _identities(self):
+        # (module, identity name) -> (module, name) of its bases, for derived-from in must and when expressions
+        identities = {}
+        for module in self.ctx.modules.values():
+            for identity in module.i_identities.values():
+                bases = [(_module_name(base.i_identity), base.i_identity.arg) for base in identity.search("base")
+                         if getattr(base, "i_identity", None) is not None]
+                identities[(_module_name(identity), identity.arg)] = tuple(bases)
+        return dict(sorted(identities.items()))
+
+    def write(self, fd, module_names):
+        fd.write("# -*- coding: utf-8 -*-\n")
+        fd.write("# Generated by the osm-validator pyang plugin from: {}\n".format(", ".join(module_names)))
+        fd.write("# Do not edit: regenerate with 'make models'\n\n")
+        fd.write("TYPES = {}\n\n".format(pprint.pformat(self.types, width=120)))
+        fd.write("NODES = {}\n\n".format(pprint.pformat(self.nodes, width=120)))
+        fd.write("ROOT = {}\n\n".format(pprint.pformat(self.root, width=120)))
+        fd.write("IDENTITIES = {}\n".format(pprint.pformat(self._identities(), width=120)))
+
+
+def _schema_path(stmt):
+    parts = []
+    while stmt is not None and stmt.keyword in DATA_KEYWORDS:
+        if stmt.keyword not in ("choice", "case"):
+            parts.insert(0, "{}:{}".format(_module_name(stmt), stmt.arg))
+        stmt = stmt.parent
+    return "/" + "/".join(parts)
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks"))
+from bench_suite import compare, missing  # noqa: E402
+
+BASELINE = {
+    "parse/a": {"value": 10.0, "unit": "ms"},
+    "parse/fast": {"value": 0.01, "unit": "ms"},
+    "memory/vnfd": {"value": 100, "unit": "KiB"},
+    "validate/a": {"value": 0, "unit": "ms"},
+}
+
+
+class BenchSuiteTest(unittest.TestCase):
+
+    def test_compare(self):
+        # (name, value, unit, regression reported)
+        cases = [
+            ("parse/a", 11.9, "ms", False),     # below the 20% threshold
+            ("parse/a", 12.1, "ms", True),      # above the threshold
+            ("parse/a", 5.0, "ms", False),      # faster
+            ("parse/fast", 0.05, "ms", False),  # 5x slower, but within the noise floor
+            ("parse/fast", 0.07, "ms", True),   # over the noise floor
+            ("memory/vnfd", 115, "KiB", False),  # 15% bigger, within the noise floor
+            ("memory/vnfd", 130, "KiB", True),
+            ("memory/vnfd", 130, "ms", False),  # other unit, reported by missing
+            ("validate/a", 1.0, "ms", True),    # from 0
+            ("parse/new", 100.0, "ms", False),  # not in the baseline
+        ]
+        for name, value, unit, regression in cases:
+            with self.subTest(name=name, value=value, unit=unit):
+                regressions = compare({name: {"value": value, "unit": unit}}, BASELINE, 0.2)
+                self.assertEqual([regression[0] for regression in regressions], [name] if regression else [])
+        self.assertEqual(compare({"parse/a": {"value": 12.1, "unit": "ms"}}, BASELINE, 0.3), [])
+        self.assertEqual(compare(BASELINE, BASELINE, 0.2), [])
+
+    def test_missing(self):
+        # (results, skipped, name filter, expected (name, reason) of the missing metrics)
+        cases = [
+            (BASELINE, {}, "", []),
+            ({name: result for name, result in BASELINE.items() if name != "parse/a"}, {}, "",
+             [("parse/a", "not measured")]),
+            (dict(BASELINE, **{"memory/vnfd": {"value": 100, "unit": "ms"}}), {}, "",
+             [("memory/vnfd", "unit changed from KiB to ms")]),
+            ({}, {"parse/a": "ImportError: no module\nTraceback", "parse/fast": ""}, "parse",
+             [("parse/a", "skipped: ImportError: no module"), ("parse/fast", "skipped: ")]),
+            # metrics not selected by the filter are not reported
+            ({}, {}, "memory", [("memory/vnfd", "not measured")]),
+            ({}, {}, "unknown", []),
+        ]
+        for results, skipped, name_filter, expected in cases:
+            with self.subTest(results=sorted(results), skipped=skipped, name_filter=name_filter):
+                self.assertEqual(missing(results, BASELINE, skipped, name_filter), expected)
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from osm_im.catalog_references import CatalogIndex
+import copy
+import unittest
+import yaml
+
+TESTS_EXAMPLES_FOLDER = 'tests/examples/'
+
+NST = {"nst": [{
+    "id": "slice",
+    "netslice-subnet": [{"id": "subnet", "nsd-ref": "hackfest3charmed-ns"}],
+    "netslice-connection-point": [{"name": "mgmt", "nsd-id-ref": "hackfest3charmed-ns"}],
+}]}
+
+
+class CatalogIndexTest(unittest.TestCase):
+
+    def _load_descriptor(self, file):
+        with open(TESTS_EXAMPLES_FOLDER + file, 'r') as descriptor_file:
+            return yaml.safe_load(descriptor_file)
+
+    def test_catalog_references(self):
+        index = CatalogIndex.from_sources([TESTS_EXAMPLES_FOLDER + 'hackfest_charmed_vnfd_sol006.yaml',
+                                           TESTS_EXAMPLES_FOLDER + 'cirros_vnfd_im.yaml',
+                                           TESTS_EXAMPLES_FOLDER + 'cirros_nsd_im.yaml'])
+        self.assertEqual(index.check_all(), [])
+        nsd = self._load_descriptor('hackfest_charmed_nsd_sol006.yaml')
+        self.assertEqual(index.check(nsd), [])
+        self.assertEqual(index.add(nsd), [])
+        self.assertEqual(index.add(NST), [])
+        self.assertIn(("nst", "slice"), index)
+
+        wrong_nsd = copy.deepcopy(nsd)
+        profile = wrong_nsd["nsd"]["nsd"][0]["df"][0]["vnf-profile"][1]
+        profile["virtual-link-connectivity"][0]["constituent-cpd-id"][0]["constituent-cpd-id"] = "unknown-ext"
+        self.assertEqual([str(reference) for reference in index.check(wrong_nsd)], [
+            "nsd 'hackfest3charmed-ns' /nsd/nsd/0/df/0/vnf-profile/1/virtual-link-connectivity/0/constituent-cpd-id"
+            "/0/constituent-cpd-id: ext-cpd 'unknown-ext' of vnfd 'hackfest3charmed-vnf' not found"])
+
+        # Replacing a VNFD reports the references it breaks, removing it every reference to it
+        vnfd = self._load_descriptor('hackfest_charmed_vnfd_sol006.yaml')
+        vnfd["vnfd"]["ext-cpd"].pop()
+        self.assertEqual([reference.value for reference in index.add(vnfd)], ["vnf-data-ext", "vnf-data-ext"])
+        self.assertEqual(len(index.remove("vnfd", "hackfest3charmed-vnf")), 7)
+        self.assertEqual(len(index.check_all()), 7)
+        self.assertEqual([reference.path for reference in index.remove("nsd", "hackfest3charmed-ns")],
+                         ["/nst/0/netslice-subnet/0/nsd-ref", "/nst/0/netslice-connection-point/0/nsd-id-ref"])
+        with self.assertRaises(KeyError):
+            index.remove("nsd", "hackfest3charmed-ns")
+
+    def test_im_vnfd_members_as_translated_to_sol006(self):
+        index = CatalogIndex()
+        index.add(self._load_descriptor('magma_knf_im.yaml'))
+        nsd = {"nsd": {"nsd": [{
+            "id": "magma-ns",
+            "vnfd-id": ["fb_magma_knf"],
+            "df": [{"id": "default-df", "vnf-profile": [{
+                "id": "1", "vnfd-id": "fb_magma_knf", "flavour-id": "default-df",
+                "virtual-link-connectivity": [{"virtual-link-profile-id": "mgmtnet", "constituent-cpd-id": [
+                    {"constituent-base-element-id": "1", "constituent-cpd-id": "mgmt-ext"}]}],
+            }]}],
+        }]}}
+        self.assertEqual(index.check(nsd), [])
+        profile = nsd["nsd"]["nsd"][0]["df"][0]["vnf-profile"][0]
+        profile["flavour-id"] = "other-df"
+        profile["virtual-link-connectivity"][0]["constituent-cpd-id"][0]["constituent-cpd-id"] = "mgmt"
+        self.assertEqual([(reference.member, reference.value) for reference in index.check(nsd)],
+                         [("df", "other-df"), ("ext-cpd", "mgmt")])
+
+    def test_descriptor_file_with_several_catalogs(self):
+        vnfd = self._load_descriptor('cirros_vnfd_im.yaml')
+        nsd = self._load_descriptor('cirros_nsd_im.yaml')
+        index = CatalogIndex()
+        self.assertEqual(index.add(dict(vnfd, **nsd)), [])
+        self.assertIn(("vnfd", "cirros_vnfd"), index)
+        self.assertIn(("nsd", "cirros_2vnf_nsd"), index)
+        self.assertEqual(len(index.remove("vnfd", "cirros_vnfd")), 4)
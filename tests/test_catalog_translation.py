@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from osm_im.catalog_translation import translate_catalog_stream, iter_im_catalog_descriptors
+from osm_im.im_translation import translate_im_model_to_sol006
+import copy
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import yaml
+
+TESTS_EXAMPLES_FOLDER = 'tests/examples/'
+
+
+class CatalogTranslationTest(unittest.TestCase):
+
+    def _load(self, file):
+        with open(TESTS_EXAMPLES_FOLDER + file, 'r') as descriptor_file:
+            return yaml.safe_load(descriptor_file.read())
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.catalog_dir = os.path.join(self.tmp_dir, 'catalog')
+        os.makedirs(os.path.join(self.catalog_dir, 'nsds'))
+        cirros_vnfd = self._load('cirros_vnfd_im.yaml')
+        vepc_vnfd = self._load('vepc_im.yaml')
+        # A catalog with two descriptors, both must be translated
+        self.multi_vnfd_catalog = {'vnfd:vnfd-catalog': {'vnfd': (cirros_vnfd['vnfd:vnfd-catalog']['vnfd'] +
+                                                                 vepc_vnfd['vnfd:vnfd-catalog']['vnfd'])}}
+        with open(os.path.join(self.catalog_dir, 'vnfds.yaml'), 'w') as f:
+            yaml.safe_dump(self.multi_vnfd_catalog, f)
+        shutil.copy(TESTS_EXAMPLES_FOLDER + 'cirros_nsd_im.yaml', os.path.join(self.catalog_dir, 'nsds'))
+        shutil.copy(TESTS_EXAMPLES_FOLDER + 'cirros_vnfd_sol006.yaml', self.catalog_dir)
+        with open(os.path.join(self.catalog_dir, 'broken.yaml'), 'w') as f:
+            f.write('vnfd-catalog: [')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_iter_im_catalog_descriptors(self):
+        descriptors = list(iter_im_catalog_descriptors(self.multi_vnfd_catalog))
+        self.assertEqual(len(descriptors), 2)
+        for descriptor, expected in zip(descriptors, self.multi_vnfd_catalog['vnfd:vnfd-catalog']['vnfd']):
+            self.assertEqual(descriptor, {'vnfd:vnfd-catalog': {'vnfd': [expected]}})
+
+    def test_iter_im_catalog_descriptors_of_several_catalogs(self):
+        nsd_catalog = self._load('cirros_nsd_im.yaml')
+        descriptors = list(iter_im_catalog_descriptors(dict(self.multi_vnfd_catalog, **nsd_catalog)))
+        self.assertEqual(descriptors[:2], list(iter_im_catalog_descriptors(self.multi_vnfd_catalog)))
+        self.assertEqual(descriptors[2:], [nsd_catalog])
+
+    def test_translate_catalog_stream_closed_early(self):
+        with open(os.path.join(self.catalog_dir, 'vnfds.yaml'), 'w') as f:
+            yaml.safe_dump(dict(self.multi_vnfd_catalog, **self._load('cirros_nsd_im.yaml')), f)
+        for workers in (0, 2):
+            output_dir = os.path.join(self.tmp_dir, 'output-{}'.format(workers))
+            stream = translate_catalog_stream(self.catalog_dir, output_dir, workers=workers, ordered=True)
+            entries = [next(stream) for _ in range(3)]
+            self.assertEqual([(entry['source'], entry['type'], entry['status']) for entry in entries], [
+                ('broken.yaml', None, 'error'),
+                ('cirros_vnfd_sol006.yaml', 'etsi_nfv_vnfd', 'skipped'),
+                ('vnfds.yaml', 'nsd', 'ok'),
+            ])
+            # the descriptors translated but not yielded are not written
+            stream.close()
+            self.assertEqual(sorted(name for _, _, names in os.walk(output_dir) for name in names),
+                             ['vnfds_0_sol006.yaml'])
+
+        report = list(translate_catalog_stream(self.catalog_dir, os.path.join(self.tmp_dir, 'output'), workers=0))
+        self.assertEqual([(entry['index'], entry['type'], entry['status']) for entry in report[2:5]],
+                         [(0, 'nsd', 'ok'), (1, 'vnfd', 'ok'), (2, 'vnfd', 'ok')])
+
+    def test_translate_catalog_stream(self):
+        for workers in (0, 2):
+            output_dir = os.path.join(self.tmp_dir, 'output-{}'.format(workers))
+            report_file = os.path.join(self.tmp_dir, 'report-{}.jsonl'.format(workers))
+            report = list(translate_catalog_stream(self.catalog_dir, output_dir, workers=workers,
+                                                   report_file=report_file, ordered=True))
+            with open(report_file) as f:
+                self.assertEqual([json.loads(line) for line in f], report)
+
+            statuses = [(entry['source'], entry['index'], entry['status']) for entry in report]
+            self.assertEqual(statuses, [
+                ('broken.yaml', None, 'error'),
+                ('cirros_vnfd_sol006.yaml', None, 'skipped'),
+                ('vnfds.yaml', 0, 'ok'),
+                ('vnfds.yaml', 1, 'ok'),
+                (os.path.join('nsds', 'cirros_nsd_im.yaml'), 0, 'ok'),
+            ])
+
+            expected_outputs = [translate_im_model_to_sol006(copy.deepcopy(descriptor))
+                                for descriptor in iter_im_catalog_descriptors(self.multi_vnfd_catalog)]
+            expected_outputs.append(translate_im_model_to_sol006(self._load('cirros_nsd_im.yaml')))
+            for entry, expected in zip(report[2:], expected_outputs):
+                with open(entry['output']) as f:
+                    self.assertEqual(yaml.safe_load(f), expected)
+
+    def test_translate_catalog_stream_output_collisions(self):
+        sources = []
+        for directory in ('x', 'y'):
+            os.makedirs(os.path.join(self.tmp_dir, directory))
+            sources.append(os.path.join(self.tmp_dir, directory, 'vnfd.yaml'))
+            shutil.copy(TESTS_EXAMPLES_FOLDER + 'cirros_vnfd_im.yaml', sources[-1])
+        # Same output as x/vnfd.yaml once the extension is removed
+        sources.append(os.path.join(self.tmp_dir, 'x', 'vnfd.json'))
+        with open(sources[-1], 'w') as f:
+            json.dump(self._load('vepc_im.yaml'), f)
+
+        output_dir = os.path.join(self.tmp_dir, 'output')
+        report = list(translate_catalog_stream(sources, output_dir, workers=0))
+        self.assertEqual([entry['status'] for entry in report], ['ok', 'ok', 'error'])
+        self.assertNotEqual(report[0]['output'], report[1]['output'])
+        self.assertIn('already written', report[2]['error'])
+        with open(report[0]['output']) as f:
+            self.assertEqual(yaml.safe_load(f), translate_im_model_to_sol006(self._load('cirros_vnfd_im.yaml')))
+        self.assertEqual(sorted(name for _, _, names in os.walk(output_dir) for name in names),
+                         ['vnfd_sol006.yaml', 'vnfd_sol006.yaml'])
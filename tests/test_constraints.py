@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from osm_im.compiled_validation import CompiledModel, CompiledValidationError
+from osm_im.constraints import ConstraintChecker, check_constraints
+from osm_im.validation import Validation, ValidationException
+import copy
+import types
+import unittest
+
+TESTS_EXAMPLES_FOLDER = 'tests/examples/'
+
+# Tables of a small model with the must and when constraints of the SOL006 augments, as generated by the
+# osm-validator pyang plugin
+TABLES = types.SimpleNamespace(
+    TYPES=[("string", {}), ("uint16", {"ranges": [[(0, 65535)]]}),
+           ("identityref", {"identities": {("m", "persistent-storage"): ("m",), ("m", "root-storage"): ("m",)}}),
+           ("enumeration", {"enums": ["ipv4", "ipv6"]})],
+    NODES=[
+        ("container", "vnfd", "m", "/m:vnfd", {"children": {"kdu": 1, "storage": 4, "ip-version": 6,
+                                                           "ipv6-address-mode": 7}, "presence": False}),
+        ("list", "kdu", "m", "/m:vnfd/kdu", {"children": {"min": 2, "max": 3}, "keys": (), "unique": []}),
+        ("leaf", "min", "m", "/m:vnfd/kdu/min", {"type": 1, "key": False}),
+        ("leaf", "max", "m", "/m:vnfd/kdu/max", {"type": 1, "key": False,
+                                                 "must": [(". >= ../min", None)]}),
+        ("container", "storage", "m", "/m:vnfd/storage", {
+            "children": {"type-of-storage": 5}, "presence": True,
+            "must": [("not(type-of-storage) or derived-from-or-self(m:type-of-storage, 'm:storage')",
+                      "Unknown type of storage")]}),
+        ("leaf", "type-of-storage", "m", "/m:vnfd/storage/type-of-storage", {"type": 2, "key": False}),
+        ("leaf", "ip-version", "m", "/m:vnfd/ip-version", {"type": 3, "key": False}),
+        ("leaf", "ipv6-address-mode", "m", "/m:vnfd/ipv6-address-mode", {
+            "type": 0, "key": False, "when": [("../ip-version = 'ipv6'", False)]}),
+    ],
+    ROOT={"vnfd": 0},
+    IDENTITIES={("m", "storage"): (), ("m", "persistent-storage"): (("m", "storage"),), ("m", "root-storage"): ()},
+)
+
+
+class ConstraintsTest(unittest.TestCase):
+
+    def _load_descriptor(self, file):
+        with open(TESTS_EXAMPLES_FOLDER + file, 'r') as descriptor_file:
+            return Validation().yaml_validation(descriptor_file.read())
+
+    def test_leafref_constraints(self):
+        item, data = self._load_descriptor('vepc_im.yaml')
+        self.assertEqual(check_constraints(item, data), [])
+        vnfd = data['vnfd:vnfd-catalog']['vnfd'][0]
+        vnfd['vdu'][0]['interface'][0]['external-connection-point-ref'] = 'unknown'
+        # the monitoring param exists, but in another VDU than the one of the predicate
+        vnfd['monitoring-param'][0]['vdu-monitoring-param']['vdu-ref'] = vnfd['vdu'][1]['id']
+        violations = check_constraints(item, data)
+        self.assertEqual([(violation.kind, violation.path) for violation in violations], [
+            ('leafref', '/vnfd:vnfd-catalog/vnfd/0/vdu/0/interface/0/external-connection-point-ref'),
+            ('leafref',
+             '/vnfd:vnfd-catalog/vnfd/0/monitoring-param/0/vdu-monitoring-param/vdu-monitoring-param-ref'),
+        ])
+        self.assertEqual(violations[0].schema_path,
+                         '/vnfd:vnfd-catalog/vnfd/vdu/interface/external-connection-point-ref')
+
+        with self.assertRaises(ValidationException):
+            Validation(engine="compiled", constraints=True).pyangbind_validation(item, data)
+        Validation(engine="compiled").pyangbind_validation(item, data)
+
+    def test_must_and_when_constraints(self):
+        checker = ConstraintChecker(CompiledModel(TABLES))
+        self.assertEqual(checker.unsupported, [])
+        data = {"m:vnfd": {"kdu": [{"min": 1, "max": 2}, {"min": 1}],
+                           "storage": {"type-of-storage": "m:persistent-storage"},
+                           "ip-version": "ipv6", "ipv6-address-mode": "slaac"}}
+        self.assertEqual(checker.check(data), [])
+
+        wrong_data = copy.deepcopy(data)
+        vnfd = wrong_data["m:vnfd"]
+        vnfd["kdu"][0]["max"] = "0"
+        vnfd["storage"]["type-of-storage"] = "root-storage"
+        vnfd["ip-version"] = "ipv4"
+        violations = checker.check(wrong_data)
+        self.assertEqual([(violation.kind, violation.path, violation.message) for violation in violations], [
+            ("must", "/m:vnfd/kdu/0/max", "must '. >= ../min' is not satisfied"),
+            ("must", "/m:vnfd/storage", "Unknown type of storage"),
+            ("when", "/m:vnfd/ipv6-address-mode", "present but when '../ip-version = 'ipv6'' is false"),
+        ])
+
+    def test_compiled_validation_of_wrong_types(self):
+        model = CompiledModel(TABLES)
+        for data in ({1: {}}, {"m:vnfd": {"storage": {"type-of-storage": 5}}},
+                     {"m:vnfd": {"storage": {"type-of-storage": ["m:persistent-storage"]}}}):
+            with self.assertRaises(CompiledValidationError):
+                model.validate(data)
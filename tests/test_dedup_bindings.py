@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import types
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+from dedup_bindings import dedup_module  # noqa: E402
+
+# Minimal module with the shape of the pyangbind generated code: the classes under other/actions only differ
+# from the ones under alarm/actions in their names, docstrings and schema paths. alarm_actions is identical
+# too, but it is not a generated yc_ class, and different_actions has one more member
+BINDINGS = '''# -*- coding: utf-8 -*-
+# Bindings of the alarm actions
+
+
+class yc_ok_alarm_actions_ok(object):
+  """
+  List /alarm/actions/ok
+  """
+  __slots__ = ('_parent', 'url')
+
+  _yang_name = 'ok'
+
+  def __init__(self, url=None):
+    self.url = url
+
+  def _path(self):
+    if hasattr(self, "_parent"):
+      return self._parent._path()+[self._yang_name]
+    else:
+      return ['alarm', 'actions', 'ok']
+
+
+class yc_actions_alarm_actions(object):
+  """
+  Container /alarm/actions
+  """
+  __slots__ = ('_parent', 'ok')
+
+  _yang_name = 'actions'
+
+  def __init__(self):
+    self.ok = yc_ok_alarm_actions_ok()
+    self.ok._parent = self
+
+  def _path(self):
+    if hasattr(self, "_parent"):
+      return self._parent._path()+[self._yang_name]
+    else:
+      return ['alarm', 'actions']
+
+
+class alarm_actions(object):
+  """
+  Container /alarm/actions
+  """
+  __slots__ = ('_parent', 'ok')
+
+  _yang_name = 'actions'
+
+  def __init__(self):
+    self.ok = yc_ok_alarm_actions_ok()
+    self.ok._parent = self
+
+  def _path(self):
+    if hasattr(self, "_parent"):
+      return self._parent._path()+[self._yang_name]
+    else:
+      return ['alarm', 'actions']
+
+
+class yc_actions_different_actions(object):
+  """
+  Container /different/actions
+  """
+  __slots__ = ('_parent', 'ok', 'alarm')
+
+  _yang_name = 'actions'
+
+  def __init__(self):
+    self.ok = yc_ok_alarm_actions_ok()
+    self.ok._parent = self
+    self.alarm = None
+
+  def _path(self):
+    if hasattr(self, "_parent"):
+      return self._parent._path()+[self._yang_name]
+    else:
+      return ['different', 'actions']
+
+
+class yc_ok_other_actions_ok(object):
+  """
+  List /other/actions/ok
+  """
+  __slots__ = ('_parent', 'url')
+
+  _yang_name = 'ok'
+
+  def __init__(self, url=None):
+    self.url = url
+
+  def _path(self):
+    if hasattr(self, "_parent"):
+      return self._parent._path()+[self._yang_name]
+    else:
+      return ['other', 'actions', 'ok']
+
+
+class yc_actions_other_actions(object):
+  """
+  Container /other/actions
+  """
+  __slots__ = ('_parent', 'ok')
+
+  _yang_name = 'actions'
+
+  def __init__(self):
+    self.ok = yc_ok_other_actions_ok()
+    self.ok._parent = self
+
+  def _path(self):
+    if hasattr(self, "_parent"):
+      return self._parent._path()+[self._yang_name]
+    else:
+      return ['other', 'actions']
+'''
+
+
+class DedupBindingsTest(unittest.TestCase):
+
+    def test_dedup_module(self):
+        dedup_code, classes, replaced = dedup_module(BINDINGS)
+        self.assertEqual((classes, replaced), (6, 2))
+        # A second run does not change the module
+        self.assertEqual(dedup_module(dedup_code), (dedup_code, 6, 0))
+
+        module = types.ModuleType("bindings")
+        exec(compile(dedup_code, "bindings", "exec"), module.__dict__)
+        for name, canonical, path in (
+                ("yc_ok_other_actions_ok", "yc_ok_alarm_actions_ok", ["other", "actions", "ok"]),
+                ("yc_actions_other_actions", "yc_actions_alarm_actions", ["other", "actions"])):
+            subclass = getattr(module, name)
+            self.assertEqual(subclass.__bases__, (getattr(module, canonical),))
+            self.assertEqual(subclass.__slots__, ())
+            # and its own docstring
+            self.assertIn("/" + "/".join(path), subclass.__doc__)
+            # each class keeps its own schema path
+            self.assertEqual(subclass()._path(), path)
+        self.assertEqual(module.yc_ok_alarm_actions_ok()._path(), ["alarm", "actions", "ok"])
+        for name in ("alarm_actions", "yc_actions_different_actions"):
+            self.assertEqual(getattr(module, name).__bases__, (object,))
+
+        # members have a parent, their path is built from it
+        self.assertEqual(module.yc_actions_other_actions().ok._path(), ["other", "actions", "ok"])
@@ -23,6 +23,16 @@
 ##
 
 from osm_im.im_translation import translate_im_vnfd_to_sol006, translate_im_nsd_to_sol006
+from osm_im.im_translation import translate_im_model_to_sol006, TranslationException
+from osm_im.im_translation import register_im_vdu_translation_handler, read_only_view
+from osm_im.im_translation import unregister_im_vdu_translation_handler
+from osm_im.im_translation import translate_sol006_to_im_vnfd, translate_sol006_to_im_nsd
+from osm_im.im_translation import atranslate_im_model_to_sol006
+from osm_im import im_translation
+from osm_im.validation import Validation
+import asyncio
+import copy
+import json
 import unittest
 import yaml
 
@@ -44,6 +54,11 @@ IM_TO_SOL006_NSD_FILES = {
     'hackfest_charmed_nsd_im.yaml': 'hackfest_charmed_nsd_sol006.yaml',
 }
 
+# SOL006 descriptors without an IM counterpart, using SOL006 features that are not translated back
+SOL006_ONLY_VNFD_FILES = ['cirros_heal_vnfd_sol006.yaml', 'etsi_complex_vnfd_sol006.yaml',
+                          'vnfd_sol006_k8s_scale.yaml']
+SOL006_ONLY_NSD_FILES = ['etsi_nsd_sol006.yaml']
+
 
 class TranslationTest(unittest.TestCase):
     def _sort_descriptor(self, descriptor):
@@ -78,3 +93,178 @@ class TranslationTest(unittest.TestCase):
 
             translated_nsd = translate_im_nsd_to_sol006(im_nsd)
             self.assertEqual(self._sort_descriptor(sol006_nsd), self._sort_descriptor(translated_nsd))
+
+    def test_translate_im_nsd_to_sol006_order(self):
+        def cp_ref(index, vnfd_id, cp):
+            return {"member-vnf-index-ref": index, "vnfd-id-ref": vnfd_id, "vnfd-connection-point-ref": cp}
+
+        im_nsd = {"nsd:nsd-catalog": {"nsd": [{
+            "id": "ordered_nsd",
+            "constituent-vnfd": [{"member-vnf-index": 1, "vnfd-id-ref": "b_vnfd"},
+                                 {"member-vnf-index": 2, "vnfd-id-ref": "a_vnfd"},
+                                 {"member-vnf-index": 3, "vnfd-id-ref": "b_vnfd"}],
+            "vld": [{"id": "mgmt", "vnfd-connection-point-ref": [cp_ref(3, "b_vnfd", "mgmt"),
+                                                                 cp_ref(1, "a_vnfd", "mgmt"),
+                                                                 cp_ref(2, "b_vnfd", "mgmt")]},
+                    {"id": "data", "vnfd-connection-point-ref": [cp_ref(2, "b_vnfd", "in"),
+                                                                 cp_ref(2, "b_vnfd", "out"),
+                                                                 cp_ref(1, "a_vnfd", "data")]}],
+        }]}}
+        sol006_nsd = translate_im_nsd_to_sol006(im_nsd)["nsd"]["nsd"][0]
+        # vnfds, vnf profiles and connectivities keep the order of the IM descriptor
+        self.assertEqual(sol006_nsd["vnfd-id"], ["b_vnfd", "a_vnfd"])
+        vnf_profiles = sol006_nsd["df"][0]["vnf-profile"]
+        self.assertEqual([vnf_profile["id"] for vnf_profile in vnf_profiles], ["3", "1", "2"])
+        connectivities = [[(vlc["virtual-link-profile-id"], [cpd["constituent-cpd-id"]
+                                                             for cpd in vlc["constituent-cpd-id"]])
+                           for vlc in vnf_profile["virtual-link-connectivity"]] for vnf_profile in vnf_profiles]
+        self.assertEqual(connectivities, [[("mgmt", ["mgmt-ext"])],
+                                          [("mgmt", ["mgmt-ext"]), ("data", ["data-ext"])],
+                                          [("mgmt", ["mgmt-ext"]), ("data", ["in-ext", "out-ext"])]])
+
+    def test_translation_does_not_modify_input(self):
+        for im_file in list(IM_TO_SOL006_VNFD_FILES) + list(IM_TO_SOL006_NSD_FILES):
+            im_model = self._get_descriptor_file_data_as_dict(TESTS_EXAMPLES_FOLDER + im_file)
+            original_im_model = copy.deepcopy(im_model)
+            if im_file in IM_TO_SOL006_VNFD_FILES:
+                translate = translate_im_vnfd_to_sol006
+            else:
+                translate = translate_im_nsd_to_sol006
+            translated_model = translate(im_model)
+            self.assertEqual(im_model, original_im_model)
+            # Translating a read-only view fails if the translation tries to modify its input
+            view_translated_model = translate(read_only_view(im_model))
+            self.assertEqual(view_translated_model, translated_model)
+            # and gives plain dicts and lists, not shared with the input
+            self.assertEqual(yaml.safe_load(yaml.safe_dump(view_translated_model)), translated_model)
+            self.assertEqual(json.loads(json.dumps(view_translated_model)), translated_model)
+            self.assertEqual(translate_im_model_to_sol006(read_only_view(im_model), validate="none"),
+                             translated_model)
+            pending = [view_translated_model]
+            while pending:
+                value = pending.pop()
+                children = value.values() if isinstance(value, dict) else value
+                pending.extend(child for child in children if isinstance(child, (dict, list)))
+                value.clear()
+            self.assertEqual(im_model, original_im_model)
+
+        with self.assertRaises(TypeError):
+            read_only_view(im_model)["nsd:nsd-catalog"]["nsd"][0]["id"] = "other"
+
+    def test_register_im_vdu_translation_handler(self):
+        def handler(walk, im_vdu, sol006_vdu):
+            sol006_vdu["im-vdu-count"] = int(im_vdu.get("count", 1))
+            walk.data.setdefault("vdu-ids", []).append(im_vdu["id"])
+
+        def finish(walk):
+            walk.sol006_vnfd["vdu-ids"] = walk.data["vdu-ids"]
+
+        register_im_vdu_translation_handler(handler, finish)
+        try:
+            im_vnfd = self._get_descriptor_file_data_as_dict(TESTS_EXAMPLES_FOLDER + 'hackfest_charmed_vnfd_im.yaml')
+            translated_vnfd = translate_im_vnfd_to_sol006(im_vnfd)
+        finally:
+            unregister_im_vdu_translation_handler(handler, finish)
+        self.assertEqual(translated_vnfd["vnfd"]["vdu-ids"], ["mgmtVM", "dataVM"])
+        self.assertEqual([vdu["im-vdu-count"] for vdu in translated_vnfd["vnfd"]["vdu"]], [1, 1])
+        self.assertNotIn("vdu-ids", translate_im_vnfd_to_sol006(im_vnfd)["vnfd"])
+        with self.assertRaises(ValueError):
+            unregister_im_vdu_translation_handler(handler)
+
+    def test_translate_sol006_to_im_round_trip(self):
+        sol006_files = [(sol006_file, translate_sol006_to_im_vnfd, translate_im_vnfd_to_sol006)
+                        for sol006_file in IM_TO_SOL006_VNFD_FILES.values()]
+        sol006_files += [(sol006_file, translate_sol006_to_im_nsd, translate_im_nsd_to_sol006)
+                         for sol006_file in IM_TO_SOL006_NSD_FILES.values()]
+        for sol006_file, translate_to_im, translate_to_sol006 in sol006_files:
+            with self.subTest(sol006_file=sol006_file):
+                sol006_model = self._get_descriptor_file_data_as_dict(TESTS_EXAMPLES_FOLDER + sol006_file)
+                im_model = translate_to_im(sol006_model)
+                # Translating a read-only view fails if the translation tries to modify its input
+                view_im_model = translate_to_im(read_only_view(sol006_model))
+                self.assertEqual(view_im_model, im_model)
+                self.assertEqual(yaml.safe_load(yaml.safe_dump(view_im_model)), im_model)
+                self.assertEqual(json.loads(json.dumps(view_im_model)), im_model)
+                Validation().pyangbind_validation(list(im_model)[0].split(":")[0], copy.deepcopy(im_model))
+                self.assertEqual(self._sort_descriptor(translate_to_sol006(im_model)),
+                                 self._sort_descriptor(sol006_model))
+
+        for sol006_file in SOL006_ONLY_VNFD_FILES + SOL006_ONLY_NSD_FILES:
+            with self.subTest(sol006_file=sol006_file):
+                sol006_model = self._get_descriptor_file_data_as_dict(TESTS_EXAMPLES_FOLDER + sol006_file)
+                if sol006_file in SOL006_ONLY_VNFD_FILES:
+                    im_model = translate_sol006_to_im_vnfd(sol006_model)
+                else:
+                    im_model = translate_sol006_to_im_nsd(sol006_model)
+                Validation().pyangbind_validation(list(im_model)[0].split(":")[0], im_model)
+
+    def test_translate_sol006_to_im_large_vnfd(self):
+        vdu_count = 2000
+        im_vnfd = self._get_descriptor_file_data_as_dict(TESTS_EXAMPLES_FOLDER + 'hackfest_charmed_vnfd_im.yaml')
+        im_vnfd_data = im_vnfd["vnfd:vnfd-catalog"]["vnfd"][0]
+        template_vdu = im_vnfd_data["vdu"][1]
+        for index in range(vdu_count):
+            vdu = copy.deepcopy(template_vdu)
+            vdu["id"] = vdu["name"] = "vdu-{}".format(index)
+            for interface in vdu["interface"]:
+                interface.pop("external-connection-point-ref", None)
+                interface.pop("internal-connection-point-ref", None)
+                interface["type"] = "INTERNAL"
+            vdu.pop("internal-connection-point", None)
+            vdu.pop("vdu-configuration", None)
+            im_vnfd_data["vdu"].append(vdu)
+        sol006_vnfd = translate_im_vnfd_to_sol006(im_vnfd)
+
+        # A single pass over the VDUs: every handler visits each VDU once (the scaling with the number of VDUs
+        # is measured in benchmarks/bench_vnfd_translation.py and benchmarks/bench_suite.py)
+        visits = []
+        handlers = im_translation._SOL006_VDU_TRANSLATION_HANDLERS
+
+        def counted(handler):
+            def visit(walk, sol006_vdu, im_vdu):
+                visits.append((handler, sol006_vdu["id"]))
+                handler(walk, sol006_vdu, im_vdu)
+            return visit
+
+        im_translation._SOL006_VDU_TRANSLATION_HANDLERS = tuple(counted(handler) for handler in handlers)
+        try:
+            translated_vnfd = translate_sol006_to_im_vnfd(sol006_vnfd)
+        finally:
+            im_translation._SOL006_VDU_TRANSLATION_HANDLERS = handlers
+        expected_visits = {(handler, vdu["id"]) for handler in handlers for vdu in sol006_vnfd["vnfd"]["vdu"]}
+        self.assertEqual(len(visits), len(expected_visits))
+        self.assertEqual(set(visits), expected_visits)
+        self.assertEqual(len(translated_vnfd["vnfd:vnfd-catalog"]["vnfd"][0]["vdu"]), vdu_count + 2)
+        self.assertEqual(self._sort_descriptor(translate_im_vnfd_to_sol006(translated_vnfd)),
+                         self._sort_descriptor(sol006_vnfd))
+
+    def test_translate_im_model_to_sol006_validation_modes(self):
+        for im_file in list(IM_TO_SOL006_VNFD_FILES) + list(IM_TO_SOL006_NSD_FILES):
+            im_model = self._get_descriptor_file_data_as_dict(TESTS_EXAMPLES_FOLDER + im_file)
+            translated_model = translate_im_model_to_sol006(copy.deepcopy(im_model))
+            self.assertEqual(translate_im_model_to_sol006(copy.deepcopy(im_model), validate="none"), translated_model)
+
+            item, _ = Validation().yaml_validation(im_model)
+            normalized_model = Validation().pyangbind_validation(item, copy.deepcopy(im_model))
+            self.assertEqual(translate_im_model_to_sol006(copy.deepcopy(im_model), validate="reuse"),
+                             translate_im_model_to_sol006(normalized_model, validate="none"))
+
+        with self.assertRaises(TranslationException):
+            translate_im_model_to_sol006(im_model, validate="unknown")
+        im_model = {"vnfd:vnfd-catalog": {"vnfd": [{"id": "wrong", "unknown-field": 1}]}}
+        with self.assertRaises(TranslationException):
+            translate_im_model_to_sol006(copy.deepcopy(im_model), validate="reuse")
+
+    def test_atranslate_im_model_to_sol006(self):
+        im_models = [self._get_descriptor_file_data_as_dict(TESTS_EXAMPLES_FOLDER + im_file)
+                     for im_file in list(IM_TO_SOL006_VNFD_FILES) + list(IM_TO_SOL006_NSD_FILES)]
+
+        async def translate_all():
+            return await asyncio.gather(*(atranslate_im_model_to_sol006(im_model) for im_model in im_models))
+
+        self.assertEqual(asyncio.run(translate_all()), [translate_im_model_to_sol006(m) for m in im_models])
+
+    def test_translate_im_model_to_sol006_output_validation(self):
+        for im_file in list(IM_TO_SOL006_VNFD_FILES) + list(IM_TO_SOL006_NSD_FILES):
+            im_model = self._get_descriptor_file_data_as_dict(TESTS_EXAMPLES_FOLDER + im_file)
+            translate_im_model_to_sol006(im_model, validate="reuse", validate_output=True)
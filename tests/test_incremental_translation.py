@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from osm_im.incremental_translation import IncrementalVnfdTranslation
+from osm_im.im_translation import translate_im_vnfd_to_sol006, TranslationException
+import copy
+import unittest
+import yaml
+
+TESTS_EXAMPLES_FOLDER = 'tests/examples/'
+
+IM_VNFD_FILES = [
+    'cirros_vnfd_im.yaml',
+    'epa_im.yaml',
+    'magma_knf_im.yaml',
+    'vepc_im.yaml',
+    'hackfest_charmed_vnfd_im.yaml',
+]
+
+
+class IncrementalTranslationTest(unittest.TestCase):
+
+    def _load(self, file):
+        with open(TESTS_EXAMPLES_FOLDER + file, 'r') as descriptor_file:
+            return yaml.safe_load(descriptor_file.read())
+
+    def _assert_same_as_full_translation(self, translation):
+        expected = translate_im_vnfd_to_sol006(copy.deepcopy(translation.im_model_data))
+        self.assertEqual(translation.sol006_vnfd, expected)
+        self.assertEqual(list(translation.sol006_vnfd['vnfd']), list(expected['vnfd']))
+
+    def test_apply_patch_removing_every_key(self):
+        for file in IM_VNFD_FILES:
+            im_model_data = self._load(file)
+            root = next(iter(im_model_data))
+            for key in im_model_data[root]['vnfd'][0]:
+                patched_data = copy.deepcopy(im_model_data)
+                del patched_data[root]['vnfd'][0][key]
+                try:
+                    translate_im_vnfd_to_sol006(patched_data)
+                except Exception:
+                    # The descriptor cannot be translated without this key
+                    continue
+                with self.subTest(file=file, key=key):
+                    translation = IncrementalVnfdTranslation(im_model_data)
+                    translation.apply_patch([{'op': 'remove', 'path': '/{}/vnfd/0/{}'.format(root, key)}])
+                    self._assert_same_as_full_translation(translation)
+
+    def test_apply_patch(self):
+        im_model_data = self._load('hackfest_charmed_vnfd_im.yaml')
+        original_data = copy.deepcopy(im_model_data)
+        translation = IncrementalVnfdTranslation(im_model_data)
+        stages_run = translation.stages_run
+        translation.apply_patch([{'op': 'replace', 'path': '/vnfd:vnfd-catalog/vnfd/0/description',
+                                  'value': 'new description'}])
+        # Only the basic data stage depends on the description
+        self.assertEqual(translation.stages_run, stages_run + 1)
+        self.assertEqual(translation.sol006_vnfd['vnfd']['description'], 'new description')
+        self._assert_same_as_full_translation(translation)
+
+        translation.apply_patch([
+            {'op': 'test', 'path': '/vnfd:vnfd-catalog/vnfd/0/vdu/0/id', 'value': 'mgmtVM'},
+            {'op': 'copy', 'from': '/vnfd:vnfd-catalog/vnfd/0/vdu/1', 'path': '/vnfd:vnfd-catalog/vnfd/0/vdu/-'},
+            {'op': 'replace', 'path': '/vnfd:vnfd-catalog/vnfd/0/vdu/2/id', 'value': 'dataVM2'},
+            {'op': 'move', 'from': '/vnfd:vnfd-catalog/vnfd/0/logo', 'path': '/vnfd:vnfd-catalog/vnfd/0/vendor'},
+        ])
+        self.assertEqual([vdu['id'] for vdu in translation.sol006_vnfd['vnfd']['vdu']],
+                         ['mgmtVM', 'dataVM', 'dataVM2'])
+        self._assert_same_as_full_translation(translation)
+        # The caller's model is never modified
+        self.assertEqual(im_model_data, original_data)
+
+    def test_apply_patch_to_vdus(self):
+        translation = IncrementalVnfdTranslation(self._load('hackfest_charmed_vnfd_im.yaml'))
+        vdus_translated = translation.vdus_translated
+        translation.apply_patch([{'op': 'add', 'path': '/vnfd:vnfd-catalog/vnfd/0/vdu/1/description',
+                                  'value': 'new description'}])
+        # The handlers only run again for the VDU changed
+        self.assertEqual(translation.vdus_translated, vdus_translated + 1)
+        self._assert_same_as_full_translation(translation)
+
+        translation.apply_patch([{'op': 'replace', 'path': '/vnfd:vnfd-catalog/vnfd/0/vnf-configuration/'
+                                  'config-primitive/0/name', 'value': 'new-primitive'}])
+        self.assertEqual(translation.vdus_translated, vdus_translated + 1)
+        self._assert_same_as_full_translation(translation)
+
+        translation.apply_patch([{'op': 'move', 'from': '/vnfd:vnfd-catalog/vnfd/0/vdu/1',
+                                  'path': '/vnfd:vnfd-catalog/vnfd/0/vdu/0'}])
+        self.assertEqual(translation.vdus_translated, vdus_translated + 1)
+        self._assert_same_as_full_translation(translation)
+
+        # The VDUs use the connection points of the VNFD, so all of them are translated again
+        translation.apply_patch([{'op': 'replace', 'path': '/vnfd:vnfd-catalog/vnfd/0/connection-point/0/name',
+                                  'value': 'vnf-mgmt'}])
+        self.assertEqual(translation.vdus_translated, vdus_translated + 3)
+        self._assert_same_as_full_translation(translation)
+
+    def test_apply_patch_errors(self):
+        translation = IncrementalVnfdTranslation(self._load('cirros_vnfd_im.yaml'))
+        with self.assertRaises(TranslationException):
+            translation.apply_patch([{'op': 'test', 'path': '/vnfd:vnfd-catalog/vnfd/0/id', 'value': 'other'}])
+        with self.assertRaises(TranslationException):
+            translation.apply_patch([{'op': 'remove', 'path': '/vnfd:vnfd-catalog/vnfd/0/missing'}])
+        # Operations applied before the failing one are kept and translated
+        with self.assertRaises(TranslationException):
+            translation.apply_patch([{'op': 'add', 'path': '/vnfd:vnfd-catalog/vnfd/0/description', 'value': 'new'},
+                                     {'op': 'unknown', 'path': '/vnfd:vnfd-catalog/vnfd/0/id'}])
+        self.assertEqual(translation.sol006_vnfd['vnfd']['description'], 'new')
+        self._assert_same_as_full_translation(translation)
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from osm_im import instrumentation
+from osm_im.im_translation import translate_im_model_to_sol006, TranslationException
+from osm_im.instrumentation import instrument, capture, descriptor_size
+from osm_im.validation import Validation, ValidationException
+import unittest
+
+TESTS_EXAMPLES_FOLDER = 'tests/examples/'
+
+
+class InstrumentationTest(unittest.TestCase):
+
+    def setUp(self):
+        with open(TESTS_EXAMPLES_FOLDER + 'hackfest_charmed_vnfd_im.yaml', 'r') as descriptor_file:
+            self.descriptor = descriptor_file.read()
+
+    def test_validation_stages(self):
+        with instrument() as events:
+            Validation().descriptor_validation(self.descriptor)
+        self.assertEqual([event.path for event in events], [
+            "descriptor_validation/parse",
+            "descriptor_validation/pyangbind_validation/load_ietf_json",
+            "descriptor_validation/pyangbind_validation",
+            "descriptor_validation",
+        ])
+        self.assertEqual(events[0].size, len(self.descriptor.encode("utf-8")))
+        self.assertTrue(all(event.elapsed >= 0 and event.allocated is None for event in events))
+
+        with instrument() as events:
+            with self.assertRaises(ValidationException):
+                Validation().descriptor_validation("vnfd:vnfd-catalog: {vnfd: [{id: vnf, unknown: 1}]}")
+        self.assertTrue(events[-1].failed)
+
+    def test_translation_stages(self):
+        _, im_model = Validation().yaml_validation(self.descriptor)
+        received = []
+        with instrument(received.append) as events, capture("tracemalloc") as profile:
+            translate_im_model_to_sol006(im_model, validate="none")
+        self.assertEqual(events, [])
+        self.assertEqual(received[-1].name, "translate_im_model_to_sol006")
+        self.assertEqual(received[-1].size, descriptor_size(im_model))
+        stages = [event.name for event in received if event.path.startswith(
+            "translate_im_model_to_sol006/translate_im_vnfd_to_sol006/")]
+        self.assertIn("walk_im_vdus_to_sol006_vnfd", stages)
+        self.assertTrue(all(event.allocated is not None for event in received))
+        self.assertGreater(profile.peak, 0)
+        self.assertIsNotNone(profile.snapshot)
+
+        with instrument() as events:
+            with self.assertRaises(TranslationException):
+                translate_im_model_to_sol006({"vnfd:vnfd-catalog": {"vnfd": [{"id": "wrong", "unknown": 1}]}})
+        self.assertEqual([event.path for event in events if event.failed][-2:],
+                         ["translate_im_model_to_sol006/validate_input", "translate_im_model_to_sol006"])
+
+    def test_disabled_and_cprofile_capture(self):
+        self.assertFalse(instrumentation.is_enabled())
+        self.assertIs(instrumentation.stage("parse", self.descriptor), instrumentation._NULL_STAGE)
+        with capture() as profile:
+            Validation().descriptor_validation(self.descriptor)
+        self.assertGreater(profile.stats.total_calls, 0)
+        with self.assertRaises(ValueError):
+            with capture("unknown"):
+                pass
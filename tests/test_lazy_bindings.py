@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import types
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+from lazy_bindings import LAZY_MARK, make_module_lazy  # noqa: E402
+
+# Minimal module with the shape of the pyangbind generated code: ok and alarm are built in __init__ and
+# have an _unset_ method, keys has none and name is not built by YANGDynClass, so both are left as they are
+BINDINGS = '''# -*- coding: utf-8 -*-
+BUILT = []
+
+
+def YANGDynClass(*args, **kwargs):
+  BUILT.append(kwargs["yang_name"])
+  return kwargs["base"]()
+
+
+class yc_actions(object):
+  """
+  Container of the alarm actions
+  """
+  __slots__ = ('__ok', '__alarm', '__keys', '__name')
+
+  def __init__(self, *args, **kwargs):
+    self.__ok = YANGDynClass(base=list, yang_name="ok")
+    self.__alarm = YANGDynClass(base=list, yang_name="alarm")
+    self.__keys = YANGDynClass(base=list, yang_name="keys")
+    self.__name = "actions"
+
+  def _get_ok(self):
+    return self.__ok
+
+  def _unset_ok(self):
+    self.__ok = YANGDynClass(base=list, yang_name="ok")
+
+  def _get_alarm(self):
+    return self.__alarm
+
+  def _unset_alarm(self):
+    self.__alarm = YANGDynClass(base=list, yang_name="alarm")
+
+  def _get_keys(self):
+    return self.__keys
+
+  def _get_name(self):
+    return self.__name
+
+  ok = property(_get_ok)
+  alarm = property(_get_alarm)
+  keys = property(_get_keys)
+  name = property(_get_name)
+'''
+
+
+def _load_module(code):
+    module = types.ModuleType("bindings")
+    exec(compile(code, "bindings", "exec"), module.__dict__)
+    return module
+
+
+class LazyBindingsTest(unittest.TestCase):
+
+    def test_make_module_lazy(self):
+        lazy_code = make_module_lazy(BINDINGS)
+        self.assertEqual(lazy_code.splitlines()[1] + "\n", LAZY_MARK)
+        # A second run does not change the module
+        self.assertEqual(make_module_lazy(lazy_code), lazy_code)
+
+        module = _load_module(lazy_code)
+        actions = module.yc_actions()
+        # __init__ only sets the members with an _unset_ method to None
+        self.assertEqual(module.BUILT, ["keys"])
+        self.assertIsNone(actions._yc_actions__ok)
+        self.assertIsNone(actions._yc_actions__alarm)
+        # the getter builds the member through _unset_<member>, once
+        ok = actions.ok
+        self.assertIs(actions._yc_actions__ok, ok)
+        self.assertIs(actions.ok, ok)
+        self.assertEqual(module.BUILT, ["keys", "ok"])
+        self.assertIsNone(actions._yc_actions__alarm)
+        self.assertEqual(actions.name, "actions")
+
+        # Same members as the bindings built in __init__
+        eager_module = _load_module(BINDINGS)
+        eager_actions = eager_module.yc_actions()
+        self.assertEqual(eager_module.BUILT, ["ok", "alarm", "keys"])
+        for member in ("ok", "alarm", "keys", "name"):
+            self.assertEqual(getattr(actions, member), getattr(eager_actions, member))
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from osm_im.compiled_validation import CompiledValidationError
+from osm_im.records import get_record_class
+import unittest
+
+VNFR_ID = "0b6c6a6e-5b8f-4b0e-9a8a-6f5b2f7e1c11"
+VDUR_IDS = ["7a0e4c1d-2b3f-4a5e-8c6d-1e2f3a4b5c6d", "8b1f5d2e-3c4a-4b6f-9d7e-2f3a4b5c6d7e"]
+VNFR = {
+    "id": VNFR_ID,
+    "name": "hackfest-vnf",
+    "nsr-id-ref": "5f1d9c2a-3b4e-4f6a-8b7c-9d0e1f2a3b4c",
+    "operational-status": "init",
+    "create-time": "1700000000",
+    "mgmt-interface": {"ip-address": "10.0.0.10", "port": 22},
+    "vdur": [
+        {"id": VDUR_IDS[0], "vdu-id-ref": "mgmtVM", "operational-status": "init"},
+        {"id": VDUR_IDS[1], "vdu-id-ref": "dataVM", "operational-status": "init"},
+    ],
+}
+
+
+class RecordsTest(unittest.TestCase):
+
+    def test_from_dict_and_to_dict(self):
+        vnfr_class = get_record_class("vnfr")
+        self.assertIs(get_record_class("vnfr"), vnfr_class)
+        vnfr = vnfr_class.from_dict(VNFR)
+        self.assertFalse(hasattr(vnfr, "__dict__"))
+        self.assertEqual(vnfr.create_time, 1700000000)
+        self.assertEqual(vnfr.mgmt_interface.port, 22)
+        self.assertEqual([vdur.vdu_id_ref for vdur in vnfr.vdur], ["mgmtVM", "dataVM"])
+        self.assertIsNone(vnfr.vendor)
+        self.assertEqual(vnfr_class.from_dict(vnfr.to_dict()), vnfr)
+        self.assertEqual(vnfr.to_dict()["create-time"], 1700000000)
+
+        for wrong_vnfr, path in (({"id": "not-an-uuid"}, "/id"),
+                                 ({"id": VNFR_ID, "unknown": 1}, "/unknown"),
+                                 ({"id": VNFR_ID, "vdur": [{"id": VNFR_ID}, {"id": VNFR_ID}]}, "/vdur/1"),
+                                 ({"id": VNFR_ID, "mgmt-interface": {"port": "ssh"}}, "/mgmt-interface/port")):
+            with self.assertRaises(CompiledValidationError) as context:
+                vnfr_class.from_dict(wrong_vnfr)
+            self.assertTrue(str(context.exception).startswith(path + ":"), context.exception)
+        self.assertIsNone(vnfr_class.from_dict({"id": VNFR_ID, "unknown": 1}, force=True).name)
+
+    def test_update(self):
+        nsr = get_record_class("nsr").from_dict({"ns-instance-config-ref": "ns-1", "operational-status": "init",
+                                                 "constituent-vnfr-ref": [{"vnfr-id": VNFR_ID}]})
+        nsr.update({"operational-status": "running", "uptime": "10"})
+        self.assertEqual((nsr.operational_status, nsr.uptime), ("running", 10))
+        nsr.update({"uptime": None})
+        self.assertNotIn("uptime", nsr.to_dict())
+
+        # Nothing is changed when any of the changes is wrong
+        for wrong_changes in ({"operational-status": "terminated", "uptime": -1},
+                              {"operational-status": "unknown"},
+                              {"ns-instance-config-ref": "ns-2"}):
+            with self.assertRaises(CompiledValidationError):
+                nsr.update(wrong_changes)
+            self.assertEqual(nsr.operational_status, "running")
+        nsr.update({"uptime": 5, "@uptime": {"source": "monitoring"}})
+        self.assertEqual(nsr.uptime, 5)
+        for wrong_data in ({1: "running"}, {"constituent-vnfr-ref": [{None: VNFR_ID}]}):
+            with self.assertRaises(CompiledValidationError):
+                get_record_class("nsr").from_dict(wrong_data)
+            with self.assertRaises(CompiledValidationError):
+                nsr.update(wrong_data)
+
+        vnfr = get_record_class("vnfr").from_dict(VNFR)
+        vnfr.update({"mgmt-interface": {"port": 2222}})
+        self.assertEqual(vnfr.to_dict()["mgmt-interface"], {"ip-address": "10.0.0.10", "port": 2222})
+        vnfr.vdur[0].update({"operational-status": "running"})
+        self.assertEqual([vdur.operational_status for vdur in vnfr.vdur], ["running", "init"])
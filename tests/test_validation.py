@@ -14,8 +14,23 @@
 #  limitations under the License.
 #
 
-from osm_im.validation import Validation
+from osm_im.compiled_validation import CompiledModel, CompiledValidationError
+from osm_im.parallel import AsyncExecutor
+from osm_im.validation import Validation, ValidationException, sniff_descriptor_type
+from pyangbind.lib import pybindJSON
+from pyangbind.lib.serialise import pybindJSONDecoder
+import asyncio
+import copy
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 import unittest
+import yaml
 
 TESTS_EXAMPLES_FOLDER = 'tests/examples/'
 
@@ -38,6 +53,57 @@ NSD_FILES = [
     'vepc_nsd_sol006.yaml'
 ]
 
+# Small model with the cases where pyangbind stores inconsistent data, for PyangbindDifferentialTest
+MODULES = {
+    "base-types": """
+module base-types {
+  namespace "urn:test:base-types";
+  prefix bt;
+  identity storage-type;
+  identity root-storage { base storage-type; }
+}
+""",
+    "differential": """
+module differential {
+  namespace "urn:test:differential";
+  prefix diff;
+  import base-types { prefix bt; }
+  identity persistent-storage { base bt:storage-type; }
+  container storage {
+    leaf type-of-storage { type identityref { base bt:storage-type; } }
+    leaf name { type string; }
+    leaf short-name { type string { length "1..3"; } }
+    leaf count { type uint16; }
+    leaf limited-count { type uint16 { range "1..5"; } }
+    leaf enabled { type boolean; }
+    leaf ratio { type decimal64 { fraction-digits 2; } }
+    leaf mode { type enumeration { enum read; enum write; } }
+    leaf name-ref { type leafref { path "../name"; } }
+    list volume {
+      key name;
+      leaf name { type string; }
+      leaf size { type uint16; }
+      leaf-list tags { type string; }
+      list path { key id; leaf id { type string; } leaf mount { type string; } }
+    }
+  }
+}
+""",
+}
+
+IM_FILES = [
+    'alternative_image_im.yaml',
+    'cirros_nsd_im.yaml',
+    'cirros_vnfd_im.yaml',
+    'epa_im.yaml',
+    'hackfest_charmed_nsd_im.yaml',
+    'hackfest_charmed_vnfd_im.yaml',
+    'magma_knf_im.yaml',
+    'vepc_im.yaml',
+    'vepc_nsd_im.yaml',
+    'vnfd_im.yaml',
+]
+
 class ValidationTest(unittest.TestCase):
 
     def test_descriptor_validation_of_etsi_nfv_vnfd(self):
@@ -53,3 +119,295 @@ class ValidationTest(unittest.TestCase):
             with open(file_path, 'r') as nsd_file:
                 nsd_file_content = nsd_file.read()
             Validation().descriptor_validation(nsd_file_content)
+
+    def test_models_imported_on_demand(self):
+        check = ("import sys, osm_im.validation; "
+                 "sys.exit(any(m.startswith(('osm_im.vnfd', 'osm_im.nsd', 'osm_im.nst', 'osm_im.etsi')) "
+                 "for m in sys.modules))")
+        self.assertEqual(subprocess.call([sys.executable, '-c', check]), 0)
+
+    def test_yaml_validation_input_formats(self):
+        for file in VNFD_FILES + NSD_FILES + IM_FILES:
+            with open(TESTS_EXAMPLES_FOLDER + file, 'r') as descriptor_file:
+                descriptor_file_content = descriptor_file.read()
+            expected = yaml.safe_load(descriptor_file_content)
+            item, data = Validation().yaml_validation(descriptor_file_content)
+            self.assertEqual(data, expected)
+            self.assertEqual(Validation().yaml_validation(descriptor_file_content.encode()), (item, expected))
+            self.assertEqual(Validation().yaml_validation(json.dumps(expected)), (item, expected))
+            self.assertEqual(Validation().yaml_validation(expected), (item, expected))
+            for mode in ('r', 'rb'):
+                with open(TESTS_EXAMPLES_FOLDER + file, mode) as descriptor_file:
+                    self.assertEqual(Validation().yaml_validation(descriptor_file), (item, expected))
+        self.assertEqual(Validation().yaml_validation('{nst: [{id: a}]}'), ('nst', {'nst': [{'id': 'a'}]}))
+        with self.assertRaises(ValidationException):
+            Validation().yaml_validation('vnfd: [')
+
+    def test_sniff_descriptor_type(self):
+        for file in VNFD_FILES + NSD_FILES + IM_FILES:
+            with open(TESTS_EXAMPLES_FOLDER + file, 'r') as descriptor_file:
+                descriptor_file_content = descriptor_file.read()
+            item, _ = Validation().yaml_validation(descriptor_file_content)
+            self.assertEqual(sniff_descriptor_type(descriptor_file_content), item)
+            with open(TESTS_EXAMPLES_FOLDER + file, 'rb') as descriptor_file:
+                self.assertEqual(sniff_descriptor_type(descriptor_file), item)
+        self.assertEqual(sniff_descriptor_type('info: {nst: [nsd]}\nnsd-catalog: {}'), 'nsd')
+        self.assertEqual(sniff_descriptor_type('{"info": [{"vnfd": 1}], "nst": []}'), 'nst')
+        self.assertIsNone(sniff_descriptor_type('- vnfd'))
+        self.assertIsNone(sniff_descriptor_type('info: {vnfd: 1}'))
+
+    def test_pyangbind_validation_normalized_output(self):
+        for file in IM_FILES:
+            with open(TESTS_EXAMPLES_FOLDER + file, 'r') as descriptor_file:
+                item, data = Validation().yaml_validation(descriptor_file.read())
+            normalized = Validation().pyangbind_validation(item, data)
+            self.assertEqual(normalized, Validation().pyangbind_validation(item, normalized))
+            self.assertEqual(yaml.safe_load(yaml.safe_dump(normalized)), normalized)
+            self.assertIsNone(Validation().pyangbind_validation(item, data, return_normalized=False))
+
+
+    def test_validate_many(self):
+        descriptors = []
+        for file in IM_FILES:
+            with open(TESTS_EXAMPLES_FOLDER + file, 'r') as descriptor_file:
+                descriptors.append(descriptor_file.read())
+        descriptors.insert(3, 'unknown-descriptor: {}')
+        expected = list(Validation().validate_many(descriptors, workers=0))
+        self.assertEqual([index for index, _, _ in expected], list(range(len(descriptors))))
+        self.assertIsNone(expected[3][1])
+        self.assertIsInstance(expected[3][2], ValidationException)
+        for index, item, normalized in expected[:3] + expected[4:]:
+            self.assertIn(item, ('vnfd', 'nsd'))
+            self.assertIsInstance(normalized, dict)
+
+        results = list(Validation().validate_many(iter(descriptors), workers=2))
+        self.assertEqual([r[:2] for r in results], [r[:2] for r in expected])
+        self.assertEqual([r[2] for r in results if r[0] != 3], [r[2] for r in expected if r[0] != 3])
+
+        results = Validation().validate_many(descriptors, workers=2, ordered=False)
+        self.assertEqual(sorted(r[:2] for r in results if r[0] != 3), [r[:2] for r in expected if r[0] != 3])
+
+class PyangbindDifferentialTest(unittest.TestCase):
+    '''
+    Compares the compiled engine with pyangbind over bindings and validator tables generated from MODULES
+    '''
+
+    @classmethod
+    def setUpClass(cls):
+        import pyangbind
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        for name, module in MODULES.items():
+            with open(os.path.join(cls.tmp_dir.name, name + ".yang"), "w") as module_file:
+                module_file.write(module)
+        module_files = [os.path.join(cls.tmp_dir.name, name + ".yang") for name in MODULES]
+        for plugin_dir, output_format, output in (
+                (os.path.join(os.path.dirname(pyangbind.__file__), "plugin"), "pybind", "differential.py"),
+                ("plugins", "osm-validator", "differential_tables.py")):
+            subprocess.run([sys.executable, "-m", "pyang", "--plugindir", plugin_dir, "-f", output_format,
+                            "-o", os.path.join(cls.tmp_dir.name, output)] + module_files, check=True)
+        sys.path.insert(0, cls.tmp_dir.name)
+        try:
+            cls.bindings = importlib.import_module("differential")
+            cls.tables = importlib.import_module("differential_tables")
+        finally:
+            sys.path.remove(cls.tmp_dir.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        sys.modules.pop("differential", None)
+        sys.modules.pop("differential_tables", None)
+        cls.tmp_dir.cleanup()
+
+    def _pyangbind_result(self, data):
+        try:
+            obj = pybindJSONDecoder.load_ietf_json(copy.deepcopy(data), self.bindings, "differential")
+        except (ValueError, TypeError, KeyError, AttributeError):
+            return None
+        return json.loads(pybindJSON.dumps(obj, mode="ietf"))
+
+    def _compiled_result(self, data, strict=False):
+        try:
+            return CompiledModel(self.tables, strict).validate(data)
+        except CompiledValidationError:
+            return None
+
+    def test_identityref_values(self):
+        for value, strict_accepted in (("root-storage", True), ("base-types:root-storage", True),
+                                       ("bt:root-storage", True), ("differential:root-storage", False),
+                                       ("wrong-module:root-storage", False), ("persistent-storage", True),
+                                       ("diff:persistent-storage", True), ("bt:persistent-storage", False),
+                                       ("storage-type", False), ("unknown", False), (["root-storage"], False)):
+            with self.subTest(value=value):
+                data = {"differential:storage": {"type-of-storage": value}}
+                expected = self._pyangbind_result(data)
+                self.assertEqual(self._compiled_result(data), expected)
+                self.assertEqual(self._compiled_result(data, strict=True), expected if strict_accepted else None)
+
+    def test_lists_for_scalar_leaves(self):
+        for leaf in ("name", "short-name", "count", "limited-count", "enabled", "ratio", "mode", "name-ref"):
+            for value in (["a", "b"], [1], ["a"]):
+                with self.subTest(leaf=leaf, value=value):
+                    data = {"differential:storage": {leaf: value}}
+                    self.assertEqual(self._compiled_result(data), self._pyangbind_result(data))
+                    self.assertIsNone(self._compiled_result(data, strict=True))
+
+    def test_duplicated_list_keys(self):
+        data = {"differential:storage": {"volume": [
+            {"name": "a", "size": 1, "tags": ["x"], "path": [{"id": "1", "mount": "/a"}]},
+            {"name": "b"},
+            {"name": "a", "size": None, "tags": ["y", "z"], "path": [{"id": "2"}, {"id": "1", "mount": "/b"}]},
+        ]}}
+        expected = self._pyangbind_result(data)
+        self.assertEqual(self._compiled_result(data), expected)
+        self.assertEqual(len(expected["differential:storage"]["volume"]), 2)
+        self.assertIsNone(self._compiled_result(data, strict=True))
+
+
+class AsyncValidationTest(unittest.TestCase):
+
+    def test_adescriptor_validation(self):
+        with open(TESTS_EXAMPLES_FOLDER + 'cirros_vnfd_im.yaml', 'r') as descriptor_file:
+            descriptor = descriptor_file.read()
+
+        async def validate(executor, sleep):
+            await Validation().adescriptor_validation(descriptor, executor=executor)
+            with self.assertRaises(ValidationException):
+                await Validation().adescriptor_validation('unknown-descriptor: {}', executor=executor)
+            start = time.perf_counter()
+            with self.assertRaises(TimeoutError):
+                await executor.run(time.sleep, sleep, timeout=0.1)
+            await Validation().adescriptor_validation(descriptor, executor=executor)
+            return time.perf_counter() - start
+
+        # A thread cannot be interrupted, the worker process running time.sleep is terminated
+        for kind, sleep, expected_elapsed in (("thread", 0.5, 0.5), ("process", 10, 0)):
+            executor = AsyncExecutor(kind, max_workers=1)
+            try:
+                self.assertGreaterEqual(asyncio.run(validate(executor, sleep)), expected_elapsed)
+                self.assertLess(asyncio.run(validate(executor, sleep)), 5)
+            finally:
+                executor.shutdown()
+
+    def test_async_executor_concurrency(self):
+        running = [0, 0]
+        lock = threading.Lock()
+
+        def work():
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+
+        async def run_all(executor):
+            await asyncio.gather(*(executor.run(work) for _ in range(8)))
+
+        executor = AsyncExecutor("thread", max_workers=4, max_concurrency=2)
+        try:
+            asyncio.run(run_all(executor))
+        finally:
+            executor.shutdown()
+        self.assertEqual(running[1], 2)
+
+
+class CompiledValidationTest(unittest.TestCase):
+
+    def _load_descriptor(self, file):
+        with open(TESTS_EXAMPLES_FOLDER + file, 'r') as descriptor_file:
+            return Validation().yaml_validation(descriptor_file.read())
+
+    def _assert_same_result(self, item, data, force=False):
+        try:
+            expected = Validation().pyangbind_validation(item, copy.deepcopy(data), force)
+        except ValidationException:
+            with self.assertRaises(ValidationException):
+                Validation(engine="compiled").pyangbind_validation(item, data, force)
+            return
+        self.assertEqual(expected, Validation(engine="compiled").pyangbind_validation(item, data, force))
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValidationException):
+            Validation(engine="unknown")
+
+    def test_compiled_descriptor_validation(self):
+        for file in VNFD_FILES + NSD_FILES + IM_FILES:
+            with open(TESTS_EXAMPLES_FOLDER + file, 'r') as descriptor_file:
+                descriptor_file_content = descriptor_file.read()
+            Validation(engine="compiled").descriptor_validation(descriptor_file_content)
+
+    def test_compiled_validation_same_output_as_pyangbind(self):
+        for file in IM_FILES:
+            item, data = self._load_descriptor(file)
+            self._assert_same_result(item, data)
+
+    def test_compiled_validation_same_errors_as_pyangbind(self):
+        item, data = self._load_descriptor('cirros_vnfd_im.yaml')
+        vnfd = data['vnfd:vnfd-catalog']['vnfd'][0]
+        vdu = vnfd['vdu'][0]
+        changes = [
+            lambda: vdu['vm-flavor'].update({'vcpu-count': 70000}),
+            lambda: vdu['vm-flavor'].update({'vcpu-count': 'two'}),
+            lambda: vdu['vm-flavor'].update({'vcpu-count': '2'}),
+            lambda: vdu['interface'][0]['virtual-interface'].update({'type': 'UNKNOWN'}),
+            lambda: vdu['interface'][0].update({'position': -1}),
+            lambda: vdu.update({'unknown-field': 'value'}),
+            lambda: vnfd.update({'mgmt-interface': 'eth0'}),
+            lambda: vnfd['connection-point'][0].pop('name'),
+        ]
+        for change in changes:
+            changed_data = copy.deepcopy(data)
+            vnfd = changed_data['vnfd:vnfd-catalog']['vnfd'][0]
+            vdu = vnfd['vdu'][0]
+            change()
+            self._assert_same_result(item, changed_data)
+            self._assert_same_result(item, changed_data, force=True)
+
+    def test_compiled_validation_of_inconsistent_data(self):
+        item, data = self._load_descriptor('cirros_vnfd_im.yaml')
+        vnfd = data['vnfd:vnfd-catalog']['vnfd'][0]
+        duplicated_vdu = copy.deepcopy(vnfd['vdu'][0])
+        duplicated_vdu['description'] = 'merged'
+        vnfd['vdu'].append(duplicated_vdu)
+        vnfd['description'] = ['a', 'list']
+        # merged and stored as pyangbind does, unless strict
+        self._assert_same_result(item, data)
+        with self.assertRaises(ValidationException):
+            Validation(engine="compiled", strict=True).pyangbind_validation(item, data)
+
+    def test_subtree_validation(self):
+        for file in IM_FILES:
+            item, data = self._load_descriptor(file)
+            root = next(iter(data))
+            self.assertEqual(Validation().subtree_validation(item, '/' + root, data[root], data),
+                             next(iter(Validation(engine="compiled").pyangbind_validation(item, data).values())))
+
+        item, data = self._load_descriptor('vepc_im.yaml')
+        vnfd = data['vnfd:vnfd-catalog']['vnfd'][0]
+        vdu = vnfd['vdu'][0]
+        self.assertEqual(Validation().subtree_validation(item, '/vnfd-catalog/vnfd/vdu', vdu)['id'], 'spgwmme')
+        with self.assertRaises(ValidationException):
+            Validation().subtree_validation(item, '/vnfd-catalog/vnfd/vdu/vm-flavor', {'vcpu-count': 'two'})
+        with self.assertRaises(ValidationException):
+            Validation().subtree_validation(item, '/vnfd-catalog/vnfd/vdu', vdu, data)
+
+        path = '/vnfd:vnfd-catalog/vnfd/0/vdu/0'
+        previous = copy.deepcopy(vdu)
+        wrong_changes = [
+            # leafref in the subtree
+            (lambda: vdu['interface'][0].update({'external-connection-point-ref': 'unknown'}), path),
+            # leafref out of the subtree referencing it
+            (lambda: vdu.update({'id': 'renamed'}), path),
+            # duplicated key among the siblings
+            (lambda: vdu.update({'id': vnfd['vdu'][1]['id']}), path + '/id'),
+        ]
+        for change, change_path in wrong_changes:
+            change()
+            with self.assertRaises(ValidationException):
+                Validation().subtree_validation(item, change_path, vdu if change_path == path else vdu['id'], data)
+            vnfd['vdu'][0] = vdu = copy.deepcopy(previous)
+
+        # changes that do not remove referenced values are not checked out of the subtree
+        vdu['vm-flavor']['vcpu-count'] = 4
+        self.assertEqual(Validation().subtree_validation(item, path, vdu, data, previous)['vm-flavor']['vcpu-count'],
+                         4)
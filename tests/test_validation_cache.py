@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from osm_im.validation import Validation, ValidationException
+from osm_im.validation_cache import ValidationCache, SqliteCacheBackend, DirectoryCacheBackend
+import copy
+import datetime
+import os
+import pickle
+import tempfile
+import threading
+import unittest
+
+TESTS_EXAMPLES_FOLDER = 'tests/examples/'
+
+
+class ValidationCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        with open(TESTS_EXAMPLES_FOLDER + 'cirros_vnfd_im.yaml', 'r') as descriptor_file:
+            self.item, self.data = Validation().yaml_validation(descriptor_file.read())
+
+    def test_hits_and_misses(self):
+        cache = ValidationCache()
+        validation = Validation(cache=cache)
+        normalized = validation.pyangbind_validation(self.item, self.data)
+        self.assertEqual(cache.stats()["misses"], 1)
+        self.assertEqual(validation.pyangbind_validation(self.item, self.data), normalized)
+        self.assertIsNone(validation.pyangbind_validation(self.item, self.data, return_normalized=False))
+        self.assertEqual(cache.stats()["hits"], 2)
+        validation.pyangbind_validation(self.item, self.data, force=True)
+        self.assertEqual(cache.stats()["misses"], 2)
+
+    def test_hits_return_copies(self):
+        cache = ValidationCache()
+        validation = Validation(cache=cache)
+        normalized = validation.pyangbind_validation(self.item, self.data)
+        normalized["vnfd:vnfd-catalog"]["vnfd"][0]["id"] = "changed"
+        cached = validation.pyangbind_validation(self.item, self.data)
+        self.assertNotEqual(cached["vnfd:vnfd-catalog"]["vnfd"][0]["id"], "changed")
+        cached["vnfd:vnfd-catalog"]["vnfd"].clear()
+        self.assertEqual(validation.pyangbind_validation(self.item, self.data)["vnfd:vnfd-catalog"]["vnfd"][0]["id"],
+                         self.data["vnfd:vnfd-catalog"]["vnfd"][0]["id"])
+
+    def test_lru_eviction(self):
+        cache = ValidationCache(maxsize=2)
+        for key in ("a", "b"):
+            cache.set(key, {"key": key})
+        cache.get("a")
+        cache.set("c", {"key": "c"})
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), {"key": "a"})
+        self.assertEqual(cache.get("c"), {"key": "c"})
+
+    def test_model_version_in_key(self):
+        self.assertNotEqual(ValidationCache(version="1").key(self.item, self.data),
+                            ValidationCache(version="2").key(self.item, self.data))
+
+    def test_engine_in_key(self):
+        cache = ValidationCache()
+        data = copy.deepcopy(self.data)
+        vdus = data["vnfd:vnfd-catalog"]["vnfd"][0]["vdu"]
+        vdus.append(copy.deepcopy(vdus[0]))
+        # pyangbind merges duplicated list keys, the strict compiled engine rejects them
+        Validation(cache=cache).pyangbind_validation(self.item, data)
+        Validation(engine="compiled", cache=cache).pyangbind_validation(self.item, data)
+        with self.assertRaises(ValidationException):
+            Validation(engine="compiled", cache=cache, strict=True).pyangbind_validation(self.item, data)
+
+    def test_key_keeps_types(self):
+        cache = ValidationCache()
+        same_as_string = [
+            ({1: "b"}, {"1": "b"}),
+            ({"id": "a", 1: "b"}, {"id": "a", "1": "b"}),
+            ({"date": datetime.date(2020, 1, 1)}, {"date": "2020-01-01"}),
+            ({"value": 1}, {"value": "1"}),
+            ({"value": True}, {"value": 1}),
+            ({"value": b"1"}, {"value": "1"}),
+        ]
+        for vnfd, other_vnfd in same_as_string:
+            with self.subTest(vnfd=vnfd):
+                key = cache.key(self.item, {"vnfd:vnfd-catalog": {"vnfd": [vnfd]}})
+                self.assertIsNotNone(key)
+                self.assertNotEqual(key, cache.key(self.item, {"vnfd:vnfd-catalog": {"vnfd": [other_vnfd]}}))
+                self.assertEqual(key, cache.key(self.item, {"vnfd:vnfd-catalog": {"vnfd": [copy.deepcopy(vnfd)]}}))
+        self.assertEqual(cache.key(self.item, {"a": 1, "b": {2: 3, "c": 4}}),
+                         cache.key(self.item, {"b": {"c": 4, 2: 3}, "a": 1}))
+
+    def test_uncacheable_descriptor(self):
+        cache = ValidationCache()
+        data = {"vnfd:vnfd-catalog": {"vnfd": [{"id": "a", "b": object()}]}}
+        self.assertIsNone(cache.key(self.item, data))
+        with self.assertRaises(ValidationException):
+            Validation(cache=cache).descriptor_validation(data)
+        self.assertEqual(len(cache), 0)
+
+    def test_sqlite_backend_shared_by_threads(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            backend = SqliteCacheBackend(os.path.join(tmp_dir, "cache.db"))
+            errors = []
+
+            def use_backend(thread):
+                try:
+                    for position in range(50):
+                        key = "{}-{}".format(thread, position)
+                        backend.set(key, key)
+                        self.assertEqual(backend.get(key), key)
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=use_backend, args=(thread,)) for thread in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(errors, [])
+            self.assertEqual(pickle.loads(pickle.dumps(backend)).get("7-49"), "7-49")
+
+    def test_shared_backends(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for backend in (SqliteCacheBackend(os.path.join(tmp_dir, "cache.db")),
+                            DirectoryCacheBackend(os.path.join(tmp_dir, "cache"))):
+                normalized = Validation(cache=ValidationCache(backend=backend)).pyangbind_validation(
+                    self.item, self.data)
+                # a cache unpickled in other process only shares the backend entries
+                other_cache = pickle.loads(pickle.dumps(ValidationCache(backend=backend)))
+                self.assertEqual(Validation(cache=other_cache).pyangbind_validation(self.item, self.data),
+                                 normalized)
+                self.assertEqual(other_cache.stats()["hits"], 1)
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from osm_im.im_translation import translate_im_model_to_sol006
+from osm_im.validation import Validation, ValidationException
+from osm_im.validation_server import ValidationServer, ValidationClient, get_default_address
+from osm_im.validation_server import ADDRESS_ENVIRONMENT_VARIABLE, DEFAULT_SOCKET_NAME
+import os
+import socket
+import stat
+import tempfile
+import unittest
+import yaml
+
+TESTS_EXAMPLES_FOLDER = 'tests/examples/'
+
+
+class ValidationServerTest(unittest.TestCase):
+
+    def test_client_with_and_without_server(self):
+        with open(TESTS_EXAMPLES_FOLDER + 'cirros_vnfd_im.yaml', 'r') as f:
+            descriptor = f.read()
+        wrong_descriptor = descriptor.replace("vnfd:vnfd-catalog:", "vnfd:vnfd-catalog:\n  unknown: 1")
+        with self.assertRaises(ValidationException) as context:
+            Validation().descriptor_validation(wrong_descriptor)
+        local_error = str(context.exception)
+
+        with tempfile.TemporaryDirectory() as directory:
+            address = os.path.join(directory, "validation.sock")
+            client = ValidationClient(address)
+            self.assertFalse(client.is_server_running())
+
+            server = ValidationServer(address, workers=2)
+            server.start()
+            try:
+                self.assertTrue(client.is_server_running())
+                client.descriptor_validation(descriptor)
+                client.descriptor_validation(descriptor.encode())
+                with self.assertRaises(ValidationException) as context:
+                    client.descriptor_validation(wrong_descriptor)
+                self.assertEqual(str(context.exception), local_error)
+                self.assertEqual(client.translate_im_model_to_sol006(yaml.safe_load(descriptor)),
+                                 translate_im_model_to_sol006(yaml.safe_load(descriptor)))
+            finally:
+                server.stop()
+            self.assertFalse(os.path.exists(address))
+
+            # Falls back to validating in process
+            client.descriptor_validation(descriptor)
+            with self.assertRaises(ValidationException) as context:
+                client.descriptor_validation(wrong_descriptor)
+            self.assertEqual(str(context.exception), local_error)
+            with self.assertRaises(OSError):
+                ValidationClient(address, fallback=False).descriptor_validation(descriptor)
+
+    def test_default_address_and_socket_permissions(self):
+        with tempfile.TemporaryDirectory() as directory:
+            environment = {name: os.environ.pop(name, None)
+                           for name in (ADDRESS_ENVIRONMENT_VARIABLE, "XDG_RUNTIME_DIR")}
+            os.environ["XDG_RUNTIME_DIR"] = directory
+            try:
+                address = get_default_address()
+            finally:
+                for name, value in environment.items():
+                    os.environ.pop(name, None)
+                    if value is not None:
+                        os.environ[name] = value
+            self.assertEqual(address, os.path.join(directory, DEFAULT_SOCKET_NAME))
+
+            server = ValidationServer(address, workers=1)
+            server.start()
+            try:
+                self.assertEqual(stat.S_IMODE(os.stat(address).st_mode), 0o600)
+                self.assertTrue(ValidationClient(address).is_server_running())
+            finally:
+                server.stop()
+
+    def test_idle_clients_do_not_block_workers(self):
+        with tempfile.TemporaryDirectory() as directory:
+            address = os.path.join(directory, "validation.sock")
+            server = ValidationServer(address, workers=1, timeout=0.2)
+            server.start()
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as idle_client:
+                    idle_client.connect(address)
+                    self.assertTrue(ValidationClient(address, fallback=False, timeout=10).is_server_running())
+                    # the worker closed the idle connection
+                    idle_client.settimeout(10)
+                    self.assertEqual(idle_client.recv(1), b"")
+            finally:
+                server.stop()
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''
+Post-processes the pyangbind generated modules so that structurally identical classes are only
+generated once.
+
+pyangbind generates a full class for every place a grouping is used, so the same code is repeated
+for every use of the shared groupings (mano-types, common-augments...). Two classes are identical
+when their code only differs in docstrings, in the schema path returned by _path() for objects
+without parent, and in the names of child classes that are identical themselves. Classes are
+generated before the classes using them, so every class is compared with the already deduplicated
+ones. Only the first class is kept; the others become subclasses of it that only keep their
+docstring and their own _path(), so class names and paths do not change.
+
+Usage: python3 tools/dedup_bindings.py osm_im/vnfd.py [osm_im/nsd.py ...]
+'''
+
+import re
+import sys
+
+DEDUP_MARK = "# dedup-bindings\n"
+CLASS_START = re.compile(r"(?m)^(?=class )")
+CLASS_HEADER = re.compile(r"class (\w+)\((\w+)\):\n")
+DOCSTRING = re.compile(r'(:\n)[ ]*"""[\s\S]*?"""\n')
+PATH_FALLBACK = re.compile(r'\n  def _path\(self\):\n    if hasattr\(self, "_parent"\):\n'
+                           r'      return self\._parent\._path\(\)\+\[self\._yang_name\]\n    else:\n'
+                           r'      return (\[.*?\])\n')
+CLASS_DOCSTRING = re.compile(r'  """[\s\S]*?"""\n')
+GENERATED_CLASS_NAME = re.compile(r"\byc_\w+")
+
+SUBCLASS_TEMPLATE = '''class {name}({canonical}):
+{docstring}  __slots__ = ()
+
+  def _path(self):
+    if hasattr(self, "_parent"):
+      return self._parent._path()+[self._yang_name]
+    else:
+      return {path}
+
+
+'''
+
+
+def class_key(class_code, canonical_names):
+    '''
+    Returns the code of a class without its name, docstrings, _path() fallback and trailing blank lines (the
+    last class of a module has none), with the generated classes it uses replaced by their canonical class
+    '''
+    code = CLASS_HEADER.sub(r"(\2):\n", class_code.rstrip() + "\n", count=1)
+    code = DOCSTRING.sub(r"\1", code)
+    code = PATH_FALLBACK.sub("\n  def _path(self): PATH\n", code)
+    return GENERATED_CLASS_NAME.sub(lambda m: canonical_names.get(m.group(0), m.group(0)), code)
+
+
+def dedup_module(code):
+    '''
+    Returns (deduplicated code, number of classes, number of classes replaced by a subclass)
+    '''
+    header, *classes = CLASS_START.split(code)
+    if DEDUP_MARK in header:
+        return code, len(classes), 0
+    canonical_names = {}
+    classes_by_key = {}
+    output = []
+    replaced = 0
+    for class_code in classes:
+        header_match = CLASS_HEADER.match(class_code)
+        name = header_match.group(1)
+        path_match = PATH_FALLBACK.search(class_code)
+        key = class_key(class_code, canonical_names)
+        canonical = classes_by_key.get(key)
+        if canonical is None or not name.startswith("yc_") or path_match is None:
+            classes_by_key.setdefault(key, name)
+            canonical_names[name] = name
+            output.append(class_code)
+            continue
+        canonical_names[name] = canonical
+        docstring = CLASS_DOCSTRING.match(class_code, header_match.end())
+        output.append(SUBCLASS_TEMPLATE.format(name=name, canonical=canonical, path=path_match.group(1),
+                                               docstring=docstring.group(0) if docstring else ""))
+        replaced += 1
+    # the mark goes after the comment lines at the top, as lazy_bindings checks its mark on the second line
+    comments_end = re.match(r"(#.*\n)*", header).end()
+    header = header[:comments_end] + DEDUP_MARK + header[comments_end:]
+    return header + "".join(output), len(classes), replaced
+
+
+def main(files):
+    for file in files:
+        with open(file, "r") as f:
+            code = f.read()
+        dedup_code, classes, replaced = dedup_module(code)
+        with open(file, "w") as f:
+            f.write(dedup_code)
+        print("{}: {} of {} classes deduplicated, {} -> {} lines".format(
+            file, replaced, classes, code.count("\n"), dedup_code.count("\n")))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
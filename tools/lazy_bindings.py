@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''
+Post-processes the pyangbind generated modules so that the members of every container
+and list entry are built on first access instead of in __init__.
+
+pyangbind builds the whole schema subtree (nested containers and all their leaves) each
+time a class is instantiated, so creating a root object or a new list entry scales with
+the size of the schema. After this step __init__ only sets the members to None and the
+getter builds them through the generated _unset_<member> method. pyangbind itself
+(loading, serialization, get, elements) always accesses members through their property.
+
+Usage: python3 tools/lazy_bindings.py osm_im/vnfd.py [osm_im/nsd.py ...]
+'''
+
+import re
+import sys
+
+INIT_MEMBER = re.compile(r"^    self\.__(\w+) = YANGDynClass\(.*\)$", re.MULTILINE)
+GETTER_RETURN = "\n    return self.__{0}\n"
+LAZY_GETTER_RETURN = "\n    if self.__{0} is None:\n      self._unset_{0}()\n    return self.__{0}\n"
+LAZY_MARK = "# lazy-bindings\n"
+
+
+def make_class_lazy(class_code):
+    init_start = class_code.find("  def __init__(self, *args, **kwargs):")
+    if init_start == -1:
+        return class_code
+    init_end = class_code.find("\n  def ", init_start + 1)
+    init_code = class_code[init_start:init_end]
+    members = [m for m in INIT_MEMBER.findall(init_code) if "  def _unset_{}(self):".format(m) in class_code]
+    if not members:
+        return class_code
+    lazy_init_code = INIT_MEMBER.sub(
+        lambda m: "    self.__{} = None".format(m.group(1)) if m.group(1) in members else m.group(0), init_code)
+    class_code = class_code[:init_start] + lazy_init_code + class_code[init_end:]
+    for member in members:
+        class_code = class_code.replace(GETTER_RETURN.format(member), LAZY_GETTER_RETURN.format(member))
+    return class_code
+
+
+def make_module_lazy(code):
+    header, _, body = code.partition("\n")
+    if body.startswith(LAZY_MARK):
+        return code
+    classes = re.split(r"(?m)^(?=class )", body)
+    return header + "\n" + LAZY_MARK + "".join(make_class_lazy(class_code) for class_code in classes)
+
+
+def main(files):
+    for file in files:
+        with open(file, "r") as f:
+            code = f.read()
+        with open(file, "w") as f:
+            f.write(make_module_lazy(code))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])